@@ -1,38 +1,103 @@
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.core.window import Window
 
-from utils.config import WINDOW_SIZE
+from utils.config import (
+    WINDOW_SIZE,
+    PIPELINE_PROCESSES,
+    STARTUP_BACKGROUND,
+    STARTUP_SERIAL_MODEL_LOADS,
+    STARTUP_LOADING_SCREEN_MAX_S,
+)
+from utils.startup import StartupLoader, REQUIRED_TASKS, schedule_startup
 from gui.loading_screen import LoadingScreen
 from gui.calibration_screen import CalibrationScreen
-from gui.main_screen import MainScreen
+from gui.main_screen import MainScreen, create_camera
+from hardware.motor_controller import MotorController
+from vision.object_tracker import DetectionPipeline, load_model, warm_up
+
+
+def _start_motor():
+    #  Startaufgabe erst fertig, wenn der Motorprozess Befehle abholt
+    return MotorController().wait_ready()
 
 
 class AMACUSApp(App):
     def build(self):
         Window.size = WINDOW_SIZE
         Window.maximize()
+        #  Modelle, Warmup, Kamera und Motorprozess ab hier im Hintergrund; im
+        #  Prozessmodus startet ProcessPipeline alles selbst in ihren Prozessen
+        self.startup = None
+        if STARTUP_BACKGROUND and not PIPELINE_PROCESSES:
+            self.startup = schedule_startup(StartupLoader(), load_model, warm_up, create_camera, _start_motor,
+                                            serial_models=STARTUP_SERIAL_MODEL_LOADS).start()
         root = BoxLayout(orientation='vertical')
-        self.loading_screen = LoadingScreen(on_finished_callback=self.show_calibration)
+        if self.startup is not None:
+            self.loading_screen = LoadingScreen(on_finished_callback=self.show_calibration,
+                                                progress=self.startup.progress,
+                                                max_duration=STARTUP_LOADING_SCREEN_MAX_S, hold=0.5)
+        else:
+            self.loading_screen = LoadingScreen(on_finished_callback=self.show_calibration)
         root.add_widget(self.loading_screen)
         self.root_widget = root
         return root
 
     def show_calibration(self):
+        if self.startup is not None:
+            self.startup.mark("calibration")
         self.root_widget.clear_widgets()
-        self.calibration_screen = CalibrationScreen(main_app=self)
+        self.calibration_screen = CalibrationScreen(main_app=self, startup=self.startup)
         self.root_widget.add_widget(self.calibration_screen)
 
     def start_main_program(self):
         lichtbedingung = self.calibration_screen.steps[2].dropdown_value
+        if self.startup is None:
+            self._show_main(lichtbedingung)
+            return
+        self.startup.mark("start_pressed")
+        #  ohne den UI-Thread zu blockieren auf Personenmodell, Kamera und Motor warten
+        Clock.schedule_interval(lambda dt: self._start_when_ready(lichtbedingung), 0.1)
+
+    def _start_when_ready(self, lichtbedingung):
+        pending = [name for name in REQUIRED_TASKS if not self.startup.ready((name,))]
+        if pending:
+            self.calibration_screen.set_waiting(pending)
+            return True
+        self._show_main(lichtbedingung)
+        return False
+
+    def _show_main(self, lichtbedingung):
+        kwargs = {}
+        startup = self.startup
+        if startup is not None:
+            #  face/seg holt die Pipeline im Hintergrund ab, bis dahin ohne Gesicht und Maske;
+            #  der Zeitbericht steht unter "startup" in /metrics (MainScreen)
+            detector = DetectionPipeline({
+                "person": startup.source("person_model", lambda: load_model("person")),
+                "face": startup.source("face_warmup", lambda: warm_up(load_model("face"))),
+                "seg": startup.source("seg_warmup", lambda: warm_up(load_model("seg"))),
+            }, lazy=True)
+            kwargs = dict(camera=startup.value("camera"), motor=startup.value("motor"), detector=detector,
+                          startup=startup)
         self.root_widget.clear_widgets()
-        self.main_screen = MainScreen(lichtbedingung=lichtbedingung)
+        self.main_screen = MainScreen(lichtbedingung=lichtbedingung, **kwargs)
         self.root_widget.add_widget(self.main_screen)
+        if startup is not None:
+            startup.mark("main_screen")
 
     def on_stop(self):
         if hasattr(self, 'main_screen'):
             self.main_screen.cleanup()
+        elif self.startup is not None:
+            #  beendet, bevor MainScreen übernommen hat: Kamera und Motor selbst stoppen
+            for name in ("camera", "motor"):
+                if self.startup.ready((name,)):
+                    started = self.startup.value(name)
+                    if started is not None:
+                        started.stop()
 
 
 if __name__ == '__main__':
-    AMACUSApp().run()
\ No newline at end of file
+    AMACUSApp().run()
@@ -0,0 +1,154 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from hardware.camera import RealSenseCamera
+
+
+HOST_DOMAIN = "system_time"
+
+
+class FakeVideoFrame:
+    def __init__(self, data, frame_number, timestamp_ms):
+        self._data = data
+        self._frame_number = frame_number
+        self._timestamp_ms = timestamp_ms
+
+    def __bool__(self):
+        return True
+
+    def get_data(self):
+        return self._data
+
+    def get_frame_number(self):
+        return self._frame_number
+
+    def get_timestamp(self):
+        return self._timestamp_ms
+
+    def get_frame_timestamp_domain(self):
+        return HOST_DOMAIN
+
+
+class FakeFrameset:
+    def __init__(self, color, depth):
+        self._color = color
+        self._depth = depth
+
+    def get_color_frame(self):
+        return self._color
+
+    def get_depth_frame(self):
+        return self._depth
+
+
+class FakePipeline:
+    #  Stand-in für rs.pipeline: wait_for_frames() liefert im Kameratakt neue Frames,
+    #  die Framenummer steckt im ersten Tiefenpixel (damit lässt sich prüfen, ob ein View
+    #  aus latest() überschrieben wurde). skip: Framenummern, die der "Sensor" verliert,
+    #  fail: Framenummern, bei denen wait_for_frames einmal eine Exception wirft
+    def __init__(self, fps=30.0, width=1280, height=720, skip=(), fail=()):
+        self.interval = 1.0 / fps
+        self.skip = set(skip)
+        self.fail = set(fail)
+        self.frame_number = 0
+        self.stopped = False
+        self._next = time.monotonic()
+        self._color = np.zeros((height, width, 3), dtype=np.uint8)
+        self._depth = np.zeros((height, width), dtype=np.uint16)
+
+    def wait_for_frames(self):
+        if self.stopped:
+            raise RuntimeError("pipeline stopped")
+        time.sleep(max(0.0, self._next - time.monotonic()))
+        self._next = max(self._next + self.interval, time.monotonic())
+        self.frame_number += 1
+        while self.frame_number in self.skip:
+            self.frame_number += 1
+        if self.frame_number in self.fail:
+            self.fail.discard(self.frame_number)
+            raise RuntimeError(f"frame {self.frame_number} did not arrive")
+        #  wie librealsense: jeder Frame hat eigenen Speicher
+        color = self._color.copy()
+        depth = self._depth.copy()
+        depth[0, 0] = self.frame_number
+        timestamp_ms = time.time() * 1000.0
+        return FakeFrameset(FakeVideoFrame(color, self.frame_number, timestamp_ms),
+                            FakeVideoFrame(depth, self.frame_number, timestamp_ms))
+
+    def stop(self):
+        self.stopped = True
+
+
+class PassThroughAlign:
+    def process(self, frames):
+        return frames
+
+
+def consume(camera, frames, work_s, hold_s):
+    #  Consumer wie die Engine: latest() abholen, work_s "rechnen"; hold_s danach prüfen,
+    #  ob die Views noch den abgeholten Frame zeigen (der Writer darf den gehaltenen
+    #  Slot nicht überschreiben)
+    got = []
+    corrupted = 0
+    ages = []
+    while len(got) < frames:
+        captured = camera.latest(timeout=1.0)
+        if captured is None:
+            continue
+        ages.append(time.monotonic() - captured.received)
+        time.sleep(hold_s)
+        if int(captured.depth[0, 0]) != captured.frame_number:
+            corrupted += 1
+        time.sleep(max(0.0, work_s - hold_s))
+        got.append((captured.frame_number, captured.dropped))
+    return got, corrupted, ages
+
+
+def check(name, ok, detail, failed):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}: {detail}")
+    if not ok:
+        failed.append(name)
+
+
+def run(label, fps, frames, work_s, skip=(), fail=()):
+    print(f"{label}:")
+    failed = []
+    pipeline = FakePipeline(fps, skip=skip, fail=fail)
+    camera = RealSenseCamera(threaded=True, pipeline=pipeline, align=PassThroughAlign(),
+                             time_domains=(HOST_DOMAIN,))
+    got, corrupted, ages = consume(camera, frames, work_s, hold_s=min(work_s, 2.0 / fps))
+    numbers = [n for n, _ in got]
+    #  jeder Sensorframe (ab 1) bis zum zuletzt abgeholten wurde abgeholt oder als verworfen gezählt
+    last_number, last_dropped = got[-1]
+    check("latest only", all(b > a for a, b in zip(numbers, numbers[1:])),
+          f"{len(numbers)} frames, numbers strictly increasing", failed)
+    check("drop accounting", last_number == len(numbers) + last_dropped,
+          f"frames 1..{last_number}: {len(numbers)} delivered + {last_dropped} dropped", failed)
+    check("views stable", corrupted == 0, f"{corrupted} frames overwritten while held", failed)
+    print(f"  age at handoff: median {np.median(ages) * 1000:.2f} ms, max {max(ages) * 1000:.2f} ms")
+    t0 = time.monotonic()
+    camera.stop()
+    stop_ms = (time.monotonic() - t0) * 1000.0
+    alive = [t.name for t in threading.enumerate() if t.name == "RealSenseCapture"]
+    check("stop", not alive and pipeline.stopped, f"thread joined and pipeline stopped in {stop_ms:.1f} ms", failed)
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Threaded RealSenseCamera capture against a fake rs.pipeline: "
+                                                 "latest-only handoff, drop accounting, stop()")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    interval = 1.0 / args.fps
+    failed = []
+    failed += run("fast consumer", args.fps, args.frames, 0.2 * interval)
+    failed += run("slow consumer (2.5 frame intervals)", args.fps, args.frames, 2.5 * interval)
+    failed += run("sensor drops and a capture error", args.fps, args.frames, 0.2 * interval,
+                  skip=(5, 6, 12), fail=(20,))
+    if failed:
+        raise SystemExit(f"capture checks failed: {', '.join(failed)}")
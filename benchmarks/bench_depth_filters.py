@@ -0,0 +1,142 @@
+import argparse
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_sparse_align import COLOR_INTRINSICS, render_depth
+from vision.depth_filters import DepthFilterChain
+from vision.depth_sampler import DepthSampler
+
+
+#  Standard-ROI der Engine (37-61 % x 37-65 %) im alignten 1280x720-Bild
+ROI = (int(1280 * 0.37), int(720 * 0.37), int(1280 * 0.61), int(720 * 0.65))
+#  ROI von bench_pipeline/bench_quality (25-75 % x 10-90 %), eine großzügig gezogene ROI
+WIDE_ROI = (int(1280 * 0.25), int(720 * 0.1), int(1280 * 0.75), int(720 * 0.9))
+#  Gesichtsrechteck der Person in der Bildmitte (wie face.box beim Sampling)
+FACE = (610, 300, 670, 370)
+
+
+def person_scene(distance):
+    return [((0.0, 0.0, 1.0), 4.0, None),
+            ((0.0, 0.0, 1.0), distance, ((-0.25, 0.25), (-0.9, 0.9)))]
+
+
+#  name -> Szene je Frame (Frame-Index, fps) als Ebenenliste wie in bench_sparse_align
+SCENES = {
+    "plane 2 m": lambda i, fps: [((0.0, 0.0, 1.0), 2.0, None)],
+    "tilted plane": lambda i, fps: [((0.25, -0.1, 1.0), 2.5, None)],
+    "person 1.5 m, wall 4 m": lambda i, fps: person_scene(1.5),
+    "person walking 1 m/s": lambda i, fps: person_scene(3.0 - i / fps),
+}
+
+
+def person_box(truth):
+    #  Trackerbox der Person: alles vor der Wand (4 m); Szenen ohne Wand haben keine
+    ys, xs = np.nonzero((truth > 0) & (truth < 3900))
+    if len(xs) == 0 or truth.max() < 3900:
+        return ()
+    return [(xs.min(), ys.min(), xs.max() + 1, ys.max() + 1)]
+
+
+def add_noise(truth, rng, holes=0.05, speckle=0.01):
+    #  Stereo-Rauschen wächst mit z^2 (D455 etwa 2 mm * z^2/m), halb pixelweise, halb
+    #  räumlich korreliert (Blockmatching), dazu einzelne Ausreißer und Löcher in
+    #  Flecken (Textur-/Reflexionsausfälle wie auf Haut und Stoff)
+    z = truth.astype(np.float64)
+    correlated = cv2.GaussianBlur(rng.normal(0.0, 1.0, z.shape).astype(np.float32), (0, 0), 6)
+    correlated *= 1.0 / max(float(correlated.std()), 1e-6)
+    sigma = 0.002 * (z / 1000.0) ** 2 * 1000.0
+    noisy = z + (rng.normal(0.0, 1.0, z.shape) + correlated) * sigma / np.sqrt(2.0)
+    outliers = rng.random(z.shape) < speckle
+    noisy[outliers] += rng.normal(0.0, 300.0, int(outliers.sum()))
+    seeds = (rng.random(z.shape) < holes / 9.0).astype(np.uint8)
+    blobs = np.zeros(z.shape, dtype=bool)
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            blobs |= np.roll(np.roll(seeds, dy, 0), dx, 1) > 0
+    noisy[blobs | (truth == 0)] = 0
+    return np.clip(np.rint(noisy), 0, 65535).astype(np.uint16)
+
+
+class SpanTimer:
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    @contextmanager
+    def __call__(self, stage):
+        t0 = time.perf_counter()
+        yield
+        self.seconds[stage] += time.perf_counter() - t0
+
+
+def run(scene, frames, fps, rng, chain=None, timer=None):
+    x1, y1, x2, y2 = ROI
+    errors, holes, face_errors = [], [], []
+    for i in range(frames):
+        truth = render_depth(scene(i, fps), COLOR_INTRINSICS)
+        depth = add_noise(truth, rng)
+        if chain is not None:
+            depth = chain.apply(depth, ROI, timer, person_box(truth))
+        a = depth[y1:y2, x1:x2].astype(np.float64)
+        t = truth[y1:y2, x1:x2].astype(np.float64)
+        valid = a > 0
+        holes.append(1.0 - valid.mean())
+        #  Einschwingen des Temporalfilters nicht mitzählen
+        if i < 5:
+            continue
+        errors.append(np.sqrt(np.mean((a[valid] - t[valid]) ** 2)))
+        face_errors.append(DepthSampler(depth, ROI).rect_mean_mm(*FACE) - DepthSampler(truth, ROI).rect_mean_mm(*FACE))
+    face_errors = np.asarray(face_errors)
+    return {
+        "rmse_mm": float(np.mean(errors)),
+        "holes": float(np.mean(holes)),
+        "face_bias_mm": float(np.mean(face_errors)),
+        "face_jitter_mm": float(np.std(face_errors)),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="ROI depth filter chain on synthetic noisy depth: accuracy and cost")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--fps", type=float, default=30.0)
+    args = parser.parse_args()
+
+    print(f"{'scene':<26}{'':<9}{'RMSE mm':>9}{'holes':>8}{'face bias':>11}{'face jitter':>13}")
+    timer = SpanTimer()
+    filtered_frames = 0
+    for name, scene in SCENES.items():
+        results = [
+            ("raw", run(scene, args.frames, args.fps, np.random.default_rng(1))),
+            ("filtered", run(scene, args.frames, args.fps, np.random.default_rng(1), DepthFilterChain(), timer)),
+            ("+ fill", run(scene, args.frames, args.fps, np.random.default_rng(1),
+                           DepthFilterChain(hole_fill="farthest"), timer)),
+        ]
+        filtered_frames += args.frames
+        for label, r in results:
+            print(f"{name if label == 'raw' else '':<26}{label:<9}{r['rmse_mm']:>9.1f}{r['holes'] * 100:>7.1f}%"
+                  f"{r['face_bias_mm']:>11.1f}{r['face_jitter_mm']:>13.1f}")
+    print()
+    roi_px = (ROI[2] - ROI[0]) * (ROI[3] - ROI[1])
+    print(f"cost per frame on the {ROI[2] - ROI[0]}x{ROI[3] - ROI[1]} ROI ({roi_px / (1280 * 720) * 100:.0f}% of the frame):")
+    for stage, seconds in timer.seconds.items():
+        #  spatial/temporal liefen in beiden Varianten, hole_fill nur in "+ fill"
+        frames = filtered_frames if stage == "depth_hole_fill" else 2 * filtered_frames
+        print(f"  {stage:<18}{seconds / frames * 1000.0:>7.2f} ms")
+    #  apply filtert in place; auf demselben Frame wiederholt kostet es gleich viel
+    depth = add_noise(render_depth(SCENES["person walking 1 m/s"](0, args.fps), COLOR_INTRINSICS),
+                      np.random.default_rng(2))
+    for label, rect in (("apply (total)", ROI), ("wide ROI", WIDE_ROI)):
+        chain = DepthFilterChain()
+        t0 = time.perf_counter()
+        for _ in range(args.frames):
+            chain.apply(depth, rect)
+        size = f"{rect[2] - rect[0]}x{rect[3] - rect[1]}"
+        print(f"  {label:<18}{(time.perf_counter() - t0) / args.frames * 1000.0:>7.2f} ms ({size})")
+    t0 = time.perf_counter()
+    for _ in range(max(1, args.frames // 10)):
+        DepthFilterChain().apply(depth, (0, 0, 1280, 720))
+    print(f"  {'full frame':<18}{(time.perf_counter() - t0) / max(1, args.frames // 10) * 1000.0:>7.2f} ms "
+          f"(same chain on 1280x720, single frame)")
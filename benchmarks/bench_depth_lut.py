@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import numpy as np
+
+from utils.config import LIGHTING_OPTIONS
+from vision.depth_processor import (
+    DEPTH_LUT_SIZE,
+    DepthCorrector,
+    correct_distance,
+    get_lighting_lut,
+)
+
+
+#  halber Millimeter durch die Rundung auf ganze Millimeter
+TOLERANCE_M = 0.0005 + 1e-9
+
+
+def check_equivalence(lichtbedingung):
+    lighting = get_lighting_lut(lichtbedingung)
+    corrector = DepthCorrector(lighting)
+    reference = np.array([correct_distance(mm / 1000.0, lighting) for mm in range(DEPTH_LUT_SIZE)])
+    lut_m = corrector.lut / 1000.0
+    error = np.abs(lut_m - reference)
+    worst = int(np.argmax(error))
+    assert error[worst] <= TOLERANCE_M, f"{lichtbedingung}: {error[worst]:.6f} m at {worst} mm"
+    #  Klemmung unten: unterhalb des ersten Messwerts bleibt der Messwert
+    below = int(lighting[0] * 1000) - 1
+    assert corrector.lut[below] == below and corrector.lut[0] == 0
+    #  Klemmung oben: oberhalb des letzten Messwerts 10 m
+    above = int(np.ceil(max(lighting) * 1000)) + 1
+    assert np.all(corrector.lut[above:] == 10000)
+    return float(error.max())
+
+
+def bench(corrector, lighting, repeats):
+    rng = np.random.default_rng(0)
+    depth = rng.integers(0, 12000, (720, 1280), dtype=np.uint16)
+    samples = depth.ravel()[:2000]
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        [correct_distance(d / 1000.0, lighting) for d in samples]
+    scalar_samples = (time.perf_counter() - t0) / repeats
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        corrector.correct(samples)
+    lut_samples = (time.perf_counter() - t0) / repeats
+
+    out = np.empty_like(depth)
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        corrector.correct(depth, out=out)
+    lut_frame = (time.perf_counter() - t0) / repeats
+    return scalar_samples, lut_samples, lut_frame
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Dense depth-correction LUT: equivalence check and timing")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    for option in LIGHTING_OPTIONS:
+        max_error = check_equivalence(option)
+        print(f"{option:<28} max |LUT - correct_distance| = {max_error * 1000:.3f} mm")
+
+    lighting = get_lighting_lut(LIGHTING_OPTIONS[0])
+    scalar_samples, lut_samples, lut_frame = bench(DepthCorrector(lighting), lighting, args.repeats)
+    print(f"2000 samples, scalar bisect : {scalar_samples * 1000:8.3f} ms")
+    print(f"2000 samples, LUT gather    : {lut_samples * 1000:8.3f} ms")
+    print(f"1280x720 frame, LUT gather  : {lut_frame * 1000:8.3f} ms")
@@ -0,0 +1,110 @@
+import argparse
+import time
+
+import numpy as np
+
+from vision.depth_sampler import DepthSampler
+
+
+#  Bisherige Varianten aus FocusEngine als Referenz
+
+def face_mean_reference(depth_image, box):
+    fx1, fy1, fx2, fy2 = box
+    face_area = depth_image[fy1:fy2, fx1:fx2]
+    valid = face_area[face_area > 0]
+    return float(np.mean(valid)) if valid.size > 0 else 0.0
+
+
+def flow_median_reference(depth_image, centers):
+    all_depths = []
+    windows = []
+    for x_track, y_track in centers:
+        x1w = max(0, x_track - 5)
+        x2w = min(depth_image.shape[1], x_track + 5)
+        y1w = max(0, y_track - 5)
+        y2w = min(depth_image.shape[0], y_track + 5)
+        window = depth_image[y1w:y2w, x1w:x2w] / 1000.0
+        all_depths.extend(window.flatten())
+        windows.append((x1w, y1w, x2w, y2w))
+    depths = [d for d in all_depths if d > 0]
+    return float(np.median(depths)) if depths else 0.0, windows
+
+
+def mask_samples_reference(depth_image, x1, y1, mask, ratio):
+    y_coords, x_coords = np.where(mask)
+    sample_size = max(1, int(len(y_coords) * ratio))
+    indices = np.random.choice(len(y_coords), sample_size, replace=False)
+    x_sample = x_coords[indices] + x1
+    y_sample = y_coords[indices] + y1
+    depths = depth_image[y_sample, x_sample]
+    return x_sample[depths > 0], depths[depths > 0]
+
+
+def make_frame(rng, holes=0.08):
+    depth = rng.normal(2500, 300, (720, 1280)).clip(300, 9000).astype(np.uint16)
+    depth[rng.random(depth.shape) < holes] = 0
+    return depth
+
+
+def check(rng, roi, trials=200):
+    depth = make_frame(rng)
+    direct = DepthSampler(depth, roi)
+    sampler = DepthSampler(depth, roi)
+    sampler._build()
+    rx1, ry1, rx2, ry2 = roi
+    for _ in range(trials):
+        x1 = int(rng.integers(rx1, rx2 - 20))
+        y1 = int(rng.integers(ry1, ry2 - 20))
+        box = (x1, y1, int(rng.integers(x1 + 1, min(rx2, x1 + 120))), int(rng.integers(y1 + 1, min(ry2, y1 + 120))))
+        reference = face_mean_reference(depth, box)
+        assert abs(sampler.rect_mean_mm(*box) - reference) < 1e-6, box
+        assert abs(direct.rect_mean_mm(*box) - reference) < 1e-6, box
+    #  inkl. Punkte am Bildrand
+    centers = np.column_stack([rng.integers(-3, 1283, 40), rng.integers(-3, 723, 40)])
+    reference, ref_windows = flow_median_reference(depth, centers.tolist())
+    median_mm, windows = sampler.windows_median_mm(centers)
+    assert abs(median_mm / 1000.0 - reference) < 1e-9, (median_mm, reference)
+    assert [tuple(w) for w in windows.tolist()] == ref_windows
+
+
+def bench(rng, roi, repeats):
+    depth = make_frame(rng)
+    face = (700, 250, 780, 340)
+    centers = np.column_stack([rng.integers(600, 900, 30), rng.integers(200, 500, 30)])
+    mask = np.zeros((500, 220), dtype=bool)
+    mask[40:480, 20:200] = True
+    timings = {}
+
+    def timed(name, fn):
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        timings[name] = (time.perf_counter() - t0) / repeats * 1000.0
+
+    timed("face mean, reference", lambda: face_mean_reference(depth, face))
+    timed("face mean, sampler (direct)", lambda: DepthSampler(depth, roi).rect_mean_mm(*face))
+    timed("integral build (ROI)", lambda: DepthSampler(depth, roi)._build())
+    sampler = DepthSampler(depth, roi)
+    sampler._build()
+    timed("face mean, sampler (integral)", lambda: sampler.rect_mean_mm(*face))
+    boxes = np.column_stack([centers - 5, centers + 5])
+    timed("30 window means, sampler (integral)", lambda: sampler.rect_means_mm(boxes))
+    timed("flow median, reference", lambda: flow_median_reference(depth, centers.tolist()))
+    timed("flow median, sampler", lambda: sampler.windows_median_mm(centers))
+    timed("mask samples, reference", lambda: mask_samples_reference(depth, 650, 150, mask, 0.001))
+    timed("mask samples, sampler", lambda: sampler.mask_samples(650, 150, mask, 0.001))
+    timed("mask median, sampler", lambda: sampler.mask_median_mm(650, 150, mask))
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="DepthSampler: equivalence check and timing against the previous sampling code")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    roi = (320, 120, 960, 700)
+    check(rng, roi)
+    print("face mean and flow median match the previous implementation")
+    for name, ms in bench(rng, roi, args.repeats).items():
+        print(f"{name:<38}{ms:9.3f} ms")
@@ -0,0 +1,129 @@
+import argparse
+import bisect
+import multiprocessing as mp
+import threading
+import time
+
+from benchmarks.stubs import FakeMotorKit, StubDetectionPipeline, SyntheticScene
+from hardware.frame_ring import CapturedFrame, capture_time, exposure_monotonic
+from hardware.motor_controller import MotorController, _motor_worker
+from utils.latency import SEGMENTS, TOTALS, LatencyTracer
+from vision.byte_tracker import ByteTracker
+from vision.focus_engine import FocusEngine
+from vision.inference_scheduler import InferenceScheduler
+
+
+class FakeClockCamera:
+    #  Synthetische Frames mit Sensorzeitstempel in Host-Wanduhr-ms (wie RealSense
+    #  global time). Belichtung liegt exposure_age s vor dem Eintreffen; der
+    #  Zeitstempel wird wie in RealSenseCamera._grab auf time.monotonic() umgerechnet.
+    def __init__(self, frames, fps=30.0, exposure_age=0.040, **scene_kwargs):
+        self.scene = SyntheticScene(**scene_kwargs)
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.exposure_age = exposure_age
+        self._next = time.monotonic()
+
+    def latest(self, timeout=None):
+        if self.scene.frame_number >= self.frames:
+            return None
+        time.sleep(max(0.0, self._next - time.monotonic()))
+        self._next = max(self._next + self.interval, time.monotonic())
+        color, depth = self.scene.next_frame()
+        received = time.monotonic()
+        wall = time.time()
+        timestamp_ms = (wall - self.exposure_age) * 1000.0
+        return CapturedFrame(color, depth, self.scene.frame_number, timestamp_ms, 0, received,
+                             exposure_monotonic(timestamp_ms, wall, received))
+
+
+class ThreadMotor(MotorController):
+    #  _motor_worker im Thread statt im Prozess, damit die Schrittzeiten des Fakes lesbar sind
+    def __init__(self):
+        self.kit = FakeMotorKit()
+        self.queue = mp.Queue()
+        self.metrics_queue = mp.Queue(maxsize=4)
+        self.trace_queue = mp.Queue(maxsize=256)
+        self.stop_event = mp.Event()
+        self.current_motor_steps = mp.Value('i', 0)
+        self.process = threading.Thread(
+            target=_motor_worker,
+            args=(self.queue, self.stop_event, self.current_motor_steps, 0.0, self.kit.factory,
+                  self.metrics_queue, self.trace_queue),
+        )
+        self.process.start()
+
+
+def run(frames, exposure_age, person_latency, pipelined, motor_kind):
+    camera = FakeClockCamera(frames, exposure_age=exposure_age, people=2)
+    if motor_kind == "process":
+        motor = MotorController(kit_factory=FakeMotorKit().factory).wait_ready()
+    else:
+        motor = ThreadMotor()
+    tracer = LatencyTracer()
+    scheduler = InferenceScheduler(2, 2) if pipelined else None
+    engine = FocusEngine(StubDetectionPipeline(person_latency, 0.004, 0.006), ByteTracker(), motor,
+                         focus_time=0.0, scheduler=scheduler, tracer=tracer)
+    try:
+        while True:
+            captured = camera.latest()
+            if captured is None:
+                break
+            if engine.roi_start is None:
+                h, w = captured.color.shape[:2]
+                engine.ensure_roi(w, h)
+                engine.set_roi(int(w * 0.25), int(h * 0.1), int(w * 0.75), int(h * 0.9))
+            trace_id = tracer.begin(captured.frame_number, captured.timestamp_ms, captured.received,
+                                    captured.exposure)
+            decision = engine.step(captured.color, captured.depth, trace_id, capture_time(captured))
+            if decision is not None and engine.selected_id is None and len(decision.tracks):
+                engine.select_track(decision.tracks[0][4])
+            motor.poll_traces(tracer)
+        engine.flush()
+        #  letzte Bewegungen zu Ende fahren lassen
+        time.sleep(0.5)
+        motor.poll_traces(tracer)
+    finally:
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+        motor.stop()
+    step_times = [t for t, _ in motor.kit.stepper1.steps] if motor_kind == "thread" else None
+    return tracer, step_times
+
+
+def verify(tracer, exposure_age, step_times):
+    traces = list(tracer.completed)
+    assert traces, "no completed moves"
+    order = ("exposure", "received", "detected", "decided", "enqueued", "dequeued", "first_step", "last_step")
+    for trace in traces:
+        stamps = [trace[k] for k in order if trace.get(k) is not None]
+        assert stamps == sorted(stamps), f"trace {trace['trace_id']}: stages out of order"
+        age = trace["exposure_to_received"] / 1000.0
+        assert abs(age - exposure_age) < 0.002, f"exposure age {age:.4f} s, expected {exposure_age:.4f} s"
+        if step_times is not None and trace["first_step"] is not None:
+            #  der Fake stempelt beim Aufruf von onestep, der Trace direkt danach
+            i = bisect.bisect_right(step_times, trace["first_step"]) - 1
+            assert i >= 0 and trace["first_step"] - step_times[i] < 0.002, "first_step not at a motor step"
+    return len(traces)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Glass-to-motor latency breakdown with a fake camera clock and fake motor")
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--exposure-age", type=float, default=0.040, help="exposure -> host arrival in s")
+    parser.add_argument("--person-latency", type=float, default=0.015, help="simulated person detection in s")
+    parser.add_argument("--pipelined", action="store_true", help="overlap detection via InferenceScheduler")
+    parser.add_argument("--motor", choices=("thread", "process"), default="thread",
+                        help="thread: cross-check step times against the fake; process: like production")
+    args = parser.parse_args()
+
+    tracer, step_times = run(args.frames, args.exposure_age, args.person_latency, args.pipelined, args.motor)
+    checked = verify(tracer, args.exposure_age, step_times)
+    summary = tracer.summary()
+    print(f"{checked} moves verified (stage order, exposure age, first step); "
+          f"superseded {summary['superseded']}, frames without move {summary['dropped']}")
+    print(f"{'segment':>28}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}   (ms)")
+    for name in [f"{a}_to_{b}" for a, b in SEGMENTS] + [name for name, _, _ in TOTALS]:
+        if name in summary:
+            s = summary[name]
+            print(f"{name:>28}{s['p50']:>10.2f}{s['p95']:>10.2f}{s['p99']:>10.2f}{s['max']:>10.2f}")
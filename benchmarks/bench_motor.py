@@ -0,0 +1,147 @@
+import argparse
+import multiprocessing as mp
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.stubs import FakeMotorKit
+from hardware.motor_controller import MotionPlanner, _motor_worker
+from utils.config import MOTOR_ACCELERATION, MOTOR_MAX_SPEED
+
+
+def run_worker(commands, settle=0.3):
+    #  _motor_worker in einem Thread gegen den MotorKit-Fake; commands: [(Verzögerung s, Ziel, focus_time)]
+    kit = FakeMotorKit()
+    queue = mp.Queue()
+    stop_event = mp.Event()
+    current = mp.Value('i', 0)
+    metrics_queue = mp.Queue(maxsize=4)
+    worker = threading.Thread(target=_motor_worker, args=(queue, stop_event, current, 0.0, kit.factory, metrics_queue))
+    worker.start()
+    t0 = time.monotonic()
+    for delay, target, focus_time in commands:
+        time.sleep(delay)
+        queue.put((target, focus_time))
+    #  warten bis zum Stillstand
+    last = -1
+    while True:
+        time.sleep(settle)
+        if len(kit.stepper1.steps) == last:
+            break
+        last = len(kit.stepper1.steps)
+    final = current.value
+    stop_event.set()
+    worker.join()
+    moves = [s for s in kit.stepper1.steps if s[0] >= t0][:last]
+    snapshot = None
+    while not metrics_queue.empty():
+        snapshot = metrics_queue.get_nowait()
+    return t0, moves, final, snapshot
+
+
+def profile(t0, moves, window=10):
+    #  Geschwindigkeit über je `window` Schritte gemittelt, sonst dominiert Scheduler-Jitter
+    times = np.array([t for t, _ in moves])
+    position = np.cumsum([d for _, d in moves])
+    dirs = np.array([d for _, d in moves])
+    dt = times[window:] - times[:-window]
+    velocity = (position[window:] - position[:-window]) / np.maximum(dt, 1e-6)
+    mid = (times[window:] + times[:-window]) / 2.0
+    accel = np.diff(velocity[::window]) / np.maximum(np.diff(mid[::window]), 1e-6)
+    return {
+        "steps": len(moves),
+        "duration_s": times[-1] - t0 if len(times) else 0.0,
+        "peak_speed": float(np.abs(velocity).max()) if len(velocity) else 0.0,
+        "p99_accel": float(np.percentile(np.abs(accel), 99)) if len(accel) else 0.0,
+        "reversals": int(np.count_nonzero(np.diff(dirs))),
+    }
+
+
+def planned_accel(commands, max_speed=MOTOR_MAX_SPEED, acceleration=MOTOR_ACCELERATION):
+    #  nur der Planer, ohne Worker und Scheduler: commands [(Zeitpunkt s, Ziel)] nach der
+    #  Summe der Intervalle einspielen. Jeder Abschnitt zwischen zwei Schritten hat die
+    #  Geschwindigkeit Richtung/Intervall (Pausen und Leerlauf 0); Beschleunigung
+    #  zwischen Nachbarabschnitten über den Abstand ihrer Mitten
+    planner = MotionPlanner(max_speed, acceleration)
+    commands = sorted(commands)
+    t = 0.0
+    segments = []
+    while True:
+        while commands and commands[0][0] <= t:
+            planner.set_target(commands.pop(0)[1], 0.0)
+        step = planner.next_step()
+        if step is None:
+            if not commands:
+                break
+            #  Leerlauf bis zum nächsten Kommando
+            segments.append((0.0, commands[0][0] - t))
+            t = commands[0][0]
+            continue
+        direction, interval = step
+        segments.append((direction / interval, interval))
+        t += interval
+    #  Stillstand nach Stillstand zusammenfassen, leere Abschnitte verwerfen
+    merged = []
+    for velocity, duration in segments:
+        if duration <= 0:
+            continue
+        if merged and velocity == 0.0 and merged[-1][0] == 0.0:
+            merged[-1] = (0.0, merged[-1][1] + duration)
+        else:
+            merged.append((velocity, duration))
+    velocity = np.array([v for v, _ in merged])
+    duration = np.array([d for _, d in merged])
+    return np.abs(np.diff(velocity)) / ((duration[1:] + duration[:-1]) / 2.0)
+
+
+def timing_error(moves, max_speed=MOTOR_MAX_SPEED, acceleration=MOTOR_ACCELERATION, target=400):
+    #  Schrittabstände gegen den geplanten Fahrplan (ein Zug ohne Retarget)
+    planner = MotionPlanner(max_speed, acceleration)
+    planner.set_target(target, 0.0)
+    planned = []
+    while True:
+        step = planner.next_step()
+        if step is None:
+            break
+        planned.append(step[1])
+    actual = np.diff([t for t, _ in moves])
+    n = min(len(actual), len(planned) - 1)
+    return np.abs(actual[:n] - np.array(planned[:n])) * 1000.0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Motor motion planner against a fake MotorKit")
+    parser.add_argument("--target", type=int, default=400)
+    parser.add_argument("--margin", type=float, default=0.01,
+                        help="allowed excess of the planned acceleration (step time rounding)")
+    args = parser.parse_args()
+
+    t0, moves, final, snapshot = run_worker([(0.0, args.target, 0.0)])
+    stats = profile(t0, moves)
+    error = timing_error(moves, target=args.target)
+    print(f"single move 0 -> {args.target}: {stats['steps']} steps in {stats['duration_s']:.3f} s, "
+          f"peak {stats['peak_speed']:.0f} steps/s, final position {final}")
+    print(f"  step interval vs plan: median {np.median(error):.3f} ms, p99 {np.percentile(error, 99):.3f} ms")
+    if snapshot is not None:
+        late = snapshot["histograms_ms"]["motor.step_late"]
+        print(f"  worker metrics: {snapshot['counters']}, step lateness p99 <= {late['p99']} ms")
+
+    #  Retarget mitten in der Fahrt, einmal weiter, einmal zurück, einmal zurück nach dem Halt.
+    #  Geprüft wird der Planer: pro Abschnitt höchstens a, bis auf Rundung (margin). Der
+    #  Worker-Wert ist über 10 Schritte gemittelt und zeigt vor allem Scheduler-Jitter
+    #  (ein verspäteter Schritt im Fake reicht für einen Ausreißer), daher nur zur Info
+    failed = []
+    retargets = (("extend", args.target + 100, 0.15), ("reverse", 50, 0.15), ("reverse after stop", 0, 0.6))
+    for label, second, delay in retargets:
+        accel = planned_accel([(0.0, args.target), (delay, second)])
+        t0, moves, final, _ = run_worker([(0.0, args.target, 0.0), (delay, second, 0.0)])
+        stats = profile(t0, moves)
+        print(f"retarget ({label}) -> {second}: {stats['steps']} steps in {stats['duration_s']:.3f} s, "
+              f"{stats['reversals']} reversals, final position {final}")
+        print(f"  |accel| planned p99 {np.percentile(accel, 99):.0f} max {accel.max():.0f}, "
+              f"worker p99 {stats['p99_accel']:.0f} steps/s^2 (limit {MOTOR_ACCELERATION:.0f})")
+        if accel.max() > MOTOR_ACCELERATION * (1.0 + args.margin):
+            failed.append(f"{label}: planned max |accel| {accel.max():.0f}")
+    if failed:
+        raise SystemExit(f"acceleration limit {MOTOR_ACCELERATION:.0f} steps/s^2 exceeded: " + "; ".join(failed))
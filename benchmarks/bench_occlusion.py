@@ -0,0 +1,148 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from vision.occlusion import OcclusionMap, box_median_depths
+
+
+#  Standard-ROI der Engine (37-61 % x 37-65 %) im 1280x720-Bild
+ROI = (int(1280 * 0.37), int(720 * 0.37), int(1280 * 0.61), int(720 * 0.65))
+BACKGROUND_MM = 6000
+
+
+def legacy_crop(frame, tracking_bbox, other_bboxes):
+    #  bisheriges FocusEngine._get_non_overlapping_crop: alle anderen Boxen schwärzen,
+    #  egal ob die Person davor oder dahinter steht (ab 50 % schwarz gar nichts)
+    x1, y1, x2, y2 = tracking_bbox
+    x1_crop, y1_crop = max(0, x1), max(0, y1)
+    x2_crop, y2_crop = min(frame.shape[1], x2), min(frame.shape[0], y2)
+    if x2_crop <= x1_crop or y2_crop <= y1_crop:
+        return None
+    crop = frame[y1_crop:y2_crop, x1_crop:x2_crop].copy()
+    mask = np.ones(crop.shape[:2], dtype=np.uint8)
+    for ox1, oy1, ox2, oy2, _ in other_bboxes:
+        ox1_rel = max(0, ox1 - x1_crop)
+        oy1_rel = max(0, oy1 - y1_crop)
+        ox2_rel = min(crop.shape[1], ox2 - x1_crop)
+        oy2_rel = min(crop.shape[0], oy2 - y1_crop)
+        if ox2_rel > ox1_rel and oy2_rel > oy1_rel:
+            mask[oy1_rel:oy2_rel, ox1_rel:ox2_rel] = 0
+    if np.mean(mask == 0) > 0.5:
+        return crop, np.ones(crop.shape[:2], dtype=bool)
+    crop[mask == 0] = [0, 0, 0]
+    return crop, mask > 0
+
+
+def scene(people, rng):
+    #  Personen als Silhouetten (Kopf + Rumpf-Ellipse) in 1.5-5 m, Größe ~ 1/Tiefe,
+    #  Füße auf einer Horizontlinie wie bei einer Kamera auf Augenhöhe; Tiefenbild
+    #  und Besitzer jedes Pixels per z-Buffer (von hinten nach vorne gemalt)
+    rx1, ry1, rx2, ry2 = ROI
+    depths = rng.uniform(1500, 5000, people)
+    heights = np.clip(1.7 * 440.0 / (depths / 1000.0), 60, 2 * (ry2 - ry1))
+    centers = rng.uniform(rx1, rx2, people)
+    feet = ry1 + 0.5 * (ry2 - ry1) + heights * 0.5
+    depth = np.full((720, 1280), BACKGROUND_MM, dtype=np.uint16)
+    owner = np.full((720, 1280), -1, dtype=np.int16)
+    boxes = np.empty((people, 4))
+    areas = np.empty(people)
+    for i in np.argsort(-depths):
+        h = heights[i]
+        w = 0.4 * h
+        cx, top = centers[i], feet[i] - h
+        silhouette = np.zeros((720, 1280), dtype=np.uint8)
+        cv2.ellipse(silhouette, (int(cx), int(top + 0.55 * h)), (int(w / 2), int(0.45 * h)), 0, 0, 360, 1, -1)
+        cv2.circle(silhouette, (int(cx), int(top + 0.1 * h)), int(0.1 * h), 1, -1)
+        pixels = silhouette > 0
+        areas[i] = np.count_nonzero(pixels)
+        depth[pixels] = int(depths[i])
+        owner[pixels] = i
+        boxes[i] = (cx - w / 2, top, cx + w / 2, feet[i])
+    #  Detektor-Boxen etwas verrauscht, Tiefe mit Löchern; wer weniger als 30 %
+    #  sichtbar ist, wird nicht erkannt (wie Crowd in bench_tracker)
+    boxes += rng.normal(0.0, 0.02, boxes.shape) * heights[:, None]
+    depth[rng.random(depth.shape) < 0.05] = 0
+    shown = np.bincount(owner[owner >= 0], minlength=people) >= 0.3 * areas
+    remap = np.full(people, -1, dtype=np.int16)
+    remap[shown] = np.arange(np.count_nonzero(shown))
+    owner = np.where(owner >= 0, remap[np.maximum(owner, 0)], -1)
+    return np.rint(boxes[shown]).astype(np.int64), depth, owner, depths[shown]
+
+
+def score(keep, owner, box, person, depths):
+    #  Pixel der Box sollen bleiben, wenn sie keiner näheren Person gehören.
+    #  kept: Anteil davon, der erhalten bleibt; leak: Anteil der erhaltenen Pixel,
+    #  die doch einer näheren Person gehören (Gesicht/Maske/Tiefe vom Falschen)
+    x1, y1, x2, y2 = box
+    owners = owner[y1:y2, x1:x2][:keep.shape[0], :keep.shape[1]]
+    nearer = (owners >= 0) & (depths[np.maximum(owners, 0)] < depths[person])
+    return (~nearer).sum(), (keep & ~nearer).sum(), keep.sum(), (keep & nearer).sum()
+
+
+def order_errors(estimated, depths, boxes):
+    #  überlappende Paare, deren Reihenfolge die geschätzte Tiefe vertauscht
+    errors = pairs = 0
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            a, b = boxes[i], boxes[j]
+            if min(a[2], b[2]) > max(a[0], b[0]) and min(a[3], b[3]) > max(a[1], b[1]):
+                pairs += 1
+                errors += (estimated[i] < estimated[j]) != (depths[i] < depths[j])
+    return errors, pairs
+
+
+def run(people, frames, seed):
+    rng = np.random.default_rng(seed)
+    frame = np.full((720, 1280, 3), 128, dtype=np.uint8)
+    occlusion = OcclusionMap()
+    totals = {"legacy": np.zeros(4), "map": np.zeros(4)}
+    seconds = {"legacy": 0.0, "map": 0.0}
+    errors = pairs = 0
+    for _ in range(frames):
+        boxes, depth, owner, depths = scene(people, rng)
+        boxes = np.maximum(boxes, 0)
+        if len(boxes) == 0:
+            continue
+        ids = np.arange(len(boxes))
+        tracks = np.hstack([boxes, ids[:, None]])
+        others = [[tuple(o) for o in tracks if o[4] != t[4]] for t in tracks]
+        legacy = [legacy_crop(frame, tuple(t[:4]), others[i]) for i, t in enumerate(tracks)]
+        estimated = box_median_depths(depth, boxes)
+        occlusion.build(ROI, boxes, ids, estimated)
+        e, p = order_errors(estimated, depths, boxes)
+        errors, pairs = errors + e, pairs + p
+        for i in ids:
+            if legacy[i] is not None:
+                totals["legacy"] += score(legacy[i][1], owner, boxes[i], i, depths)
+            totals["map"] += score(occlusion.visible(i, boxes[i]), owner, boxes[i], i, depths)
+        #  Zeit wie in der Engine: Crop der Fokusperson, Masken der übrigen (Tiefenpunkte)
+        t0 = time.perf_counter()
+        legacy_crop(frame, tuple(tracks[0, :4]), others[0])
+        seconds["legacy"] += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        occlusion.build(ROI, boxes, ids, box_median_depths(depth, boxes))
+        occlusion.masked_crop(frame, 0, boxes[0])
+        for i in ids[1:]:
+            occlusion.visible(i, boxes[i])
+        seconds["map"] += time.perf_counter() - t0
+    return totals, {k: v / frames * 1000.0 for k, v in seconds.items()}, errors / max(pairs, 1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Depth-ordered occlusion map vs blacking out every other box")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--people", type=int, nargs="+", default=[2, 5, 10, 20])
+    args = parser.parse_args()
+
+    print("kept = pixels not owned by a nearer person that stay unmasked (incl. people behind)")
+    print("leak = unmasked pixels that belong to a nearer person; legacy skips masking above 50 % hidden")
+    print(f"{'people':>6}  {'method':<8}{'kept':>8}{'leak':>8}{'ms/frame':>10}{'order errors':>14}")
+    for people in args.people:
+        totals, ms, order = run(people, args.frames, people)
+        for name, label in (("legacy", "boxes"), ("map", "depth")):
+            keepable, kept, unmasked, leaked = totals[name]
+            print(f"{people if name == 'legacy' else '':>6}  {label:<8}{kept / max(keepable, 1) * 100:>7.1f}%"
+                  f"{leaked / max(unmasked, 1) * 100:>7.1f}%{ms[name]:>10.2f}"
+                  f"{f'{order * 100:.1f}%' if name == 'map' else '':>14}")
@@ -0,0 +1,267 @@
+import argparse
+import json
+import subprocess
+import time
+
+import numpy as np
+
+from utils.config import FOCUS_PLANE_START
+from vision.byte_tracker import ByteTracker
+from vision.focus_engine import FocusEngine
+from vision.inference_scheduler import InferenceScheduler
+from gui.overlays import draw_decision, ProfileRenderer, DisplayScaler
+from benchmarks.stubs import (
+    SyntheticCamera,
+    StubDetectionPipeline,
+    StubMotor,
+)
+
+
+STAGES = [
+    "capture",
+    "roi_crop",
+    "person_detect",
+    "tracking",
+    "face_detect",
+    "face_track",
+    "segmentation",
+    "depth_align",
+    "occlusion",
+    "depth_spatial",
+    "depth_temporal",
+    "depth_hole_fill",
+    "depth_sampling",
+    "optical_flow",
+    "motor_command",
+    "overlay",
+    "profile_render",
+    "texture_upload",
+    "end_to_end",
+]
+PERCENTILES = (50, 95, 99)
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {name: [] for name in STAGES}
+        self._frame = {}
+
+    def start_frame(self):
+        self._frame = dict.fromkeys(STAGES, 0.0)
+
+    def add(self, stage, seconds):
+        self._frame[stage] += seconds
+
+    def end_frame(self):
+        for stage, seconds in self._frame.items():
+            self.samples[stage].append(seconds)
+
+    def summary(self):
+        out = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            arr = np.asarray(values) * 1000.0
+            out[stage] = {f"p{p}": float(np.percentile(arr, p)) for p in PERCENTILES}
+            out[stage]["mean"] = float(arr.mean())
+            out[stage]["count"] = len(values)
+        return out
+
+
+class _Span:
+    def __init__(self, timer, stage):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.stage, time.perf_counter() - self.t0)
+
+
+class HeadlessPipeline:
+    #  FocusEngine plus die Zeichen-/Texturarbeit von MainScreen.update, ohne Kivy
+    #  (Texturen werden nur CPU-seitig vorbereitet: ggf. verkleinern + memoryview,
+    #  gespiegelt wird in der GUI über die UV-Koordinaten)
+    def __init__(self, camera, detector, tracker, motor, lichtbedingung=None, optical_flow=False, scheduler=None,
+                 display_scale=1.0, governor=None):
+        self.camera = camera
+        self.timer = StageTimer()
+        self.engine = FocusEngine(detector, tracker, motor, lichtbedingung=lichtbedingung, focus_time=0.5,
+                                  timer=self, scheduler=scheduler)
+        self.optical_flow = optical_flow
+        self.profile_renderer = ProfileRenderer()
+        self.display_scale = display_scale
+        self.display_scaler = DisplayScaler(display_scale)
+        #  optional: utils.quality_governor.QualityGovernor, wie in MainScreen
+        self.governor = governor
+        if governor is not None:
+            self.apply_quality()
+
+    def apply_quality(self):
+        level = self.governor.level
+        self.engine.set_quality(level)
+        self.display_scaler.scale = min(self.display_scale, level.display_scale)
+
+    def span(self, stage):
+        return _Span(self.timer, stage)
+
+    def run(self, max_frames=None):
+        frames = 0
+        while max_frames is None or frames < max_frames:
+            t0 = time.perf_counter()
+            self.timer.start_frame()
+            if not self.step():
+                break
+            elapsed = time.perf_counter() - t0
+            self.timer.add("end_to_end", elapsed)
+            if self.governor is not None and self.governor.observe(elapsed * 1000.0):
+                self.apply_quality()
+            self.timer.end_frame()
+            frames += 1
+        return frames
+
+    def step(self):
+        engine = self.engine
+        with self.span("capture"):
+            color_frame, depth_image = self.camera.get_aligned_frames()
+        if color_frame is None or depth_image is None:
+            return False
+        frame = color_frame
+        if engine.roi_start is None:
+            h, w = frame.shape[:2]
+            engine.ensure_roi(w, h)
+            engine.set_roi(int(w * 0.25), int(h * 0.1), int(w * 0.75), int(h * 0.9))
+            if self.optical_flow:
+                engine.select_point(w // 2, h // 2)
+
+        decision = engine.step(frame, depth_image)
+        if decision is None:
+            return True
+        frame = decision.frame
+        if engine.selected_id is None and len(decision.tracks) and not self.optical_flow:
+            engine.select_track(decision.tracks[0][4])
+
+        with self.span("overlay"):
+            draw_decision(frame, decision, engine.focus_time)
+        draw_profile = self.governor is None or self.governor.level.profile
+        if draw_profile:
+            with self.span("profile_render"):
+                profile_canvas, _ = self.profile_renderer.render(decision, frame.shape[1], engine.focus_plane_pos(FOCUS_PLANE_START))
+        with self.span("texture_upload"):
+            if draw_profile:
+                _buf_profile = memoryview(np.ascontiguousarray(profile_canvas)).cast('B')
+            _buf = memoryview(self.display_scaler(frame)).cast('B')
+        return True
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def make_camera(args):
+    if args.replay:
+        from hardware.replay import ReplayCamera
+        return ReplayCamera(args.replay, mode="fast")
+    return SyntheticCamera(frames=args.frames + args.warmup, people=args.people)
+
+
+def run_benchmark(args):
+    scheduler = InferenceScheduler(args.max_in_flight) if args.pipelined else None
+    pipeline = HeadlessPipeline(
+        make_camera(args),
+        StubDetectionPipeline(args.person_latency, args.face_latency, args.seg_latency),
+        ByteTracker(),
+        StubMotor(),
+        optical_flow=args.optical_flow,
+        scheduler=scheduler,
+        display_scale=args.display_scale,
+    )
+    #  Aufwärmen, dann messen
+    pipeline.run(min(args.warmup, args.frames))
+    pipeline.timer = StageTimer()
+    t0 = time.perf_counter()
+    frames = pipeline.run(args.frames)
+    elapsed = time.perf_counter() - t0
+    if scheduler is not None:
+        scheduler.shutdown()
+    result = {
+        "meta": {
+            "revision": _git_revision(),
+            "source": args.replay or f"synthetic:{args.people}",
+            "frames": frames,
+            "fps": frames / elapsed if elapsed else 0.0,
+            "pipelined": args.pipelined,
+            "display_scale": args.display_scale,
+            "optical_flow": args.optical_flow,
+            "latencies_s": [args.person_latency, args.face_latency, args.seg_latency],
+            "mask_cache": pipeline.engine.mask_cache.stats() if pipeline.engine.mask_cache is not None else None,
+            "face_lock": pipeline.engine.face_lock.stats() if pipeline.engine.face_lock is not None else None,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "stages_ms": pipeline.timer.summary(),
+    }
+    return result
+
+
+def print_summary(result):
+    meta = result["meta"]
+    print(f"{'stage':<16}{'p50':>9}{'p95':>9}{'p99':>9}   (ms, {meta['frames']} frames, {meta.get('fps', 0):.1f} FPS)")
+    for stage in STAGES:
+        s = result["stages_ms"].get(stage)
+        if s:
+            print(f"{stage:<16}{s['p50']:>9.2f}{s['p95']:>9.2f}{s['p99']:>9.2f}")
+    cache = meta.get("mask_cache")
+    if cache:
+        print(f"mask cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate'] * 100:.0f}%)")
+    lock = meta.get("face_lock")
+    if lock:
+        print(f"face lock: {lock['detections']} detections, {lock['tracked']} tracked, "
+              f"{lock['drift_resets']} drift resets ({lock['saved_ratio'] * 100:.0f}% saved)")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'stage':<16}{'old p50':>10}{'new p50':>10}{'Δ%':>8}{'old p95':>10}{'new p95':>10}{'Δ%':>8}")
+    for stage in STAGES:
+        a = old["stages_ms"].get(stage)
+        b = new["stages_ms"].get(stage)
+        if not a or not b:
+            continue
+        d50 = 100.0 * (b["p50"] - a["p50"]) / a["p50"] if a["p50"] else 0.0
+        d95 = 100.0 * (b["p95"] - a["p95"]) / a["p95"] if a["p95"] else 0.0
+        print(f"{stage:<16}{a['p50']:>10.2f}{b['p50']:>10.2f}{d50:>+8.1f}{a['p95']:>10.2f}{b['p95']:>10.2f}{d95:>+8.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Headless per-stage benchmark of the focus pipeline")
+    parser.add_argument("--replay", help="recorded session directory (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--people", type=int, default=3)
+    parser.add_argument("--optical-flow", action="store_true", help="track an optical-flow point instead of a person")
+    parser.add_argument("--person-latency", type=float, default=0.0, help="simulated inference time in s")
+    parser.add_argument("--face-latency", type=float, default=0.0)
+    parser.add_argument("--seg-latency", type=float, default=0.0)
+    parser.add_argument("--pipelined", action="store_true", help="overlap inference across frames (InferenceScheduler)")
+    parser.add_argument("--max-in-flight", type=int, default=2)
+    parser.add_argument("--display-scale", type=float, default=1.0, help="preview resolution relative to the frame")
+    parser.add_argument("--output", "-o", help="write JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        result = run_benchmark(args)
+        print_summary(result)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=2)
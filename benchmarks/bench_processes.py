@@ -0,0 +1,136 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.stubs import StubDetectionPipeline, StubMotor, SyntheticCamera
+from gui.overlays import DisplayScaler, ProfileRenderer, draw_decision
+from hardware.frame_ring import capture_time
+from utils.config import FOCUS_PLANE_START
+from vision.byte_tracker import ByteTracker
+from vision.focus_engine import FocusEngine
+from vision.process_pipeline import ProcessPipeline
+
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def cpu_seconds(pid):
+    #  utime + stime aus /proc (Linux, wie auf dem Pi)
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+
+
+def synthetic_camera(frames, fps, people):
+    return SyntheticCamera(frames=frames, fps=fps, people=people)
+
+
+def stub_engine(latencies, focus_time=0.0, lichtbedingung=None):
+    return FocusEngine(StubDetectionPipeline(*latencies), ByteTracker(), StubMotor(),
+                       lichtbedingung=lichtbedingung, focus_time=focus_time)
+
+
+class UiWork:
+    #  was MainScreen.update pro Entscheidung zeichnet (ohne Kivy-Upload)
+    def __init__(self):
+        self.profile_renderer = ProfileRenderer()
+        self.display_scaler = DisplayScaler(1.0)
+
+    def __call__(self, engine, decision):
+        frame = decision.frame
+        draw_decision(frame, decision, 0.0)
+        profile_canvas, _ = self.profile_renderer.render(decision, frame.shape[1], engine.focus_plane_pos(FOCUS_PLANE_START))
+        memoryview(np.ascontiguousarray(profile_canvas)).cast('B')
+        memoryview(self.display_scaler(frame)).cast('B')
+
+
+def select_first(engine, decision):
+    if engine.selected_id is None and len(decision.tracks):
+        engine.select_track(decision.tracks[0][4])
+
+
+def run_single(frames, fps, people, latencies):
+    camera = synthetic_camera(frames, fps, people)
+    engine = stub_engine(latencies)
+    engine.ensure_roi(1280, 720)
+    ui = UiWork()
+    shown = 0
+    cpu0, t0 = cpu_seconds(os.getpid()), time.monotonic()
+    while True:
+        captured = camera.latest()
+        if captured is None:
+            break
+        decision = engine.step(captured.color, captured.depth, captured_at=capture_time(captured))
+        if decision is None:
+            continue
+        select_first(engine, decision)
+        ui(engine, decision)
+        shown += 1
+    elapsed = time.monotonic() - t0
+    return elapsed, shown, {"main": cpu_seconds(os.getpid()) - cpu0}
+
+
+def run_processes(frames, fps, people, latencies):
+    pipeline = ProcessPipeline(synthetic_camera, {"frames": frames, "fps": fps, "people": people},
+                               stub_engine, {"latencies": latencies}, slots=8)
+    engine = pipeline.engine
+    engine.ensure_roi(1280, 720)
+    ui = UiWork()
+    shown = 0
+    pids = {"ui": os.getpid(), "inference": pipeline.inference_process.pid, "capture": pipeline.capture_process.pid}
+    #  erster Frame: Startkosten der Prozesse nicht mitmessen
+    while pipeline.ring.latest_seq == 0:
+        time.sleep(0.001)
+    cpu0 = {name: cpu_seconds(pid) for name, pid in pids.items()}
+    t0 = time.monotonic()
+    idle_since = None
+    cpu = dict(cpu0)
+    while True:
+        decision = pipeline.poll()
+        if decision is None:
+            #  Kamera fertig und nichts mehr unterwegs
+            if not pipeline.capture_process.is_alive():
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since > 0.3:
+                    break
+            else:
+                for name in ("capture",):
+                    try:
+                        cpu[name] = cpu_seconds(pids[name])
+                    except (FileNotFoundError, ProcessLookupError):
+                        pass
+            time.sleep(0.001)
+            continue
+        idle_since = None
+        select_first(engine, decision)
+        ui(engine, decision)
+        shown += 1
+    elapsed = time.monotonic() - t0 - 0.3
+    cpu["ui"] = cpu_seconds(pids["ui"])
+    cpu["inference"] = cpu_seconds(pids["inference"])
+    pipeline.stop()
+    return elapsed, shown, {name: cpu[name] - cpu0[name] for name in pids}, pipeline.stale
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Single-process loop vs capture/inference/UI processes over a shared-memory ring")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=30.0, help="camera rate (0 = as fast as frames can be produced)")
+    parser.add_argument("--people", type=int, default=3)
+    parser.add_argument("--person-latency", type=float, default=0.020)
+    parser.add_argument("--face-latency", type=float, default=0.005)
+    parser.add_argument("--seg-latency", type=float, default=0.010)
+    args = parser.parse_args()
+    latencies = (args.person_latency, args.face_latency, args.seg_latency)
+
+    print(f"{os.cpu_count()} cores, camera {args.fps:g} FPS, simulated inference {latencies} s")
+    elapsed, shown, cpu = run_single(args.frames, args.fps, args.people, latencies)
+    print(f"single process: {shown} frames shown in {elapsed:.2f} s = {shown / elapsed:.1f} FPS, "
+          f"{sum(cpu.values()) / elapsed:.2f} cores busy")
+    elapsed, shown, cpu, stale = run_processes(args.frames, args.fps, args.people, latencies)
+    per_process = ", ".join(f"{name} {seconds / elapsed * 100:.0f}%" for name, seconds in cpu.items())
+    print(f"processes:      {shown} frames shown in {elapsed:.2f} s = {shown / elapsed:.1f} FPS, "
+          f"{sum(cpu.values()) / elapsed:.2f} cores busy ({per_process}); "
+          f"{args.frames - shown} frames skipped as not latest, {stale} overwritten before display")
@@ -0,0 +1,96 @@
+import argparse
+import time
+
+import numpy as np
+import cv2
+
+from gui.overlays import PROFILE_CANVAS_HEIGHT, PROFILE_WIDTH_RATIO, ProfileRenderer
+from utils.config import FOCUS_PLANE_START, PROFILE_CANVAS_BG_M
+from vision.focus_engine import FocusDecision
+
+
+def render_profile_reference(decision, frame_width, focus_plane_pos):
+    #  bisherige Variante (neues Canvas, alles neu zeichnen, Punkte einzeln)
+    canvas_height = PROFILE_CANVAS_HEIGHT
+    scaled_width = int(frame_width * PROFILE_WIDTH_RATIO)
+    profile_canvas = np.zeros((canvas_height, scaled_width, 3), dtype=np.uint8)
+    profile_canvas[:] = [30, 30, 30]
+    background_depth = PROFILE_CANVAS_BG_M
+    y_scale = (canvas_height - 50) / background_depth
+    r = 2
+
+    x_sample, distance_m = decision.samples
+    if len(x_sample):
+        x_coords_reduced = (x_sample * (scaled_width / frame_width)).astype(int)
+        y_positions = 50 + ((background_depth - distance_m) * y_scale).astype(int)
+        x_coords_reduced = np.clip(x_coords_reduced, 0, scaled_width - 1)
+        y_positions = np.clip(y_positions, 0, canvas_height - 1)
+        for xx, yy in zip(x_coords_reduced, y_positions):
+            x1b, x2b = max(0, xx - r), min(scaled_width, xx + r + 1)
+            y1b, y2b = max(0, yy - r), min(canvas_height, yy + r + 1)
+            profile_canvas[y1b:y2b, x1b:x2b] = [128, 128, 128]
+
+    not_valid = 50 + int((background_depth - FOCUS_PLANE_START) * y_scale)
+    cv2.line(profile_canvas, (0, not_valid), (scaled_width, not_valid), (0, 0, 255), 2)
+    cv2.line(profile_canvas, (0, profile_canvas.shape[0] - 2), (scaled_width, profile_canvas.shape[0] - 2), (0, 0, 255), 2)
+    cv2.line(profile_canvas, (0, profile_canvas.shape[0]), (scaled_width, not_valid), (0, 0, 255), 2)
+    cv2.line(profile_canvas, (0, not_valid), (scaled_width, profile_canvas.shape[0]), (0, 0, 255), 2)
+
+    white_bar_pos = 50 + int((background_depth - decision.focus_distance) * y_scale)
+    cv2.line(profile_canvas, (0, white_bar_pos), (scaled_width, white_bar_pos), (255, 255, 255), 5)
+
+    focus_plane_y = 50 + int((background_depth - focus_plane_pos) * y_scale)
+    cv2.line(profile_canvas, (0, focus_plane_y), (scaled_width, focus_plane_y), (0, 255, 0), 4)
+
+    for y in range(0, int(background_depth) + 1):
+        y_pos = 50 + int((background_depth - y) * y_scale)
+        if 0 <= y_pos < canvas_height:
+            cv2.line(profile_canvas, (0, y_pos), (20, y_pos), (255, 255, 255), 1)
+            cv2.putText(profile_canvas, f"{y}m", (25, y_pos + 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    return profile_canvas, white_bar_pos
+
+
+def make_decision(rng, points, frame_width=1280):
+    x_sample = rng.integers(0, frame_width, points)
+    distance_m = rng.uniform(0.3, 11.0, points)
+    return FocusDecision(
+        float(rng.uniform(0.6, 9.0)), 0, False, (0, 0, frame_width, 720), np.empty((0, 5)), None,
+        None, None, (x_sample, distance_m), None, 0, None,
+    )
+
+
+def check(rng, trials=50):
+    renderer = ProfileRenderer()
+    for i in range(trials):
+        decision = make_decision(rng, int(rng.integers(0, 3000)) if i else 0)
+        plane = float(rng.uniform(0.5, 10.0))
+        expected, expected_bar = render_profile_reference(decision, 1280, plane)
+        canvas, bar = renderer.render(decision, 1280, plane)
+        assert bar == expected_bar and np.array_equal(canvas, expected), f"trial {i}: canvas differs"
+
+
+def bench(rng, points, repeats):
+    decisions = [make_decision(rng, points) for _ in range(repeats)]
+    renderer = ProfileRenderer()
+    renderer.render(decisions[0], 1280, 2.0)
+    timings = {}
+    for name, fn in (("reference", render_profile_reference), ("renderer", renderer.render)):
+        t0 = time.perf_counter()
+        for decision in decisions:
+            fn(decision, 1280, 2.0)
+        timings[name] = (time.perf_counter() - t0) / repeats * 1000.0
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Depth-profile panel: pixel check and per-frame cost before/after")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    check(rng)
+    print("ProfileRenderer output is pixel-identical to the previous render_profile")
+    print(f"{'samples':>8}{'before':>12}{'after':>12}")
+    for points in (0, 100, 1000, 5000):
+        timings = bench(rng, points, args.repeats)
+        print(f"{points:>8}{timings['reference']:>10.3f}ms{timings['renderer']:>10.3f}ms")
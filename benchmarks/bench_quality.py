@@ -0,0 +1,59 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_pipeline import HeadlessPipeline
+from benchmarks.stubs import StubDetectionPipeline, StubMotor, SyntheticCamera
+from utils.quality_governor import QualityGovernor
+from vision.byte_tracker import ByteTracker
+
+
+def run(phases, governor, latencies):
+    #  phases: [(Personen, Frames)]; Segmentierung pro Track und ohne Masken-Cache,
+    #  damit die Last mit der Personenzahl wächst wie im ungünstigsten Fall
+    pipeline = HeadlessPipeline(SyntheticCamera(frames=0), StubDetectionPipeline(*latencies), ByteTracker(),
+                                StubMotor(), governor=governor)
+    pipeline.engine.seg_mode = "track"
+    pipeline.engine.mask_cache = None
+    results = []
+    for people, frames in phases:
+        pipeline.camera = SyntheticCamera(frames=frames, people=people, seed=people)
+        #  neue Szene: Fokusperson neu wählen lassen
+        pipeline.engine.reset()
+        frame_ms, levels = [], []
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            pipeline.timer.start_frame()
+            if not pipeline.step():
+                break
+            elapsed = time.perf_counter() - t0
+            if governor is not None and governor.observe(elapsed * 1000.0):
+                pipeline.apply_quality()
+            frame_ms.append(elapsed * 1000.0)
+            levels.append(governor.index if governor is not None else 0)
+        #  ohne die ersten Frames nach dem Szenenwechsel
+        tail = np.array(frame_ms[15:])
+        results.append((people, float(np.median(tail)), float(np.percentile(tail, 95)), levels[-1],
+                        max(levels), pipeline.governor.level.name if governor is not None else "-"))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Frame time under a crowd surge with and without the quality governor")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--person-latency", type=float, default=0.006)
+    parser.add_argument("--face-latency", type=float, default=0.002)
+    parser.add_argument("--seg-latency", type=float, default=0.005, help="per segmentation call in s")
+    parser.add_argument("--frames", type=int, default=150, help="frames per phase")
+    parser.add_argument("--restore-frames", type=int, default=60)
+    args = parser.parse_args()
+
+    phases = [(2, args.frames), (10, args.frames), (2, args.frames)]
+    latencies = (args.person_latency, args.face_latency, args.seg_latency)
+    budget = 1000.0 / args.fps
+    print(f"budget {budget:.1f} ms/frame; level = at the end of the phase, peak = highest in the phase")
+    print(f"{'governor':>9}{'people':>8}{'p50 ms':>9}{'p95 ms':>9}{'level':>7}{'peak':>6}  name")
+    for label, governor in (("off", None), ("on", QualityGovernor(args.fps, restore_frames=args.restore_frames))):
+        for people, p50, p95, level, peak, name in run(phases, governor, latencies):
+            print(f"{label:>9}{people:>8}{p50:>9.2f}{p95:>9.2f}{level:>7}{peak:>6}  {name}")
@@ -0,0 +1,80 @@
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stubs import StubDetectionPipeline, StubMotor, SyntheticScene
+from hardware.frame_ring import capture_time
+from hardware.replay import ReplayCamera, SessionRecorder
+from vision.byte_tracker import ByteTracker
+from vision.focus_engine import FocusEngine
+
+
+def record(path, frames, fps, people):
+    #  synthetische Aufnahme mit Sensorzeitstempeln im Kameratakt
+    scene = SyntheticScene(people=people)
+    with SessionRecorder(path, chunk_frames=64) as recorder:
+        for i in range(frames):
+            color, depth = scene.next_frame()
+            recorder.write(color, depth, i, 1000.0 * i / fps)
+
+
+def run(camera, host_clock=False):
+    #  host_clock: wie vor dem Fix, Messung zum Abholzeitpunkt und "jetzt" von der Host-Uhr
+    clock = time.monotonic if host_clock else camera.now
+    engine = FocusEngine(StubDetectionPipeline(), ByteTracker(), StubMotor(), clock=clock)
+    targets = {}
+    try:
+        while not camera.finished:
+            captured = camera.latest(timeout=0.5)
+            if captured is None:
+                continue
+            if engine.roi_start is None:
+                h, w = captured.color.shape[:2]
+                engine.ensure_roi(w, h)
+                engine.set_roi(int(w * 0.1), int(h * 0.1), int(w * 0.9), int(h * 0.9))
+            captured_at = captured.received if host_clock else capture_time(captured)
+            decision = engine.step(captured.color, captured.depth, captured_at=captured_at)
+            if engine.selected_id is None and len(decision.tracks):
+                engine.select_track(decision.tracks[0][4])
+            targets[captured.frame_number] = (decision.target_steps, engine.predicted_distance)
+    finally:
+        camera.stop()
+    return targets
+
+
+def compare(name, reference, targets):
+    common = sorted(set(reference) & set(targets))
+    steps = np.array([[reference[n][0], targets[n][0]] for n in common])
+    predicted = np.array([[reference[n][1], targets[n][1]] for n in common
+                          if reference[n][1] is not None and targets[n][1] is not None])
+    step_diff = int(np.abs(steps[:, 0] - steps[:, 1]).max()) if len(steps) else 0
+    predicted_diff = float(np.abs(predicted[:, 0] - predicted[:, 1]).max() * 1000.0) if len(predicted) else 0.0
+    print(f"  {name:<34}{len(common):>7}{len(predicted):>11}{step_diff:>16}{predicted_diff:>18.3f}")
+    return len(common) == len(reference) and step_diff == 0 and predicted_diff == 0.0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Same recording replayed fast and in realtime must give the same "
+                                                 "focus targets (target filter fed with the recording's timeline)")
+    parser.add_argument("--frames", type=int, default=90)
+    parser.add_argument("--fps", type=float, default=15.0,
+                        help="recorded frame rate; low enough that realtime replay never skips a frame")
+    parser.add_argument("--people", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        record(path, args.frames, args.fps, args.people)
+        realtime = run(ReplayCamera(path, mode="realtime"))
+        fast = run(ReplayCamera(path, mode="fast"))
+        fast_host = run(ReplayCamera(path, mode="fast"), host_clock=True)
+
+    print(f"{args.frames} frames recorded at {args.fps:g} FPS; differences against realtime replay")
+    print(f"  {'replay':<34}{'frames':>7}{'predicted':>11}{'max step diff':>16}{'max pred diff mm':>18}")
+    identical = compare("fast, recording timeline", realtime, fast)
+    compare("fast, host clock (before)", realtime, fast_host)
+    if len(realtime) != args.frames:
+        raise SystemExit(f"realtime replay skipped {args.frames - len(realtime)} frames, lower --fps")
+    if not identical:
+        raise SystemExit("fast and realtime replay disagree on the focus target")
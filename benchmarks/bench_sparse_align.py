@@ -0,0 +1,139 @@
+import argparse
+import time
+
+import numpy as np
+
+from hardware.depth_projection import DepthProjector, Intrinsics
+
+
+#  Größenordnung eines D455 (848x480 Tiefe, 1280x720 Farbe, RGB-Sensor ~59 mm daneben)
+DEPTH_INTRINSICS = Intrinsics(848, 480, 421.0, 421.0, 424.5, 240.3)
+COLOR_INTRINSICS = Intrinsics(1280, 720, 640.0, 639.5, 641.2, 362.8)
+
+
+def _rotation(yaw_deg):
+    a = np.deg2rad(yaw_deg)
+    return np.array([[np.cos(a), 0.0, np.sin(a)], [0.0, 1.0, 0.0], [-np.sin(a), 0.0, np.cos(a)]])
+
+
+DEPTH_TO_COLOR = (_rotation(0.3), np.array([-0.0592, 0.0002, 0.0004]))
+
+
+def align_reference(raw_depth, depth_intrinsics, color_intrinsics, depth_to_color, depth_scale=0.001):
+    #  Nachbau von rs.align(color) für z16 (librealsense align_z_to_other): jeder
+    #  Tiefenpixel wird über seine Ecken (x +- 0.5, y +- 0.5) in das Farbbild projiziert
+    #  und füllt das Rechteck dazwischen; bei Überlappung gewinnt der nähere Wert
+    d, c = depth_intrinsics, color_intrinsics
+    rotation, translation = depth_to_color
+    ys, xs = np.nonzero(raw_depth)
+    z = raw_depth[ys, xs].astype(np.float64) * depth_scale
+
+    def corner(offset):
+        px = (xs + offset - d.ppx) / d.fx * z
+        py = (ys + offset - d.ppy) / d.fy * z
+        points = np.stack([px, py, z])
+        other = rotation @ points + translation[:, None]
+        u = other[0] / other[2] * c.fx + c.ppx
+        v = other[1] / other[2] * c.fy + c.ppy
+        return (u + 0.5).astype(np.int64), (v + 0.5).astype(np.int64)
+
+    u0, v0 = corner(-0.5)
+    u1, v1 = corner(0.5)
+    keep = (u0 >= 0) & (v0 >= 0) & (u1 < c.width) & (v1 < c.height)
+    u0, v0, u1, v1 = u0[keep], v0[keep], u1[keep], v1[keep]
+    values = raw_depth[ys[keep], xs[keep]].astype(np.int64)
+    out = np.full(c.height * c.width, np.iinfo(np.int64).max, dtype=np.int64)
+    for dy in range(int((v1 - v0).max(initial=0)) + 1):
+        for dx in range(int((u1 - u0).max(initial=0)) + 1):
+            sel = (u0 + dx <= u1) & (v0 + dy <= v1)
+            np.minimum.at(out, (v0[sel] + dy) * c.width + u0[sel] + dx, values[sel])
+    out[out == np.iinfo(np.int64).max] = 0
+    return out.reshape(c.height, c.width).astype(np.uint16)
+
+
+def render_depth(scene, intrinsics=DEPTH_INTRINSICS):
+    #  rohes Tiefenbild (mm) aus Ebenen im Tiefenkamera-Koordinatensystem.
+    #  scene: [(Normale n, Abstand d, Ausschnitt oder None)], n . X = d; vorne gewinnt
+    i = intrinsics
+    rx = ((np.arange(i.width) - i.ppx) / i.fx)[None, :]
+    ry = ((np.arange(i.height) - i.ppy) / i.fy)[:, None]
+    depth = np.full((i.height, i.width), np.inf)
+    for normal, distance, extent in scene:
+        denom = normal[0] * rx + normal[1] * ry + normal[2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(denom > 1e-6, distance / denom, np.inf)
+        if extent is not None:
+            (x1, x2), (y1, y2) = extent
+            X, Y = rx * z, ry * z
+            z = np.where((X >= x1) & (X <= x2) & (Y >= y1) & (Y <= y2), z, np.inf)
+        depth = np.minimum(depth, z)
+    return np.where(np.isfinite(depth), np.rint(depth * 1000.0), 0).astype(np.uint16)
+
+
+SCENES = {
+    "plane 2 m": [((0.0, 0.0, 1.0), 2.0, None)],
+    "tilted plane": [((0.25, -0.1, 1.0), 2.5, None)],
+    "person 1.5 m in front of wall 4 m": [((0.0, 0.0, 1.0), 4.0, None),
+                                           ((0.0, 0.0, 1.0), 1.5, ((-0.25, 0.25), (-0.9, 0.9)))],
+}
+
+
+def compare(scene, roi, rng, holes=0.0):
+    raw = render_depth(scene)
+    if holes:
+        raw[rng.random(raw.shape) < holes] = 0
+    projector = DepthProjector(DEPTH_INTRINSICS, COLOR_INTRINSICS, DEPTH_TO_COLOR)
+    full = align_reference(raw, DEPTH_INTRINSICS, COLOR_INTRINSICS, DEPTH_TO_COLOR)
+    sparse = projector.align_region(raw, roi)
+    x1, y1, x2, y2 = roi
+    a = full[y1:y2, x1:x2].astype(np.int32)
+    b = sparse[y1:y2, x1:x2].astype(np.int32)
+    both = (a > 0) & (b > 0)
+    diff = np.abs(a - b)[both]
+    return {
+        "agree_1pct": float(np.mean(diff <= 0.01 * a[both])) if both.any() else 0.0,
+        "median_abs_mm": float(np.median(diff)) if both.any() else 0.0,
+        "full_holes": float(np.mean(a == 0)),
+        "sparse_holes": float(np.mean(b == 0)),
+    }
+
+
+def timings(roi, repeats):
+    raw = render_depth(SCENES["person 1.5 m in front of wall 4 m"])
+    projector = DepthProjector(DEPTH_INTRINSICS, COLOR_INTRINSICS, DEPTH_TO_COLOR)
+    out = {}
+    t0 = time.perf_counter()
+    for _ in range(max(1, repeats // 10)):
+        align_reference(raw, DEPTH_INTRINSICS, COLOR_INTRINSICS, DEPTH_TO_COLOR)
+    out["full frame (NumPy reference)"] = (time.perf_counter() - t0) / max(1, repeats // 10) * 1000.0
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        projector.align_region(raw, roi)
+    out["sparse ROI"] = (time.perf_counter() - t0) / repeats * 1000.0
+    xs = np.arange(roi[0], roi[2], 8)
+    ys = np.full(len(xs), (roi[1] + roi[3]) // 2)
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        projector.map_pixels(raw, xs, ys)
+    out[f"sparse {len(xs)} pixels"] = (time.perf_counter() - t0) / repeats * 1000.0
+    return out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sparse ROI depth projection vs full-frame alignment")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    #  Standard-ROI der Engine (37-61 % x 37-65 %)
+    roi = (int(1280 * 0.37), int(720 * 0.37), int(1280 * 0.61), int(720 * 0.65))
+    print(f"{'scene':<46}{'agree<=1%':>10}{'median mm':>11}{'holes full':>12}{'holes sparse':>14}")
+    for name, scene in SCENES.items():
+        for holes in (0.0, 0.02):
+            r = compare(scene, roi, rng, holes)
+            label = name + (" + 2% holes" if holes else "")
+            print(f"{label:<46}{r['agree_1pct'] * 100:>9.1f}%{r['median_abs_mm']:>11.1f}"
+                  f"{r['full_holes'] * 100:>11.1f}%{r['sparse_holes'] * 100:>13.1f}%")
+    print()
+    for name, ms in timings(roi, args.repeats).items():
+        print(f"{name:<32}{ms:>8.2f} ms")
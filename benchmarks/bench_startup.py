@@ -0,0 +1,94 @@
+import argparse
+import time
+
+from utils.startup import StartupLoader, REQUIRED_TASKS, schedule_startup
+
+
+class MockModel:
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, image):
+        return None
+
+
+class MockStartup:
+    #  Lader, die nur schlafen (Dauern in s, wie auf dem Rig gemessen einstellen);
+    #  failing: Namen, die stattdessen eine Exception werfen
+    def __init__(self, durations, failing=()):
+        self.durations = durations
+        self.failing = set(failing)
+
+    def _sleep(self, name):
+        time.sleep(self.durations[name])
+        if name in self.failing:
+            raise RuntimeError(f"mock {name} failed")
+
+    def load_model(self, name):
+        self._sleep(f"{name}_model")
+        return MockModel(name)
+
+    def warm_up(self, model):
+        self._sleep(f"{model.name}_warmup")
+        return model
+
+    def create_camera(self):
+        self._sleep("camera")
+        return "camera"
+
+    def create_motor(self):
+        self._sleep("motor")
+        return "motor"
+
+
+def run(durations, loading_screen_s, calibration_s, serial_models, failing=()):
+    mock = MockStartup(durations, failing)
+    loader = schedule_startup(StartupLoader(), mock.load_model, mock.warm_up, mock.create_camera, mock.create_motor,
+                              serial_models=serial_models).start()
+    #  Ladebildschirm bis alles geladen ist oder höchstens loading_screen_s
+    t0 = loader.started
+    while loader.progress() < 1.0 and time.monotonic() - t0 < loading_screen_s:
+        time.sleep(0.01)
+    loader.mark("calibration")
+    time.sleep(calibration_s)
+    loader.mark("start_pressed")
+    pressed = time.monotonic()
+    while not loader.ready(REQUIRED_TASKS):
+        time.sleep(0.01)
+    loader.mark("main_screen")
+    waited = time.monotonic() - pressed
+    #  erste Auswahl einer Person: Gesicht und Segmentierung werden abgeholt
+    loader.value("face_warmup")
+    loader.value("seg_warmup")
+    loader.mark("first_selection")
+    first_selection = time.monotonic() - pressed
+    return loader, waited, first_selection
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Background startup with sleeping mock loaders: "
+                                                 "wait after pressing start, old serial flow vs StartupLoader")
+    parser.add_argument("--model", type=float, default=2.0, help="s per model load")
+    parser.add_argument("--warmup", type=float, default=0.5, help="s per warmup (face, seg)")
+    parser.add_argument("--camera", type=float, default=1.5)
+    parser.add_argument("--motor", type=float, default=0.3)
+    parser.add_argument("--loading-screen", type=float, default=3.0, help="max s on the loading screen")
+    parser.add_argument("--calibration", type=float, nargs="+", default=[0.0, 2.0, 5.0],
+                        help="s the operator spends on the checklist")
+    parser.add_argument("--parallel-models", action="store_true", help="load the three models concurrently")
+    parser.add_argument("--fail", nargs="*", default=[], help="task names whose mock raises (report shows FAILED)")
+    args = parser.parse_args()
+
+    durations = {f"{name}_model": args.model for name in ("person", "face", "seg")}
+    durations.update(face_warmup=args.warmup, seg_warmup=args.warmup, camera=args.camera, motor=args.motor)
+    #  bisher: alles nacheinander in MainScreen.__init__, erst nach dem Start-Knopf
+    serial = sum(durations.values())
+    print(f"old flow: {serial:.2f} s after pressing start (all loads serial on the UI thread)")
+    print(f"{'calibration s':>13}{'wait after start':>18}{'first selection':>17}")
+    loader = None
+    for calibration in args.calibration:
+        loader, waited, first_selection = run(durations, args.loading_screen, calibration,
+                                              not args.parallel_models, args.fail)
+        print(f"{calibration:>13.1f}{waited:>17.2f}s{first_selection:>16.2f}s")
+    print()
+    print(loader.report())
@@ -0,0 +1,69 @@
+import argparse
+
+import numpy as np
+
+from hardware.lens_profile import get_lens_profile
+from hardware.motor_controller import planned_move_duration
+from utils.config import (
+    TARGET_FILTER_PROCESS_NOISE,
+    TARGET_FILTER_MEASUREMENT_NOISE,
+    TARGET_FILTER_GATE,
+    TARGET_FILTER_MAX_REJECTS,
+    TARGET_FILTER_MAX_LEAD_S,
+)
+from vision.target_filter import TargetFilter
+
+
+def simulate(speed, latency, noise, outliers, fps=30.0, seconds=3.0, seed=0, stamp_delay=0.0):
+    #  Person läuft mit `speed` m/s auf die Kamera zu. Pro Frame wird gemessen, der
+    #  Befehl geht `latency` s nach der Aufnahme raus, der Motor braucht die geplante
+    #  Fahrzeit. Fehler = Zieldistanz des Befehls minus wahre Distanz bei Ankunft.
+    #  stamp_delay: Messung erst so viel später als zur Aufnahme gestempelt (z.B.
+    #  beim Eintreffen auf dem Host statt zur Belichtung)
+    rng = np.random.default_rng(seed)
+    lens = get_lens_profile(None)
+    target_filter = TargetFilter(TARGET_FILTER_PROCESS_NOISE, TARGET_FILTER_MEASUREMENT_NOISE, TARGET_FILTER_GATE,
+                                 TARGET_FILTER_MAX_REJECTS, TARGET_FILTER_MAX_LEAD_S)
+    truth = lambda t: 6.0 - speed * t
+    current_steps = lens.steps_for_distance(truth(0.0))
+    raw_errors, filtered_errors = [], []
+    for i in range(int(seconds * fps)):
+        captured = i / fps
+        z = truth(captured) + rng.normal(0.0, noise)
+        if rng.random() < outliers:
+            #  Tiefenloch oder Hintergrund im Gesichtsfenster
+            z = rng.choice([0.4, 9.0])
+        now = captured + latency
+
+        raw_steps = lens.steps_for_distance(z)
+        arrival = now + planned_move_duration(raw_steps - current_steps, 0.001)
+        raw_errors.append(z - truth(arrival))
+
+        target_filter.update(z, captured + stamp_delay)
+        distance = target_filter.predict(now)
+        duration = planned_move_duration(lens.steps_for_distance(distance) - current_steps, 0.001)
+        distance = target_filter.predict(now + duration)
+        filtered_errors.append(distance - truth(now + duration))
+        current_steps = lens.steps_for_distance(distance)
+    #  Einschwingen ignorieren
+    skip = int(fps * 0.5)
+    return np.abs(raw_errors[skip:]), np.abs(filtered_errors[skip:])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Focus target prediction: raw latest measurement vs Kalman prediction")
+    parser.add_argument("--latency", type=float, default=0.12, help="capture-to-command latency in s")
+    parser.add_argument("--noise", type=float, default=0.03, help="measurement noise (m)")
+    parser.add_argument("--outliers", type=float, default=0.05, help="fraction of outlier measurements")
+    parser.add_argument("--camera-latency", type=float, default=0.04,
+                        help="part of the latency before the frame reaches the host (kf@host stamps there)")
+    args = parser.parse_args()
+
+    print(f"{'speed m/s':>10}{'raw p50':>10}{'raw p95':>10}{'kf p50':>10}{'kf p95':>10}"
+          f"{'kf@host p50':>13}{'kf@host p95':>13}   (|error| at motor arrival, m)")
+    for speed in (0.0, 0.5, 1.0, 1.5):
+        raw, filtered = simulate(speed, args.latency, args.noise, args.outliers)
+        _, host = simulate(speed, args.latency, args.noise, args.outliers, stamp_delay=args.camera_latency)
+        print(f"{speed:>10.1f}{np.median(raw):>10.3f}{np.percentile(raw, 95):>10.3f}"
+              f"{np.median(filtered):>10.3f}{np.percentile(filtered, 95):>10.3f}"
+              f"{np.median(host):>13.3f}{np.percentile(host, 95):>13.3f}")
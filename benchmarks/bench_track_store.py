@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_tracker import Crowd
+from vision.byte_tracker import ByteTracker
+from vision.track_store import TrackStore
+
+
+def legacy_select_at(person_tracks, x, y):
+    #  bisheriges FocusEngine.select_at: lineare Suche über das Trackerarray, dann sortieren
+    matching_tracks = []
+    for track in person_tracks:
+        x1, y1, x2, y2, track_id = track
+        if x1 <= x <= x2 and y1 <= y <= y2:
+            area = (x2 - x1) * (y2 - y1)
+            matching_tracks.append((track, area))
+    if matching_tracks:
+        matching_tracks.sort(key=lambda x: x[1])
+        return int(matching_tracks[0][0][4])
+    return None
+
+
+def record_tracks(people, frames, seed):
+    #  Trackerausgaben einer Menschenmenge vorab erzeugen, damit nur Store/Altcode gemessen wird
+    crowd = Crowd(people, np.random.default_rng(seed))
+    tracker = ByteTracker()
+    return [tracker.update(crowd.step()[2]) for _ in range(frames)]
+
+
+def run(outputs, taps, history):
+    store = TrackStore(history=history)
+    legacy = {"tap": 0.0}
+    stored = {"update": 0.0, "tap": 0.0}
+    for tracks in outputs:
+        t0 = time.perf_counter()
+        store.update(tracks)
+        stored["update"] += time.perf_counter() - t0
+        for x, y in taps:
+            t0 = time.perf_counter()
+            expected = legacy_select_at(tracks, x, y)
+            legacy["tap"] += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            got = store.hit_test(x, y)
+            stored["tap"] += time.perf_counter() - t0
+            assert got == expected, (got, expected)
+        if len(tracks):
+            #  Fokusperson: erster Track, Tiefe wie in _measure_selected mitschreiben
+            store.record_depth(tracks[0][4], 2000.0)
+    frames = len(outputs)
+    scale = {"update": 1.0 / frames, "tap": 1.0 / (frames * len(taps))}
+    return ({k: v * scale[k] * 1e6 for k, v in legacy.items()},
+            {k: v * scale[k] * 1e6 for k, v in stored.items()}, store)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TrackStore vs re-deriving from the tracker array: tap hit test and per-frame update")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--people", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    parser.add_argument("--taps", type=int, default=20, help="taps tested per frame")
+    parser.add_argument("--history", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    taps = np.stack([rng.uniform(0, 1280, args.taps), rng.uniform(0, 720, args.taps)], axis=1)
+    print("µs per call; identical selections checked on every tap")
+    print(f"{'people':>6}{'tracks':>8}{'tap old':>10}{'tap new':>10}"
+          f"{'store update':>14}{'rows':>6}")
+    for people in args.people:
+        outputs = record_tracks(people, args.frames, people)
+        legacy, stored, store = run(outputs, taps, args.history)
+        mean_tracks = np.mean([len(t) for t in outputs])
+        print(f"{people:>6}{mean_tracks:>8.1f}{legacy['tap']:>10.1f}{stored['tap']:>10.1f}"
+              f"{stored['update']:>14.1f}{store.count:>6}")
@@ -0,0 +1,242 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from vision.boxes import iou_matrix
+from vision.byte_tracker import ByteTracker, as_detections
+
+
+class _SortBoxTracker:
+    #  Nachbau von sort.KalmanBoxTracker (abewley/sort, filterpy-Kalman) als Referenz,
+    #  wenn das sort-Paket nicht installiert ist: Zustand (u, v, s, r, u', v', s')
+    #  je Track, ein Objekt und kleine Matrizen pro Person
+    count = 0
+
+    def __init__(self, bbox):
+        self.F = np.eye(7)
+        self.F[0, 4] = self.F[1, 5] = self.F[2, 6] = 1.0
+        self.H = np.eye(4, 7)
+        self.R = np.eye(4)
+        self.R[2:, 2:] *= 10.0
+        self.P = np.eye(7) * 10.0
+        self.P[4:, 4:] *= 1000.0
+        self.Q = np.eye(7)
+        self.Q[-1, -1] *= 0.01
+        self.Q[4:, 4:] *= 0.01
+        self.x = np.zeros((7, 1))
+        self.x[:4] = self._to_z(bbox)
+        _SortBoxTracker.count += 1
+        self.id = _SortBoxTracker.count
+        self.time_since_update = 0
+        self.hits = 0
+        self.hit_streak = 0
+
+    @staticmethod
+    def _to_z(bbox):
+        w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        return np.array([[bbox[0] + w / 2.0], [bbox[1] + h / 2.0], [w * h], [w / float(h)]])
+
+    def state(self):
+        w = np.sqrt(max(self.x[2, 0] * self.x[3, 0], 0.0))
+        h = self.x[2, 0] / w if w > 0 else 0.0
+        return np.array([self.x[0, 0] - w / 2.0, self.x[1, 0] - h / 2.0, self.x[0, 0] + w / 2.0, self.x[1, 0] + h / 2.0])
+
+    def predict(self):
+        if self.x[6, 0] + self.x[2, 0] <= 0:
+            self.x[6, 0] = 0.0
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        if self.time_since_update > 0:
+            self.hit_streak = 0
+        self.time_since_update += 1
+        return self.state()
+
+    def update(self, bbox):
+        self.time_since_update = 0
+        self.hits += 1
+        self.hit_streak += 1
+        y = self._to_z(bbox) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        I_KH = np.eye(7) - K @ self.H
+        self.P = I_KH @ self.P @ I_KH.T + K @ self.R @ K.T
+
+
+class SortReference:
+    #  Sort(max_age=1, min_hits=3, iou_threshold=0.3) wie im Original
+    def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3):
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.trackers = []
+        self.frame_count = 0
+
+    def update(self, dets):
+        self.frame_count += 1
+        trks = np.array([t.predict() for t in self.trackers]).reshape(-1, 4)
+        valid = ~np.any(np.isnan(trks), axis=1)
+        self.trackers = [t for t, ok in zip(self.trackers, valid) if ok]
+        trks = trks[valid]
+        matched, unmatched = [], list(range(len(dets)))
+        if len(dets) and len(trks):
+            iou = iou_matrix(dets[:, :4], trks)
+            a = (iou > self.iou_threshold).astype(np.int32)
+            if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+                pairs = np.stack(np.where(a), axis=1)
+            else:
+                pairs = np.stack(linear_sum_assignment(-iou), axis=1)
+            matched = [(d, t) for d, t in pairs if iou[d, t] >= self.iou_threshold]
+            used = {d for d, _ in matched}
+            unmatched = [d for d in range(len(dets)) if d not in used]
+        for d, t in matched:
+            self.trackers[t].update(dets[d, :4])
+        for d in unmatched:
+            self.trackers.append(_SortBoxTracker(dets[d, :4]))
+        ret = []
+        for t in reversed(self.trackers):
+            if t.time_since_update < 1 and (t.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
+                ret.append(np.append(t.state(), t.id))
+        self.trackers = [t for t in self.trackers if t.time_since_update <= self.max_age]
+        return np.array(ret).reshape(-1, 5)
+
+
+def make_sort():
+    #  echtes SORT, wenn installiert (Rig: /home/amacus/hailo_examples/sort), sonst Nachbau
+    sys.path.append('/home/amacus/hailo_examples/sort')
+    try:
+        from sort import Sort
+        return Sort(), "sort package"
+    except Exception:
+        return SortReference(), "reference port of abewley/sort"
+
+
+class Crowd:
+    #  Personen laufen mit konstanter Geschwindigkeit (plus Zittern) durchs Bild und
+    #  prallen am Rand ab; nähere Personen sind größer und stehen tiefer im Bild.
+    #  Sie verdecken fernere: wer weniger als 30 % sichtbar ist, wird nicht erkannt
+    #  (und nicht bewertet), bis 70 % nur mit niedrigem Score (wie der Detektor bei
+    #  Teilverdeckung); dazu zufällige Aussetzer und Boxrauschen.
+    def __init__(self, people, rng, width=1280, height=720, miss=0.03):
+        self.rng = rng
+        self.width, self.height = width, height
+        self.miss = miss
+        self.h = rng.uniform(80, 360, people)
+        self.w = self.h * rng.uniform(0.3, 0.45, people)
+        self.x = rng.uniform(0, width - self.w)
+        feet = height * (0.45 + 0.5 * (self.h - 80) / 280)
+        self.y = feet - self.h
+        self.vx = rng.uniform(1.0, 6.0, people) * rng.choice([-1, 1], people)
+
+    def step(self):
+        self.vx += self.rng.normal(0.0, 0.2, len(self.vx))
+        self.x += self.vx
+        bounce = (self.x < 0) | (self.x + self.w > self.width)
+        self.vx[bounce] *= -1
+        self.x = np.clip(self.x, 0, self.width - self.w)
+        boxes = np.stack([self.x, self.y, self.x + self.w, self.y + self.h], axis=1)
+        visible = self._visibility(boxes)
+        noise = self.rng.normal(0.0, 0.02, boxes.shape) * np.stack([self.w, self.h, self.w, self.h], axis=1)
+        detected = (visible >= 0.3) & (self.rng.random(len(boxes)) >= self.miss)
+        scores = np.where(visible >= 0.7, self.rng.uniform(0.6, 0.95, len(boxes)), self.rng.uniform(0.15, 0.45, len(boxes)))
+        dets = np.hstack([boxes + noise, scores[:, None]])[detected]
+        people = np.flatnonzero(visible >= 0.3)
+        return people, boxes[people], as_detections(dets)
+
+    def _visibility(self, boxes):
+        #  Anteil der Box, der von keiner näheren (größeren) Person bedeckt ist, auf 8x8-Raster
+        gx = (np.arange(8) + 0.5) / 8
+        visible = np.empty(len(boxes))
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            px = (x1 + gx * (x2 - x1))[None, :]
+            py = (y1 + gx * (y2 - y1))[:, None]
+            covered = np.zeros((8, 8), dtype=bool)
+            for j in np.flatnonzero(self.h > self.h[i]):
+                bx1, by1, bx2, by2 = boxes[j]
+                covered |= (px >= bx1) & (px <= bx2) & (py >= by1) & (py <= by2)
+            visible[i] = 1.0 - covered.mean()
+        return visible
+
+
+class MotScore:
+    #  CLEAR-MOT light: GT gegen Trackerausgabe per IoU >= 0.5 (Hungarian), ein
+    #  ID-Wechsel, wenn eine Person einen anderen Track bekommt als zuletzt
+    def __init__(self):
+        self.gt = self.misses = self.false_positives = self.switches = 0
+        self.last = {}
+
+    def add(self, people, gt_boxes, tracks):
+        self.gt += len(gt_boxes)
+        if len(tracks) == 0:
+            self.misses += len(gt_boxes)
+            return
+        iou = iou_matrix(gt_boxes, tracks[:, :4])
+        rows, cols = linear_sum_assignment(-iou)
+        ok = iou[rows, cols] >= 0.5
+        rows, cols = rows[ok], cols[ok]
+        self.misses += len(gt_boxes) - len(rows)
+        self.false_positives += len(tracks) - len(rows)
+        for person, col in zip(people[rows], cols):
+            track_id = int(tracks[col, 4])
+            if self.last.get(person, track_id) != track_id:
+                self.switches += 1
+            self.last[person] = track_id
+
+    @property
+    def mota(self):
+        return 1.0 - (self.misses + self.false_positives + self.switches) / max(self.gt, 1)
+
+
+def run(tracker, frames, people, seed, min_score):
+    crowd = Crowd(people, np.random.default_rng(seed))
+    score = MotScore()
+    elapsed = 0.0
+    for _ in range(frames):
+        people_ids, gt_boxes, dets = crowd.step()
+        dets = dets[dets[:, 4] >= min_score]
+        t0 = time.perf_counter()
+        tracks = tracker.update(dets)
+        elapsed += time.perf_counter() - t0
+        score.add(people_ids, gt_boxes, tracks)
+    return elapsed / frames * 1000.0, score
+
+
+def run_unoccluded(tracker, frames, people, seed):
+    #  reine Skalierung: alle Personen jedes Frame sicher erkannt, beide Tracker
+    #  führen also genau `people` Tracks
+    crowd = Crowd(people, np.random.default_rng(seed), miss=0.0)
+    elapsed = 0.0
+    for _ in range(frames):
+        crowd.step()
+        boxes = np.stack([crowd.x, crowd.y, crowd.x + crowd.w, crowd.y + crowd.h], axis=1)
+        dets = as_detections(np.hstack([boxes, np.full((people, 1), 0.9)]))
+        t0 = time.perf_counter()
+        tracker.update(dets)
+        elapsed += time.perf_counter() - t0
+    return elapsed / frames * 1000.0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="ByteTracker vs SORT: update time and tracking quality from 1 to 50 people")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--people", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    parser.add_argument("--sort-min-score", type=float, default=0.5,
+                        help="SORT only sees detections above the detector's usual confidence threshold")
+    args = parser.parse_args()
+
+    _, sort_name = make_sort()
+    print(f"SORT: {sort_name}; SORT gets detections >= {args.sort_min_score}, ByteTracker >= 0.1")
+    print("ms/update, occluded: the scored crowd (people hidden behind others, missed detections); "
+          "all detected: every person found every frame, so every track is live")
+    print(f"{'people':>6}  {'tracker':<12}{'occluded ms':>12}{'all detected ms':>16}{'MOTA':>8}"
+          f"{'ID switches':>13}{'misses':>8}{'FP':>7}")
+    for people in args.people:
+        rows = [("SORT", make_sort, args.sort_min_score), ("ByteTracker", lambda: (ByteTracker(), ""), 0.0)]
+        for name, factory, min_score in rows:
+            ms, score = run(factory()[0], args.frames, people, people, min_score)
+            ms_all = run_unoccluded(factory()[0], args.frames, people, people)
+            print(f"{people if name == 'SORT' else '':>6}  {name:<12}{ms:>12.3f}{ms_all:>16.3f}{score.mota * 100:>7.1f}%"
+                  f"{score.switches:>13}{score.misses:>8}{score.false_positives:>7}")
@@ -0,0 +1,202 @@
+import time
+
+import numpy as np
+import cv2
+
+from hardware.frame_ring import CapturedFrame
+from vision.byte_tracker import as_detections
+from vision.mask_assignment import MaskInstance
+
+
+#  Farbe, mit der synthetische Personen gezeichnet werden (BGR); die Stub-Detektoren
+#  finden sie per inRange wieder, ganz ohne Hailo.
+PERSON_COLOR = (40, 40, 200)
+FACE_COLOR = (150, 190, 230)
+
+
+class SyntheticScene:
+    #  Personen als Rechtecke, die sich seitlich und in der Tiefe bewegen
+    def __init__(self, width=1280, height=720, people=3, seed=0):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.people = people
+        self.frame_number = 0
+        self._background = self.rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+        self._depth_background = np.full((height, width), 9000, dtype=np.uint16)
+        #  Rauschen einmal vorab erzeugen, damit "capture" nicht den Generator misst
+        self._noise = [self.rng.integers(-30, 30, (height, width), dtype=np.int16) for _ in range(4)]
+        self._holes = [self.rng.random((height, width)) < 0.02 for _ in range(4)]
+
+    def boxes(self, t):
+        boxes = []
+        for i in range(self.people):
+            phase = t * 0.02 + i * 1.7
+            distance_m = 2.0 + 1.5 * (1 + np.sin(phase * 0.5 + i))
+            w = int(260 / distance_m)
+            h = int(900 / distance_m)
+            cx = int(self.width * (0.4 + 0.12 * np.sin(phase) + 0.08 * (i - self.people / 2)))
+            cy = int(self.height * 0.5)
+            boxes.append((cx - w // 2, cy - h // 2, cx + w // 2, cy + h // 2, distance_m))
+        #  hinten zuerst zeichnen
+        boxes.sort(key=lambda b: -b[4])
+        return boxes
+
+    def next_frame(self):
+        t = self.frame_number
+        color = self._background.copy()
+        depth = self._depth_background.copy()
+        for (x1, y1, x2, y2, distance_m) in self.boxes(t):
+            x1c, y1c = max(0, x1), max(0, y1)
+            x2c, y2c = min(self.width, x2), min(self.height, y2)
+            color[y1c:y2c, x1c:x2c] = PERSON_COLOR
+            depth[y1c:y2c, x1c:x2c] = int(distance_m * 1000)
+            fh = (y2 - y1) // 6
+            fw = (x2 - x1) // 2
+            fx1 = x1 + (x2 - x1) // 4
+            color[max(0, y1):max(0, y1 + fh), max(0, fx1):max(0, fx1 + fw)] = FACE_COLOR
+        depth += self._noise[t % 4].view(np.uint16)
+        #  Löcher wie beim echten D455
+        depth[self._holes[t % 4]] = 0
+        self.frame_number += 1
+        return color, depth
+
+
+class SyntheticCamera:
+    #  fps: Frames im Takt der Kamera liefern (0 = so schnell wie möglich)
+    def __init__(self, frames=300, fps=0.0, **scene_kwargs):
+        self.scene = SyntheticScene(**scene_kwargs)
+        self.frames = frames
+        self.interval = 1.0 / fps if fps else 0.0
+        self.started = True
+        self._next = time.monotonic()
+
+    @property
+    def finished(self):
+        return self.scene.frame_number >= self.frames
+
+    def get_aligned_frames(self):
+        if self.scene.frame_number >= self.frames:
+            return None, None
+        return self.scene.next_frame()
+
+    def latest(self, timeout=None):
+        if self.finished:
+            return None
+        if self.interval:
+            time.sleep(max(0.0, self._next - time.monotonic()))
+            self._next = max(self._next + self.interval, time.monotonic())
+        color, depth = self.scene.next_frame()
+        return CapturedFrame(color, depth, self.scene.frame_number, time.time() * 1000.0, 0, time.monotonic())
+
+    def stop(self):
+        pass
+
+
+def _color_boxes(image_bgr, color, min_area=200):
+    mask = cv2.inRange(image_bgr, np.array(color, dtype=np.uint8), np.array(color, dtype=np.uint8))
+    count, _labels, stats, _ = cv2.connectedComponentsWithStats(mask)
+    boxes = []
+    for i in range(1, count):
+        x, y, w, h, area = stats[i]
+        if area >= min_area:
+            boxes.append((int(x), int(y), int(x + w), int(y + h)))
+    return boxes
+
+
+class StubDetectionPipeline:
+    #  Gleiche Schnittstelle wie vision.object_tracker.DetectionPipeline;
+    #  latency simuliert die Inferenzzeit auf dem Hailo-8
+    def __init__(self, person_latency=0.0, face_latency=0.0, seg_latency=0.0):
+        self.person_latency = person_latency
+        self.face_latency = face_latency
+        self.seg_latency = seg_latency
+
+    def detect_person_bboxes(self, image_bgr):
+        if self.person_latency:
+            time.sleep(self.person_latency)
+        return as_detections([(x1, y1, x2, y2, 0.9) for (x1, y1, x2, y2) in _color_boxes(image_bgr, PERSON_COLOR)])
+
+    def detect_faces(self, image_bgr):
+        if self.face_latency:
+            time.sleep(self.face_latency)
+        return [(x1, y1, x2, y2, 0.8) for (x1, y1, x2, y2) in _color_boxes(image_bgr, FACE_COLOR, 50)]
+
+    def segment_person(self, image_bgr):
+        if self.seg_latency:
+            time.sleep(self.seg_latency)
+        person = cv2.inRange(image_bgr, np.array(PERSON_COLOR, dtype=np.uint8), np.array(PERSON_COLOR, dtype=np.uint8))
+        face = cv2.inRange(image_bgr, np.array(FACE_COLOR, dtype=np.uint8), np.array(FACE_COLOR, dtype=np.uint8))
+        mask = ((person | face) > 0).astype(np.float32)
+        return mask if mask.any() else None
+
+    def segment_persons(self, image_bgr):
+        #  eine Instanz pro zusammenhängender Personenfläche
+        if self.seg_latency:
+            time.sleep(self.seg_latency)
+        person = cv2.inRange(image_bgr, np.array(PERSON_COLOR, dtype=np.uint8), np.array(PERSON_COLOR, dtype=np.uint8))
+        face = cv2.inRange(image_bgr, np.array(FACE_COLOR, dtype=np.uint8), np.array(FACE_COLOR, dtype=np.uint8))
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(person | face)
+        instances = []
+        for i in range(1, count):
+            x, y, w, h, area = stats[i]
+            if area >= 200:
+                instances.append(MaskInstance(int(x), int(y), int(x + w), int(y + h), labels[y:y + h, x:x + w] == i))
+        return instances
+
+
+class StubMotor:
+    #  Gleiche Schnittstelle wie MotorController, ohne Prozess und ohne Hardware
+    def __init__(self, steps_per_call=20):
+        self.steps_per_call = steps_per_call
+        self.target = 0
+        self._current = 0
+        self.moves = []
+
+    def move_to(self, steps, focus_time=0.001, trace_id=None):
+        self.target = int(steps)
+        self.moves.append((int(steps), float(focus_time)))
+
+    def poll_metrics(self, metrics):
+        pass
+
+    def poll_traces(self, tracer):
+        pass
+
+    @property
+    def current_steps(self):
+        #  bei jedem Lesen ein Stück Richtung Ziel fahren
+        diff = self.target - self._current
+        self._current += int(np.clip(diff, -self.steps_per_call, self.steps_per_call))
+        return self._current
+
+    def stop(self):
+        pass
+
+
+class FakeStepperConstants:
+    #  Ersatz für adafruit_motor.stepper
+    FORWARD = 1
+    BACKWARD = 2
+    INTERLEAVE = 3
+
+
+class _FakeStepper:
+    def __init__(self):
+        self.steps = []  # (time.monotonic(), +1/-1)
+        self.released = False
+
+    def onestep(self, direction, style):
+        self.steps.append((time.monotonic(), 1 if direction == FakeStepperConstants.FORWARD else -1))
+
+    def release(self):
+        self.released = True
+
+
+class FakeMotorKit:
+    #  MotorKit-Fake für _motor_worker(kit_factory=...), zeichnet Schrittzeitpunkte auf
+    def __init__(self):
+        self.stepper1 = _FakeStepper()
+
+    def factory(self):
+        return self, FakeStepperConstants
@@ -8,6 +8,8 @@ from kivy.uix.dropdown import DropDown
 from kivy.uix.checkbox import CheckBox
 from kivy.uix.button import Button
 from kivy.uix.popup import Popup
+from kivy.uix.progressbar import ProgressBar
+from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle, Line
 from kivy.properties import BooleanProperty, StringProperty, ListProperty
 from kivy.core.window import Window
@@ -114,9 +116,11 @@ class CalibrationStep(GridLayout):
 
 
 class CalibrationScreen(BoxLayout):
-    def __init__(self, main_app, **kwargs):
+    #  startup: StartupLoader, dessen Fortschritt unter der Checkliste weiterläuft
+    def __init__(self, main_app, startup=None, **kwargs):
         super(CalibrationScreen, self).__init__(**kwargs)
         self.main_app = main_app
+        self.startup = startup
         self.orientation = 'vertical'
         self.padding = 10
         self.spacing = 10
@@ -179,6 +183,16 @@ class CalibrationScreen(BoxLayout):
             font_size='30sp',
         )
         self.start_btn.bind(on_press=self.check_calibration)
+        if startup is not None:
+            #  Laden im Hintergrund (Modelle, Kamera, Motor) während der Checkliste
+            loading = BoxLayout(size_hint_y=None, height=30, spacing=10)
+            self.loading_bar = ProgressBar(max=1.0, value=startup.progress())
+            self.loading_label = Label(text="", color=[0, 0, 0, 1], font_size='18sp', size_hint_x=0.4)
+            loading.add_widget(self.loading_bar)
+            loading.add_widget(self.loading_label)
+            self.add_widget(loading)
+            self._update_loading(0)
+            Clock.schedule_interval(self._update_loading, 0.2)
         self.add_widget(self.start_btn)
 
     def _update_rect(self, instance, value):
@@ -189,6 +203,20 @@ class CalibrationScreen(BoxLayout):
         self.steps_rect.pos = instance.pos
         self.steps_rect.size = instance.size
 
+    def _update_loading(self, dt):
+        progress = self.startup.progress()
+        self.loading_bar.value = progress
+        if progress >= 1.0:
+            self.loading_label.text = "Geladen"
+            return False
+        self.loading_label.text = f"Lade {progress * 100:.0f} %: {', '.join(self.startup.pending())}"
+        return True
+
+    def set_waiting(self, pending):
+        #  Start gedrückt, aber Pflichtaufgaben laufen noch
+        self.start_btn.disabled = True
+        self.start_btn.text = f"Start, sobald geladen: {', '.join(pending)}"
+
     def check_calibration(self, instance):
         all_checked = all(step.checked for step in self.steps)
         if all_checked:
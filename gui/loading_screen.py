@@ -9,8 +9,14 @@ from utils.config import LOGO_PATH
 
 
 class MaskedLogo(StencilView):
-    def __init__(self, **kwargs):
+    #  progress: Callable -> 0..1 (StartupLoader.progress); das Logo wird höchstens so
+    #  weit aufgedeckt, wie geladen ist. Ohne progress die feste Animation. Nach
+    #  max_duration s ist Schluss, der Rest läuft auf dem Kalibrierungsbildschirm weiter.
+    def __init__(self, progress=None, max_duration=None, **kwargs):
         super().__init__(**kwargs)
+        self.progress = progress
+        self.max_duration = max_duration
+        self.elapsed = 0.0
         self.size = (800, 800)
         self.pos = (Window.width / 2 - self.size[0] / 2, Window.height / 2 - self.size[1] / 2)
         self.logo = Image(
@@ -27,25 +33,29 @@ class MaskedLogo(StencilView):
         Clock.schedule_interval(self.update_progress, 0.03)
 
     def update_progress(self, dt):
-        if self.progress_value < self.size[0]:
-            self.progress_value += 30
+        self.elapsed += dt
+        target = self.size[0] if self.progress is None else self.size[0] * self.progress()
+        if self.progress_value < target:
+            self.progress_value = min(target, self.progress_value + 30)
             self.mask_rect.pos = (self.pos[0] + self.progress_value, self.pos[1])
-        else:
+        timed_out = self.max_duration is not None and self.elapsed >= self.max_duration
+        if self.progress_value >= self.size[0] or timed_out:
             Clock.unschedule(self.update_progress)
             if hasattr(self, 'parent') and hasattr(self.parent, 'on_loading_finished'):
                 self.parent.on_loading_finished()
 
 
 class LoadingScreen(FloatLayout):
-    def __init__(self, on_finished_callback=None, **kwargs):
+    def __init__(self, on_finished_callback=None, progress=None, max_duration=None, hold=2, **kwargs):
         super().__init__(**kwargs)
         with self.canvas.before:
             Color(1, 1, 1, 1)
             self.bg = Rectangle(size=Window.size)
-        self.mask = MaskedLogo()
+        self.mask = MaskedLogo(progress=progress, max_duration=max_duration)
         self.add_widget(self.mask)
         self.on_finished_callback = on_finished_callback
+        self.hold = hold
 
     def on_loading_finished(self):
         if self.on_finished_callback:
-            Clock.schedule_once(lambda dt: self.on_finished_callback(), 2)
\ No newline at end of file
+            Clock.schedule_once(lambda dt: self.on_finished_callback(), self.hold)
\ No newline at end of file
@@ -0,0 +1,184 @@
+import numpy as np
+import cv2
+
+from utils.config import FOCUS_PLANE_START, PROFILE_CANVAS_BG_M
+
+
+PROFILE_CANVAS_HEIGHT = 900
+PROFILE_WIDTH_RATIO = 0.18
+ROI_CORNER_SIZE = 15
+
+
+def draw_decision(frame, decision, focus_time=0.0):
+    #  Overlays aus einer FocusDecision in den Frame zeichnen (in place)
+    for track in decision.tracks:
+        x1, y1, x2, y2, track_id = track.astype(int)
+        selected = decision.selected_id == int(track_id)
+        color = (0, 255, 0) if selected else (128, 128, 128)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+        if selected and decision.selected_mask is not None:
+            #  rotes Overlay auf getrackter Person
+            mx, my, mask = decision.selected_mask
+            region = frame[my:my + mask.shape[0], mx:mx + mask.shape[1]]
+            mask = mask[:region.shape[0], :region.shape[1]]
+            red = np.zeros_like(region[mask])
+            red[:, 2] = 255
+            region[mask] = cv2.addWeighted(region[mask], 0.6, red, 0.4, 0)
+
+        label = f"Fokussperson {track_id}: {decision.focus_distance:.2f}m" if selected else f"Person {track_id}"
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    if decision.face is not None:
+        fx1, fy1, fx2, fy2 = decision.face.box
+        face_text = f"corr: {decision.face.corrected:.2f} uncorr:{decision.face.uncorrected:.2f}"
+        cv2.rectangle(frame, (fx1, fy1), (fx2, fy2), (0, 255, 255), 2)
+        cv2.putText(frame, face_text, (fx1, fy1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+
+    if decision.flow is not None:
+        flow = decision.flow
+        for (x1w, y1w, x2w, y2w) in flow.windows:
+            cv2.rectangle(frame, (x1w, y1w), (x2w, y2w), (0, 255, 0), 2)
+        cv2.putText(
+            frame,
+            f"{focus_time:.2f} corr: {flow.corrected:.2f} uncorr: {flow.uncorrected:.2f} fD: {decision.focus_distance:.2f}",
+            (flow.center[0], flow.center[1] - 10),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2
+        )
+
+    roi_x1, roi_y1, roi_x2, roi_y2 = decision.roi
+    cv2.rectangle(frame, (roi_x1, roi_y1), (roi_x2, roi_y2), (0, 0, 255), 2)
+    corner_color = (0, 255, 255)
+    corner_size = ROI_CORNER_SIZE
+    for (cx, cy) in [(roi_x1, roi_y1), (roi_x2, roi_y1), (roi_x1, roi_y2), (roi_x2, roi_y2)]:
+        cv2.rectangle(frame, (int(cx) - corner_size, int(cy) - corner_size), (int(cx) + corner_size, int(cy) + corner_size), corner_color, -1)
+    return frame
+
+
+class ProfileRenderer:
+    #  Tiefenprofil-Panel. Statische Ebenen (Hintergrund, rote Gültigkeitslinien,
+    #  Meter-Skala) werden einmal pro Canvas-Größe gerendert; pro Frame werden nur
+    #  der Hintergrund in einen wiederverwendeten Puffer kopiert, alle Punkte in
+    #  einem Dilate-Durchgang gesetzt und die beiden Balken gezeichnet.
+    #  Das zurückgegebene Canvas wird beim nächsten render() überschrieben.
+    BACKGROUND = (30, 30, 30)
+    SAMPLE_COLOR = (128, 128, 128)
+    SAMPLE_RADIUS = 2
+
+    def __init__(self, canvas_height=PROFILE_CANVAS_HEIGHT, width_ratio=PROFILE_WIDTH_RATIO,
+                 background_depth=PROFILE_CANVAS_BG_M):
+        self.canvas_height = canvas_height
+        self.width_ratio = width_ratio
+        self.background_depth = background_depth
+        self.y_scale = (canvas_height - 50) / background_depth
+        self._size = None
+        self._kernel = np.ones((2 * self.SAMPLE_RADIUS + 1, 2 * self.SAMPLE_RADIUS + 1), dtype=np.uint8)
+
+    def _y(self, distance_m):
+        return 50 + int((self.background_depth - distance_m) * self.y_scale)
+
+    @staticmethod
+    def _layer_pixels(layer, blank):
+        #  (flache Indizes, Farben) aller Pixel, die eine Ebene gegenüber blank ändert
+        changed = np.flatnonzero(np.any(layer != blank, axis=2))
+        return changed, layer.reshape(-1, 3)[changed]
+
+    def _build_static(self, scaled_width):
+        height = self.canvas_height
+        blank = np.empty((height, scaled_width, 3), dtype=np.uint8)
+        blank[:] = self.BACKGROUND
+
+        # Depth profile decorations (rote Linien liegen über den Punkten)
+        lines = blank.copy()
+        not_valid = self._y(FOCUS_PLANE_START)
+        cv2.line(lines, (0, not_valid), (scaled_width, not_valid), (0, 0, 255), 2)
+        cv2.line(lines, (0, height - 2), (scaled_width, height - 2), (0, 0, 255), 2)
+        cv2.line(lines, (0, height), (scaled_width, not_valid), (0, 0, 255), 2)
+        cv2.line(lines, (0, not_valid), (scaled_width, height), (0, 0, 255), 2)
+        self._lines = self._layer_pixels(lines, blank)
+        self._background = lines
+
+        #  Meter-Skala liegt über den Balken. putText glättet die Kanten gegen den
+        #  Untergrund, deshalb wird eine Marke nur dann aus dem Cache kopiert, wenn
+        #  unter ihr nichts Dynamisches liegt, sonst neu gezeichnet.
+        self._ticks = []
+        for y in range(0, int(self.background_depth) + 1):
+            y_pos = self._y(y)
+            if 0 <= y_pos < height:
+                tick = blank.copy()
+                self._draw_tick(tick, y, y_pos)
+                pixels = self._layer_pixels(tick, blank)
+                rows = pixels[0] // scaled_width
+                cols = pixels[0] % scaled_width
+                band = (max(0, rows.min() - 2), min(height, rows.max() + 3), min(scaled_width, cols.max() + 3))
+                self._ticks.append((y, y_pos, band, pixels))
+
+        self._canvas = np.empty_like(blank)
+        self._points = np.zeros((height, scaled_width), dtype=np.uint8)
+        self._size = (height, scaled_width)
+
+    @staticmethod
+    def _draw_tick(canvas, y, y_pos):
+        cv2.line(canvas, (0, y_pos), (20, y_pos), (255, 255, 255), 1)
+        cv2.putText(canvas, f"{y}m", (25, y_pos + 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    def _splat(self, canvas, x_sample, distance_m, frame_width):
+        height, scaled_width = self._size
+        xs = (x_sample * (scaled_width / frame_width)).astype(int)
+        ys = 50 + ((self.background_depth - distance_m) * self.y_scale).astype(int)
+        xs = np.clip(xs, 0, scaled_width - 1)
+        ys = np.clip(ys, 0, height - 1)
+        points = self._points
+        points.fill(0)
+        points[ys, xs] = 1
+        covered = cv2.dilate(points, self._kernel)
+        canvas[covered > 0] = self.SAMPLE_COLOR
+        return covered
+
+    def render(self, decision, frame_width, focus_plane_pos):
+        scaled_width = int(frame_width * self.width_ratio)
+        if self._size != (self.canvas_height, scaled_width):
+            self._build_static(scaled_width)
+        canvas = self._canvas
+        np.copyto(canvas, self._background)
+        flat = canvas.reshape(-1, 3)
+
+        # Untracked persons contribute gray samples
+        x_sample, distance_m = decision.samples
+        covered = None
+        if len(x_sample):
+            covered = self._splat(canvas, x_sample, distance_m, frame_width)
+            flat[self._lines[0]] = self._lines[1]
+
+        white_bar_pos = self._y(decision.focus_distance)
+        cv2.line(canvas, (0, white_bar_pos), (scaled_width, white_bar_pos), (255, 255, 255), 5)
+        focus_plane_y = self._y(focus_plane_pos)
+        cv2.line(canvas, (0, focus_plane_y), (scaled_width, focus_plane_y), (0, 255, 0), 4)
+
+        #  Balkenzeilen inkl. Linienbreite
+        bars = ((white_bar_pos - 3, white_bar_pos + 4), (focus_plane_y - 2, focus_plane_y + 3))
+        for y, y_pos, (y0, y1, x1), pixels in self._ticks:
+            dirty = any(b0 < y1 and b1 > y0 for b0, b1 in bars)
+            if not dirty and covered is not None:
+                dirty = covered[y0:y1, :x1].any()
+            if dirty:
+                self._draw_tick(canvas, y, y_pos)
+            else:
+                flat[pixels[0]] = pixels[1]
+        return canvas, white_bar_pos
+
+
+class DisplayScaler:
+    #  Vorschaubild für die Textur: bei scale < 1 in einen wiederverwendeten Puffer
+    #  verkleinern (INTER_AREA), sonst den Frame unverändert durchreichen
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self._out = None
+
+    def __call__(self, frame):
+        if self.scale >= 1.0:
+            return np.ascontiguousarray(frame)
+        size = (max(1, int(frame.shape[1] * self.scale)), max(1, int(frame.shape[0] * self.scale)))
+        if self._out is None or self._out.shape[1::-1] != size or self._out.shape[2:] != frame.shape[2:]:
+            self._out = np.empty((size[1], size[0]) + frame.shape[2:], dtype=frame.dtype)
+        return cv2.resize(frame, size, dst=self._out, interpolation=cv2.INTER_AREA)
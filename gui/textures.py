@@ -0,0 +1,24 @@
+import numpy as np
+
+from kivy.graphics.texture import Texture
+
+
+class PersistentTexture:
+    #  Eine Textur pro Image-Widget, neu angelegt nur bei Größenänderung.
+    #  Das Spiegeln übernimmt flip_vertical() (UV-Koordinaten) statt cv2.flip, und
+    #  hochgeladen wird direkt aus dem zusammenhängenden NumPy-Puffer.
+    def __init__(self, image_widget, colorfmt='bgr'):
+        self.image_widget = image_widget
+        self.colorfmt = colorfmt
+        self.texture = None
+
+    def upload(self, array):
+        array = np.ascontiguousarray(array)
+        size = (array.shape[1], array.shape[0])
+        if self.texture is None or self.texture.size != size:
+            self.texture = Texture.create(size=size, colorfmt=self.colorfmt)
+            self.texture.flip_vertical()
+            self.image_widget.texture = self.texture
+        self.texture.blit_buffer(memoryview(array).cast('B'), colorfmt=self.colorfmt, bufferfmt='ubyte')
+        #  gleiche Textur-Instanz: Widget muss selbst neu zeichnen
+        self.image_widget.canvas.ask_update()
@@ -1,35 +1,125 @@
+import threading
+import time
+
 import numpy as np
-import pyrealsense2 as rs  #  hartes Import wie im Original
+
+from hardware.depth_projection import DepthProjector
+from hardware.frame_ring import CapturedFrame, FrameRing, exposure_monotonic
+
+
+def host_time_domains():
+    #  Zeitstempel-Domänen, die in Host-Wanduhr-ms laufen (hardware_clock nicht)
+    import pyrealsense2 as rs
+    return (rs.timestamp_domain.global_time, rs.timestamp_domain.system_time)
+
 
 class RealSenseCamera:
-    def __init__(self):
-        #  feste Streams wie im Original
-        self.pipeline = rs.pipeline()
-        config = rs.config()
-        config.enable_stream(rs.stream.color, 1280, 720, rs.format.bgr8, 30)
-        config.enable_stream(rs.stream.depth, 848, 480, rs.format.z16, 30)
-        profile = self.pipeline.start(config)
-
-        device = profile.get_device()
-        depth_sensor = device.first_depth_sensor()
-        depth_sensor.set_option(rs.option.laser_power, 360)  #  ohne try/except
-
-        #  Align auf Farbstream
-        self.align = rs.align(rs.stream.color)
+    #  pyrealsense2 wird erst gebraucht, wenn Pipeline, align oder Zeitdomänen nicht
+    #  übergeben werden; mit gefälschter Pipeline läuft alles ohne Kamera
+    #  (python -m benchmarks.bench_capture)
+    def __init__(self, threaded=False, buffer_size=3, pipeline=None, align=None, align_mode="full",
+                 projector=None, time_domains=None):
+        profile = None
+        if pipeline is None:
+            import pyrealsense2 as rs
+            #  feste Streams wie im Original
+            self.pipeline = rs.pipeline()
+            config = rs.config()
+            config.enable_stream(rs.stream.color, 1280, 720, rs.format.bgr8, 30)
+            config.enable_stream(rs.stream.depth, 848, 480, rs.format.z16, 30)
+            profile = self.pipeline.start(config)
+
+            device = profile.get_device()
+            depth_sensor = device.first_depth_sensor()
+            depth_sensor.set_option(rs.option.laser_power, 360)  #  ohne try/except
+        else:
+            #  bereits gestartete (oder gefälschte) Pipeline übernehmen
+            self.pipeline = pipeline
+
+        #  "full": rs.align auf den Farbstream (ganzes Bild);
+        #  "sparse": rohe Tiefe ausliefern, die Engine bildet nur ihre ROI über
+        #  depth_projector ab (Intrinsics/Extrinsics einmal gelesen)
+        self.align_mode = align_mode
+        self.depth_projector = None
+        if align_mode == "sparse":
+            self.align = None
+            if projector is None:
+                if profile is None:
+                    profile = self.pipeline.get_active_profile()
+                projector = DepthProjector.from_profile(profile)
+            self.depth_projector = projector
+        else:
+            if align is None:
+                import pyrealsense2 as rs
+                align = rs.align(rs.stream.color)
+            self.align = align
+        self.time_domains = host_time_domains() if time_domains is None else tuple(time_domains)
         self.started = True
 
-    def get_aligned_frames(self):
-        #  Frames holen und auf Color alignen, dann in NumPy wandeln (funktional wie Original)
+        self.threaded = threaded
+        self.ring = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        if threaded:
+            self.ring = FrameRing(buffer_size)
+            self._thread = threading.Thread(target=self._capture_loop, name="RealSenseCapture", daemon=True)
+            self._thread.start()
+
+    def _grab(self):
         frames = self.pipeline.wait_for_frames()
-        aligned_frames = self.align.process(frames)
+        received = time.monotonic()
+        wall = time.time()
+        aligned_frames = self.align.process(frames) if self.align is not None else frames
         color_frame = aligned_frames.get_color_frame()
         depth_frame = aligned_frames.get_depth_frame()
         if not color_frame or not depth_frame:
+            return None
+        timestamp_ms = float(color_frame.get_timestamp())
+        exposure = None
+        if color_frame.get_frame_timestamp_domain() in self.time_domains:
+            exposure = exposure_monotonic(timestamp_ms, wall, received)
+        return (
+            np.asanyarray(color_frame.get_data()),
+            np.asanyarray(depth_frame.get_data()),
+            int(color_frame.get_frame_number()),
+            timestamp_ms,
+            received,
+            exposure,
+        )
+
+    def _capture_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                grabbed = self._grab()
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                print(f"Capture error: {e}")
+                time.sleep(0.01)
+                continue
+            if grabbed is not None:
+                self.ring.push(*grabbed)
+
+    def latest(self, timeout=None):
+        #  nicht blockierend (ohne timeout): None, wenn seit dem letzten Aufruf kein neuer Frame kam
+        if not self.threaded:
+            grabbed = self._grab()
+            if grabbed is None:
+                return None
+            color, depth, frame_number, timestamp_ms, received, exposure = grabbed
+            return CapturedFrame(color, depth, frame_number, timestamp_ms, 0, received, exposure)
+        return self.ring.latest(timeout)
+
+    def get_aligned_frames(self):
+        #  Frames holen und auf Color alignen, dann in NumPy wandeln (funktional wie Original)
+        captured = self.latest()
+        if captured is None:
             return None, None
-        frame = np.asanyarray(color_frame.get_data())
-        depth_image = np.asanyarray(depth_frame.get_data())
-        return frame, depth_image
+        return captured.color, captured.depth
 
     def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
         if hasattr(self, 'pipeline') and self.pipeline:
-            self.pipeline.stop()
\ No newline at end of file
+            self.pipeline.stop()
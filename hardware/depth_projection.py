@@ -0,0 +1,111 @@
+from collections import namedtuple
+
+import numpy as np
+
+
+#  Lochkamera-Intrinsics eines Streams (Pixel); Verzeichnung wird ignoriert
+#  (D455: Tiefe ohne, Farbe mit sehr kleinem Brown-Conrady-Anteil)
+Intrinsics = namedtuple('Intrinsics', ['width', 'height', 'fx', 'fy', 'ppx', 'ppy'])
+
+
+def intrinsics_from_rs(rs_intrinsics):
+    i = rs_intrinsics
+    return Intrinsics(int(i.width), int(i.height), float(i.fx), float(i.fy), float(i.ppx), float(i.ppy))
+
+
+def extrinsics_from_rs(rs_extrinsics):
+    #  librealsense: rotation spaltenweise (column-major), translation in m
+    rotation = np.asarray(rs_extrinsics.rotation, dtype=np.float64).reshape(3, 3).T
+    return rotation, np.asarray(rs_extrinsics.translation, dtype=np.float64)
+
+
+class DepthProjector:
+    #  Sparse Alternative zu rs.align(color): die Tiefe bleibt im Tiefenbild, und nur
+    #  angefragte Farbpixel werden in den Tiefenraum abgebildet. Für jeden Farbpixel
+    #  wird der Strahl bei einer angenommenen Tiefe in den Tiefensensor projiziert,
+    #  dort die Tiefe gelesen und damit erneut projiziert (Fixpunkt, `iterations` mal).
+    #  Auf glatten Flächen trifft das denselben Tiefenpixel wie rs.align; an Kanten
+    #  kann es einen Pixel daneben liegen. Ergebnis sind rohe z16-Werte wie nach align.
+    def __init__(self, depth_intrinsics, color_intrinsics, depth_to_color, depth_scale=0.001, iterations=3,
+                 initial_m=2.0):
+        self.depth_intrinsics = depth_intrinsics
+        self.color_intrinsics = color_intrinsics
+        self.depth_scale = depth_scale
+        self.iterations = iterations
+        self.initial_m = initial_m
+        rotation, translation = depth_to_color
+        #  Farbe -> Tiefe (Inverse der Starrkörpertransformation)
+        self.rotation = np.asarray(rotation, dtype=np.float64).T
+        self.translation = -self.rotation @ np.asarray(translation, dtype=np.float64)
+        c = color_intrinsics
+        #  normierte Strahlen je Farbspalte/-zeile, einmal berechnet
+        self._ray_x = ((np.arange(c.width) - c.ppx) / c.fx).astype(np.float32)
+        self._ray_y = ((np.arange(c.height) - c.ppy) / c.fy).astype(np.float32)
+        self._aligned = None
+        self._filled = None
+
+    @classmethod
+    def from_profile(cls, profile, **kwargs):
+        #  aus einem gestarteten rs.pipeline_profile (Intrinsics/Extrinsics der Streams)
+        import pyrealsense2 as rs
+        depth_profile = profile.get_stream(rs.stream.depth).as_video_stream_profile()
+        color_profile = profile.get_stream(rs.stream.color).as_video_stream_profile()
+        depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+        return cls(
+            intrinsics_from_rs(depth_profile.get_intrinsics()),
+            intrinsics_from_rs(color_profile.get_intrinsics()),
+            extrinsics_from_rs(depth_profile.get_extrinsics_to(color_profile)),
+            depth_scale,
+            **kwargs,
+        )
+
+    @property
+    def color_shape(self):
+        return self.color_intrinsics.height, self.color_intrinsics.width
+
+    def _lookup(self, raw_depth, rx, ry, z):
+        #  Strahlen (rx, ry) bei Tiefe z (m, Farbkoordinaten) -> Tiefenpixel -> Rohwert
+        d = self.depth_intrinsics
+        r, t = self.rotation, self.translation
+        px = rx * z
+        py = ry * z
+        dx = r[0, 0] * px + r[0, 1] * py + r[0, 2] * z + t[0]
+        dy = r[1, 0] * px + r[1, 1] * py + r[1, 2] * z + t[1]
+        dz = r[2, 0] * px + r[2, 1] * py + r[2, 2] * z + t[2]
+        dz = np.maximum(dz, 1e-6)
+        u = np.rint(dx / dz * d.fx + d.ppx).astype(np.int32)
+        v = np.rint(dy / dz * d.fy + d.ppy).astype(np.int32)
+        inside = (u >= 0) & (u < d.width) & (v >= 0) & (v < d.height)
+        values = raw_depth[np.clip(v, 0, d.height - 1), np.clip(u, 0, d.width - 1)]
+        return np.where(inside, values, 0)
+
+    def map_pixels(self, raw_depth, xs, ys):
+        #  Rohwerte (z16) an den Farbpixeln (xs, ys); 0 ohne gültige Tiefe
+        return self._converge(raw_depth, self._ray_x[xs], self._ray_y[ys])
+
+    def _converge(self, raw_depth, rx, ry):
+        rx, ry = np.broadcast_arrays(rx, ry)
+        z = np.full(rx.shape, self.initial_m, dtype=np.float32)
+        values = np.zeros(rx.shape, dtype=raw_depth.dtype)
+        for _ in range(self.iterations):
+            found = self._lookup(raw_depth, rx, ry, z)
+            #  Treffer auf ein Loch: letzten gültigen Wert und Annahme behalten
+            valid = found > 0
+            values = np.where(valid, found, values)
+            z = np.where(valid, found * np.float32(self.depth_scale), z)
+        return values
+
+    def align_region(self, raw_depth, rect):
+        #  Tiefenbild in Farbauflösung, gefüllt nur innerhalb von rect (x1, y1, x2, y2);
+        #  der Puffer wird wiederverwendet, außerhalb von rect steht 0
+        if self._aligned is None:
+            self._aligned = np.zeros(self.color_shape, dtype=raw_depth.dtype)
+        x1, y1, x2, y2 = (int(v) for v in rect)
+        if self._filled is not None and self._filled != (x1, y1, x2, y2):
+            fx1, fy1, fx2, fy2 = self._filled
+            self._aligned[fy1:fy2, fx1:fx2] = 0
+        if x2 > x1 and y2 > y1:
+            values = self._converge(raw_depth, self._ray_x[None, x1:x2], self._ray_y[y1:y2, None])
+            self._aligned[y1:y2, x1:x2] = values
+        self._filled = (x1, y1, x2, y2)
+        return self._aligned
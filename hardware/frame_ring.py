@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+#  Ein Eintrag aus dem Ringpuffer: Frames + Metadaten des Sensors.
+#  received: time.monotonic() beim Eintreffen auf dem Host,
+#  exposure: Belichtungszeitpunkt in derselben Uhr (None, wenn unbekannt)
+CapturedFrame = namedtuple(
+    'CapturedFrame',
+    ['color', 'depth', 'frame_number', 'timestamp_ms', 'dropped', 'received', 'exposure'],
+    defaults=(None, None),
+)
+
+
+def capture_time(captured):
+    #  Aufnahmezeitpunkt für Filter und Vorhaltezeit: Belichtung, sonst Eintreffen
+    return captured.exposure if captured.exposure is not None else captured.received
+
+
+def exposure_monotonic(timestamp_ms, wall_now, monotonic_now):
+    #  Sensorzeitstempel in Host-Wanduhr-ms (RealSense global/system time) auf
+    #  time.monotonic() umrechnen, damit er mit den übrigen Zeitpunkten vergleichbar ist
+    return monotonic_now - (wall_now - timestamp_ms / 1000.0)
+
+
+class FrameRing:
+    #  Fester Ringpuffer mit vorallokierten Slots. Der Writer überschreibt immer den
+    #  ältesten Slot, der weder der zuletzt veröffentlichte noch der vom Reader
+    #  gehaltene ist, daher bleiben Views aus latest() bis zum nächsten Aufruf gültig.
+    def __init__(self, size=3):
+        if size < 3:
+            raise ValueError("FrameRing needs at least 3 slots")
+        self.size = size
+        self._color = None
+        self._depth = None
+        self._frame_numbers = np.full(size, -1, dtype=np.int64)
+        self._timestamps = np.zeros(size, dtype=np.float64)
+        self._received = np.zeros(size, dtype=np.float64)
+        self._exposure = np.full(size, np.nan, dtype=np.float64)
+        self._cond = threading.Condition()
+        self._latest = -1
+        self._reading = -1
+        self._write_idx = 0
+        self._seq = 0
+        self._read_seq = 0
+        self._last_hw_number = None
+        self.dropped = 0
+
+    def _allocate(self, color, depth):
+        self._color = np.empty((self.size,) + color.shape, dtype=color.dtype)
+        self._depth = np.empty((self.size,) + depth.shape, dtype=depth.dtype)
+
+    def _next_slot(self):
+        for _ in range(self.size):
+            idx = self._write_idx
+            self._write_idx = (self._write_idx + 1) % self.size
+            if idx != self._latest and idx != self._reading:
+                return idx
+        raise RuntimeError("FrameRing has no free slot")
+
+    def push(self, color, depth, frame_number, timestamp_ms, received=None, exposure=None):
+        if self._color is None or self._color.shape[1:] != color.shape or self._depth.shape[1:] != depth.shape:
+            with self._cond:
+                self._allocate(color, depth)
+                self._latest = -1
+                self._reading = -1
+        with self._cond:
+            idx = self._next_slot()
+        #  Kopie außerhalb des Locks, der Slot ist für den Reader unsichtbar
+        np.copyto(self._color[idx], color)
+        np.copyto(self._depth[idx], depth)
+        self._frame_numbers[idx] = frame_number
+        self._timestamps[idx] = timestamp_ms
+        self._received[idx] = time.monotonic() if received is None else received
+        self._exposure[idx] = np.nan if exposure is None else exposure
+        with self._cond:
+            #  nie abgeholte Frames und Lücken in der Sensor-Framenummer zählen als verworfen
+            if self._latest >= 0 and self._seq > self._read_seq:
+                self.dropped += 1
+            if self._last_hw_number is not None and frame_number > self._last_hw_number + 1:
+                self.dropped += int(frame_number - self._last_hw_number - 1)
+            self._last_hw_number = frame_number
+            self._latest = idx
+            self._seq += 1
+            self._cond.notify_all()
+
+    def latest(self, timeout=None):
+        with self._cond:
+            if self._seq == self._read_seq and timeout:
+                self._cond.wait_for(lambda: self._seq != self._read_seq, timeout)
+            if self._latest < 0 or self._seq == self._read_seq:
+                return None
+            idx = self._latest
+            self._reading = idx
+            self._read_seq = self._seq
+            return CapturedFrame(
+                self._color[idx],
+                self._depth[idx],
+                int(self._frame_numbers[idx]),
+                float(self._timestamps[idx]),
+                self.dropped,
+                float(self._received[idx]),
+                None if np.isnan(self._exposure[idx]) else float(self._exposure[idx]),
+            )
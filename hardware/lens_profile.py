@@ -0,0 +1,119 @@
+from functools import lru_cache
+
+import numpy as np
+
+from utils.config import MOTOR_LUT, ST_CAM_OFFSET, LIGHTING_OPTIONS, TRUE_DISTANCES_M
+from vision.depth_processor import DEPTH_LUT_SIZE, DepthCorrector, get_lighting_lut
+
+
+def non_monotonic_entries(values):
+    #  Indizes i mit values[i + 1] <= values[i]
+    values = np.asarray(values, dtype=np.float64)
+    return [int(i) for i in np.flatnonzero(np.diff(values) <= 0)]
+
+
+def validate_motor_lut(motor_lut):
+    if len(motor_lut) < 2:
+        raise ValueError("MOTOR_LUT needs at least two entries")
+    steps = [s for s, _ in motor_lut]
+    distances = [d for _, d in motor_lut]
+    problems = []
+    for i in non_monotonic_entries(steps):
+        problems.append(f"steps not increasing at {i}: {motor_lut[i]} -> {motor_lut[i + 1]}")
+    for i in non_monotonic_entries(distances):
+        problems.append(f"distance not increasing at {i}: {motor_lut[i]} -> {motor_lut[i + 1]}")
+    if problems:
+        raise ValueError("Invalid MOTOR_LUT: " + "; ".join(problems))
+
+
+def lighting_lut_problems(lighting_condition):
+    problems = []
+    if len(lighting_condition) != len(TRUE_DISTANCES_M):
+        problems.append(f"{len(lighting_condition)} entries, TRUE_DISTANCES_M has {len(TRUE_DISTANCES_M)}")
+    for i in non_monotonic_entries(lighting_condition):
+        problems.append(f"measured value not increasing at {i}: {lighting_condition[i]} -> {lighting_condition[i + 1]}")
+    return problems
+
+
+def _interp_truncated(x, xp, fp):
+    #  wie die frühere Bisect-Suche über MOTOR_LUT, vektorisiert: bisect_left,
+    #  Randwerte klemmen, linear interpolieren, int() schneidet ab
+    x = np.asarray(x, dtype=np.float64)
+    pos = np.searchsorted(xp, x, side='left')
+    inner = np.clip(pos, 1, len(xp) - 1)
+    prev_x, next_x = xp[inner - 1], xp[inner]
+    prev_f, next_f = fp[inner - 1], fp[inner]
+    alpha = (x - prev_x) / (next_x - prev_x)
+    value = prev_f + alpha * (next_f - prev_f)
+    value = np.where(pos == 0, fp[0], np.where(pos == len(xp), fp[-1], value))
+    return value
+
+
+class LensProfile:
+    #  Vorberechnete Tabellen für eine Linse (MOTOR_LUT) und eine Lichtbedingung:
+    #    rohe z16-mm -> korrigierte Fokusdistanz (m, inkl. ST_CAM_OFFSET) -> Motorschritte
+    #    Motorschritte -> Lage der Fokusebene (m)
+    def __init__(self, lighting_condition, motor_lut=MOTOR_LUT, cam_offset=ST_CAM_OFFSET, strict=False):
+        validate_motor_lut(motor_lut)
+        self.problems = lighting_lut_problems(lighting_condition)
+        if self.problems:
+            if strict:
+                raise ValueError("Invalid lighting LUT: " + "; ".join(self.problems))
+            for problem in self.problems:
+                print(f"Warning: lighting LUT {problem}")
+
+        self.cam_offset = cam_offset
+        self.lut_steps = np.array([s for s, _ in motor_lut], dtype=np.float64)
+        self.lut_distances = np.array([d for _, d in motor_lut], dtype=np.float64)
+        self.min_step = int(self.lut_steps[0])
+        self.max_step = int(self.lut_steps[-1])
+
+        self.corrector = DepthCorrector(lighting_condition)
+        #  rohe mm -> Fokusdistanz in m
+        self.focus_m_table = self.corrector.lut / 1000.0 + cam_offset
+        #  rohe mm -> Schritte (abgeschnitten wie steps_for_distance)
+        steps = _interp_truncated(self.focus_m_table, self.lut_distances, self.lut_steps)
+        self.steps_table = steps.astype(np.int32)
+        #  Schritte -> Fokusebene, Index = Schritt - min_step
+        plane = _interp_truncated(np.arange(self.min_step, self.max_step + 1), self.lut_steps, self.lut_distances)
+        self.plane_table = plane.astype(np.float64)
+
+    #  Skalare O(1)-Pfade
+    def steps_for_depth_mm(self, depth_mm):
+        return int(self.steps_table[min(DEPTH_LUT_SIZE - 1, max(0, int(round(depth_mm))))])
+
+    def focus_m_for_depth_mm(self, depth_mm):
+        return float(self.focus_m_table[min(DEPTH_LUT_SIZE - 1, max(0, int(round(depth_mm))))])
+
+    def focus_plane_m(self, steps):
+        index = min(self.max_step, max(self.min_step, int(steps))) - self.min_step
+        return float(self.plane_table[index])
+
+    def steps_for_distance(self, distance_m):
+        #  bereits korrigierte Distanz inkl. Offset, z.B. aus dem GUI
+        return int(_interp_truncated(distance_m, self.lut_distances, self.lut_steps))
+
+    #  Vektorisierte Batch-Pfade
+    def steps_for_depth(self, depth_mm):
+        return np.take(self.steps_table, depth_mm)
+
+    def focus_m_for_depth(self, depth_mm):
+        return np.take(self.focus_m_table, depth_mm)
+
+    def focus_plane_for_steps(self, steps):
+        index = np.clip(np.asarray(steps, dtype=np.int64), self.min_step, self.max_step) - self.min_step
+        return np.take(self.plane_table, index)
+
+
+@lru_cache(maxsize=None)
+def get_lens_profile(lichtbedingung):
+    return LensProfile(get_lighting_lut(lichtbedingung))
+
+
+if __name__ == '__main__':
+    #  Tabellen prüfen: python -m hardware.lens_profile
+    validate_motor_lut(MOTOR_LUT)
+    print(f"MOTOR_LUT ok ({len(MOTOR_LUT)} entries, steps {MOTOR_LUT[0][0]}..{MOTOR_LUT[-1][0]})")
+    for option in LIGHTING_OPTIONS:
+        problems = lighting_lut_problems(get_lighting_lut(option))
+        print(f"{option}: {'ok' if not problems else '; '.join(problems)}")
@@ -1,88 +1,200 @@
-import bisect
 import time
 import multiprocessing as mp
 
-from utils.config import MOTOR_LUT
-
-
-def _distance_to_steps(distance_m: float) -> int:
-    steps = [x[0] for x in MOTOR_LUT]
-    distances = [x[1] for x in MOTOR_LUT]
-    pos = bisect.bisect_left(distances, distance_m)
-    if pos == 0:
-        return steps[0]
-    elif pos == len(distances):
-        return steps[-1]
-    else:
-        prev_step, prev_dist = MOTOR_LUT[pos - 1]
-        next_step, next_dist = MOTOR_LUT[pos]
-        alpha = (distance_m - prev_dist) / (next_dist - prev_dist)
-        return int(prev_step + alpha * (next_step - prev_step))
-
-
-def _focus_plane_pos(curr_step: int) -> float:
-    steps = [x[0] for x in MOTOR_LUT]
-    distances = [x[1] for x in MOTOR_LUT]
-    pos = bisect.bisect_left(steps, curr_step)
-    if pos == 0:
-        return distances[0]
-    elif pos == len(steps):
-        return distances[-1]
-    else:
-        prev_step, prev_dist = MOTOR_LUT[pos - 1]
-        next_step, next_dist = MOTOR_LUT[pos]
-        alpha = (curr_step - prev_step) / (next_step - prev_step)
-        return prev_dist + alpha * (next_dist - prev_dist)
-
-
-def _motor_worker(queue, stop_event, current_motor_steps, default_focus_time):
-    #  immer echte Hardware verwenden, kein Fallback
+from utils.config import MOTOR_MAX_SPEED, MOTOR_ACCELERATION
+from utils.metrics import Metrics
+
+
+class MotionPlanner:
+    #  Beschleunigungsbegrenztes Trapezprofil in Schritten (steps/s, steps/s^2).
+    #  next_step() liefert jeweils Richtung (+1/-1) und Abstand bis zum nächsten
+    #  Schritt. Ein neues Ziel während der Fahrt übernimmt die aktuelle
+    #  Geschwindigkeit: es wird weiter beschleunigt, gebremst oder über das Ziel
+    #  hinaus abgebremst und dann umgekehrt, ohne Neustart aus dem Stand.
+    #  Zwischen zwei Schritten ändert sich v^2 höchstens um 2a. Vor einer Umkehr
+    #  und beim Anhalten bremst der Planer auf 0: next_step() liefert dann eine
+    #  Pause (Richtung 0), lang genug, dass auch der Sprung langsamste Geschwindigkeit
+    #  -> Stillstand -> Gegenrichtung die Beschleunigung a einhält.
+    def __init__(self, max_speed=MOTOR_MAX_SPEED, acceleration=MOTOR_ACCELERATION, position=0):
+        self.max_speed = float(max_speed)
+        self.acceleration = float(acceleration)
+        self.position = int(position)
+        self.target = int(position)
+        self.velocity = 0.0
+        self.cruise_speed = self.max_speed
+
+    def cruise_for(self, distance, focus_time):
+        #  Reisegeschwindigkeit, mit der ein Trapez über distance Schritte etwa focus_time dauert
+        if not focus_time or focus_time <= 0 or distance <= 0:
+            return self.max_speed
+        a, t = self.acceleration, float(focus_time)
+        disc = (a * t) ** 2 - 4.0 * a * distance
+        if disc < 0:
+            return self.max_speed
+        return max(1.0, min(self.max_speed, (a * t - disc ** 0.5) / 2.0))
+
+    def set_target(self, target, focus_time=0.0):
+        self.target = int(target)
+        self.cruise_speed = self.cruise_for(abs(self.target - self.position), focus_time)
+
+    def done(self):
+        return self.position == self.target and self.velocity == 0.0
+
+    def next_step(self):
+        remaining_signed = self.target - self.position
+        floor = min(self.cruise_speed, (2.0 * self.acceleration) ** 0.5)
+        speed = abs(self.velocity)
+        if remaining_signed == 0 and speed <= floor:
+            if speed == 0.0:
+                return None
+            return self._stop(speed, floor)
+        if self.velocity != 0.0:
+            direction = 1 if self.velocity > 0 else -1
+        else:
+            direction = 1 if remaining_signed > 0 else -1
+        remaining = remaining_signed * direction
+        two_a = 2.0 * self.acceleration
+
+        if remaining <= 0 or speed * speed / two_a >= remaining:
+            #  bremsen (auch über das Ziel hinaus, falls es zurückgesprungen ist)
+            slowed = speed * speed - two_a
+            if remaining <= 0 and slowed <= floor * floor:
+                #  über das Ziel hinaus und langsam genug: anhalten, dann aus dem Stand zurück
+                return self._stop(speed, floor)
+            else:
+                speed = max(slowed, floor * floor) ** 0.5
+        elif speed < self.cruise_speed:
+            speed = min(self.cruise_speed, (speed * speed + two_a) ** 0.5)
+        else:
+            speed = max(self.cruise_speed, max(speed * speed - two_a, floor * floor) ** 0.5)
+
+        speed = max(speed, floor)
+        self.velocity = direction * speed
+        self.position += direction
+        return direction, 1.0 / speed
+
+    def _stop(self, speed, floor):
+        #  Pause nach dem letzten Schritt mit speed: der Abschnitt davor (1/speed) und die
+        #  Pause zusammen sind lang genug, um mit a von speed auf 0 zu bremsen, und die
+        #  Pause ebenso für den nächsten Anlauf auf floor (Abschnittsmitten-Abstand)
+        self.velocity = 0.0
+        pause = max(2.0 * speed / self.acceleration - 1.0 / speed, 2.0 * floor / self.acceleration - 1.0 / floor)
+        return 0, pause
+
+
+def planned_move_duration(steps, focus_time=0.0, max_speed=MOTOR_MAX_SPEED, acceleration=MOTOR_ACCELERATION):
+    #  Dauer eines Trapezzugs über |steps| aus dem Stand (für die Vorhaltezeit der Fokusvorhersage)
+    distance = abs(int(steps))
+    if distance == 0:
+        return 0.0
+    speed = MotionPlanner(max_speed, acceleration).cruise_for(distance, focus_time)
+    if distance >= speed * speed / acceleration:
+        return distance / speed + speed / acceleration
+    return 2.0 * (distance / acceleration) ** 0.5
+
+
+def _sleep_until(deadline, spin=0.0002):
+    #  grob schlafen, die letzten Bruchteile einer Millisekunde aktiv warten
+    remaining = deadline - time.monotonic()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    while time.monotonic() < deadline:
+        pass
+
+
+def _adafruit_kit():
     from adafruit_motorkit import MotorKit
     from adafruit_motor import stepper
-    import time
+    return MotorKit(), stepper
+
 
-    kit = MotorKit()
-    max_speed_delay = 0.001
+def _motor_worker(queue, stop_event, current_motor_steps, default_focus_time, kit_factory=None, metrics_queue=None,
+                  trace_queue=None, ready_event=None):
+    #  immer echte Hardware verwenden, kein Fallback; kit_factory nur zum Testen
+    #  (muss (kit, stepper-Konstanten) liefern, z.B. ein MotorKit-Fake)
+    kit, stepper = (kit_factory or _adafruit_kit)()
+    if ready_event is not None:
+        ready_event.set()
     homing_speed_delay = 0.01
+    #  eigene Metriken, einmal pro Sekunde als Snapshot an den Hauptprozess
+    metrics = Metrics()
+    next_report = time.monotonic() + 1.0
+
+    with current_motor_steps.get_lock():
+        planner = MotionPlanner(position=current_motor_steps.value)
+    deadline = None
+    #  Latenz-Trace der laufenden Bewegung (Zeitpunkte in time.monotonic())
+    trace = None
+
+    def finish_trace(superseded):
+        if trace_queue is None or trace is None:
+            return
+        trace["superseded"] = superseded
+        try:
+            trace_queue.put_nowait(trace)
+        except Exception:
+            metrics.count("motor.traces_dropped")
 
     try:
         while not stop_event.is_set():
-            target_steps = None
-            focustime = default_focus_time
             while not queue.empty():
                 item = queue.get_nowait()
+                trace_id = None
                 if isinstance(item, tuple):
-                    target_steps, focustime = item
+                    target_steps, focustime = item[:2]
+                    if len(item) > 2:
+                        trace_id = item[2]
                 else:
-                    target_steps = item
-                    focustime = default_focus_time
+                    target_steps, focustime = item, default_focus_time
+                metrics.count("motor.retargets" if not planner.done() else "motor.moves")
+                planner.set_target(target_steps, focustime)
+                if trace_id is not None:
+                    #  eine noch laufende Bewegung wurde umgeplant
+                    finish_trace(superseded=True)
+                    trace = {"trace_id": trace_id, "dequeued": time.monotonic(),
+                             "first_step": None, "last_step": None, "steps": 0}
 
-            if target_steps is None:
+            if metrics_queue is not None and time.monotonic() >= next_report:
+                next_report = time.monotonic() + 1.0
+                try:
+                    metrics_queue.put_nowait(metrics.snapshot())
+                except Exception:
+                    metrics.count("motor.metrics_dropped")
+
+            step = planner.next_step()
+            if step is None:
+                if trace is not None:
+                    finish_trace(superseded=False)
+                    trace = None
+                deadline = None
                 time.sleep(0.01)
                 continue
 
-            with current_motor_steps.get_lock():
-                steps_diff = target_steps - current_motor_steps.value
-            if steps_diff == 0:
+            direction, interval = step
+            now = time.monotonic()
+            #  nach Leerlauf oder wenn wir mehr als einen Schritt hinterher sind: neu aufsetzen
+            if deadline is None or deadline < now - interval:
+                deadline = now
+            _sleep_until(deadline)
+            if direction == 0:
+                #  Stillstand vor Umkehr oder Halt: nur warten
+                deadline += interval
                 continue
-
-            direction = stepper.FORWARD if steps_diff > 0 else stepper.BACKWARD
-            steps_remaining = abs(steps_diff)
-            if focustime and steps_remaining > 0:
-                delay = max(focustime / steps_remaining, max_speed_delay)
-            else:
-                delay = max_speed_delay
-
-            for _ in range(steps_remaining):
-                if stop_event.is_set() or not queue.empty():
-                    break
-                kit.stepper1.onestep(direction=direction, style=stepper.INTERLEAVE)
-                with current_motor_steps.get_lock():
-                    if direction == stepper.FORWARD:
-                        current_motor_steps.value += 1
-                    else:
-                        current_motor_steps.value -= 1
-                time.sleep(delay)
+            #  Verspätung gegenüber der Deadline und Dauer des I2C-Schritts
+            with metrics.span("motor.onestep"):
+                metrics.observe("motor.step_late", (time.monotonic() - deadline) * 1000.0)
+                kit.stepper1.onestep(direction=stepper.FORWARD if direction > 0 else stepper.BACKWARD,
+                                     style=stepper.INTERLEAVE)
+            metrics.count("motor.steps")
+            if trace is not None:
+                stepped = time.monotonic()
+                if trace["first_step"] is None:
+                    trace["first_step"] = stepped
+                trace["last_step"] = stepped
+                trace["steps"] += 1
+            with current_motor_steps.get_lock():
+                current_motor_steps.value += direction
+            deadline += interval
 
     finally:
         #  immer Homing und Release
@@ -90,38 +202,85 @@ def _motor_worker(queue, stop_event, current_motor_steps, default_focus_time):
             home_steps = -current_motor_steps.value
         if home_steps != 0:
             home_dir = stepper.FORWARD if home_steps > 0 else stepper.BACKWARD
+            deadline = time.monotonic()
             for _ in range(abs(home_steps)):
+                _sleep_until(deadline)
                 kit.stepper1.onestep(direction=home_dir, style=stepper.INTERLEAVE)
                 with current_motor_steps.get_lock():
                     if home_dir == stepper.FORWARD:
                         current_motor_steps.value += 1
                     else:
                         current_motor_steps.value -= 1
-                time.sleep(homing_speed_delay)
+                deadline += homing_speed_delay
         try:
             kit.stepper1.release()
         except Exception:
             pass
+        if metrics_queue is not None:
+            try:
+                metrics_queue.put_nowait(metrics.snapshot())
+            except Exception:
+                pass
+
+
+#  Der Motorprozess startet oft, während andere Threads laufen (StartupLoader lädt
+#  Modelle, Kamera-Thread). fork kopiert deren gerade gehaltene Locks in das Kind,
+#  das sich daran aufhängen kann; spawn startet einen frischen Interpreter.
+_MP_CONTEXT = mp.get_context("spawn")
 
 
 class MotorController:
-    def __init__(self, initial_focus_time=0.0):
-        #  kein get_context/daemon
-        self.queue = mp.Queue()
-        self.stop_event = mp.Event()
-        self.current_motor_steps = mp.Value('i', 0)
-        self.process = mp.Process(
+    def __init__(self, initial_focus_time=0.0, kit_factory=None):
+        #  kit_factory muss für spawn picklebar sein (Funktion oder Methode auf Modulebene)
+        ctx = _MP_CONTEXT
+        self.queue = ctx.Queue()
+        self.metrics_queue = ctx.Queue(maxsize=4)
+        self.trace_queue = ctx.Queue(maxsize=256)
+        self.stop_event = ctx.Event()
+        self.ready_event = ctx.Event()
+        self.current_motor_steps = ctx.Value('i', 0)
+        self.process = ctx.Process(
             target=_motor_worker,
-            args=(self.queue, self.stop_event, self.current_motor_steps, initial_focus_time)
+            args=(self.queue, self.stop_event, self.current_motor_steps, initial_focus_time, kit_factory,
+                  self.metrics_queue, self.trace_queue, self.ready_event)
         )
         self.process.start()
 
-    def move_to(self, steps: int, focus_time: float = 0.001):
+    def wait_ready(self, timeout=5.0):
+        #  spawn braucht einen Moment, bis der Motorprozess Befehle abholt (Interpreter,
+        #  Importe, MotorKit); Befehle davor warten in der Queue. Liefert self.
+        if not self.ready_event.wait(timeout):
+            print(f"Motor process not ready after {timeout:.1f} s")
+        return self
+
+    def move_to(self, steps: int, focus_time: float = 0.001, trace_id=None):
         try:
-            self.queue.put((int(steps), float(focus_time)))
+            if trace_id is None:
+                self.queue.put((int(steps), float(focus_time)))
+            else:
+                self.queue.put((int(steps), float(focus_time), int(trace_id)))
         except Exception as e:
             print(f"Failed to enqueue motor move: {e}")
 
+    def poll_traces(self, tracer):
+        #  abgeschlossene Bewegungen aus dem Motorprozess an den LatencyTracer geben
+        try:
+            while not self.trace_queue.empty():
+                tracer.motor_event(self.trace_queue.get_nowait())
+        except Exception:
+            pass
+
+    def poll_metrics(self, metrics):
+        #  neuesten Snapshot des Motorprozesses übernehmen (nicht blockierend)
+        latest = None
+        try:
+            while not self.metrics_queue.empty():
+                latest = self.metrics_queue.get_nowait()
+        except Exception:
+            pass
+        if latest is not None:
+            metrics.absorb("motor", latest)
+
     @property
     def current_steps(self) -> int:
         try:
@@ -130,14 +289,6 @@ class MotorController:
         except Exception:
             return 0
 
-    @staticmethod
-    def distance_to_steps(distance_m: float) -> int:
-        return _distance_to_steps(distance_m)
-
-    @staticmethod
-    def focus_plane_pos(curr_step: int) -> float:
-        return _focus_plane_pos(curr_step)
-
     def stop(self):
         try:
             self.stop_event.set()
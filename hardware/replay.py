@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from hardware.frame_ring import CapturedFrame
+
+
+#  Aufnahmeformat: ein Verzeichnis mit session.json und pro Chunk drei .npy-Dateien
+#  (color, depth, meta). Die .npy-Dateien werden beim Abspielen nur gemappt.
+SESSION_FILE = "session.json"
+SESSION_VERSION = 1
+META_DTYPE = np.dtype([('frame_number', '<i8'), ('timestamp_ms', '<f8')])
+
+REPLAY_MODES = ("realtime", "fast", "step")
+
+
+def _chunk_path(path, chunk, kind):
+    return os.path.join(path, f"chunk_{chunk:05d}_{kind}.npy")
+
+
+def _truncate_npy(filename, rows):
+    #  erste Achse einer .npy-Datei auf rows kürzen, ohne die Daten zu kopieren: neuer
+    #  Header (numpy lässt dafür Platz) und Datei abschneiden; passt der Header nicht
+    #  mehr an dieselbe Stelle, wird umkopiert
+    fmt = np.lib.format
+    with open(filename, "r+b") as f:
+        version = fmt.read_magic(f)
+        if version == (1, 0):
+            read_header, write_header = fmt.read_array_header_1_0, fmt.write_array_header_1_0
+        else:
+            read_header, write_header = fmt.read_array_header_2_0, fmt.write_array_header_2_0
+        shape, fortran, dtype = read_header(f)
+        offset = f.tell()
+        header = {"descr": fmt.dtype_to_descr(dtype), "fortran_order": fortran, "shape": (rows,) + shape[1:]}
+        f.seek(0)
+        write_header(f, header)
+        if f.tell() == offset:
+            f.truncate(offset + rows * int(np.prod(shape[1:], dtype=np.int64)) * dtype.itemsize)
+            return
+        #  Header hat sich verschoben: alten Header zurückschreiben, dann umkopieren
+        f.seek(0)
+        write_header(f, dict(header, shape=shape))
+    data = np.load(filename, mmap_mode='r')[:rows]
+    np.save(filename + ".tmp.npy", data)
+    del data
+    os.replace(filename + ".tmp.npy", filename)
+
+
+class SessionRecorder:
+    #  session.json wird bei jedem Chunkwechsel neu geschrieben und nennt nur fertige
+    #  Chunks: bricht die Aufnahme ab, bleibt alles bis zum letzten Chunkwechsel
+    #  abspielbar. close() kürzt den letzten Chunk auf die geschriebenen Frames.
+    def __init__(self, path, chunk_frames=150):
+        self.path = path
+        self.chunk_frames = int(chunk_frames)
+        os.makedirs(path, exist_ok=True)
+        self.frames = 0
+        self._chunk = -1
+        self._color = None
+        self._depth = None
+        self._meta = None
+        self._color_spec = None
+        self._depth_spec = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open_chunk(self, color, depth):
+        self._flush()
+        self._write_info(self._chunk + 1)
+        self._chunk += 1
+        n = self.chunk_frames
+        self._color = np.lib.format.open_memmap(
+            _chunk_path(self.path, self._chunk, "color"), mode='w+', dtype=color.dtype, shape=(n,) + color.shape)
+        self._depth = np.lib.format.open_memmap(
+            _chunk_path(self.path, self._chunk, "depth"), mode='w+', dtype=depth.dtype, shape=(n,) + depth.shape)
+        self._meta = np.lib.format.open_memmap(
+            _chunk_path(self.path, self._chunk, "meta"), mode='w+', dtype=META_DTYPE, shape=(n,))
+
+    def write(self, color, depth, frame_number=None, timestamp_ms=None):
+        if self._color_spec is None:
+            self._color_spec = (color.shape, color.dtype)
+            self._depth_spec = (depth.shape, depth.dtype)
+        elif (color.shape, color.dtype) != self._color_spec or (depth.shape, depth.dtype) != self._depth_spec:
+            raise ValueError("Frame shape changed during recording")
+        slot = self.frames % self.chunk_frames
+        if slot == 0:
+            self._open_chunk(color, depth)
+        self._color[slot] = color
+        self._depth[slot] = depth
+        self._meta[slot] = (
+            self.frames if frame_number is None else int(frame_number),
+            time.time() * 1000.0 if timestamp_ms is None else float(timestamp_ms),
+        )
+        self.frames += 1
+
+    def _flush(self):
+        for arr in (self._color, self._depth, self._meta):
+            if arr is not None:
+                arr.flush()
+
+    def close(self):
+        self._flush()
+        self._color = self._depth = self._meta = None
+        if self._color_spec is None:
+            return
+        filled = self.frames - self._chunk * self.chunk_frames
+        if filled < self.chunk_frames:
+            for kind in ("color", "depth", "meta"):
+                _truncate_npy(_chunk_path(self.path, self._chunk, kind), filled)
+        self._write_info(self._chunk + 1)
+
+    def _write_info(self, chunks):
+        #  erst in eine temporäre Datei, dann ersetzen: session.json ist nie halb geschrieben
+        info = {
+            "version": SESSION_VERSION,
+            "frames": min(self.frames, chunks * self.chunk_frames),
+            "chunk_frames": self.chunk_frames,
+            "chunks": chunks,
+            "color_shape": list(self._color_spec[0]),
+            "color_dtype": np.dtype(self._color_spec[1]).str,
+            "depth_shape": list(self._depth_spec[0]),
+            "depth_dtype": np.dtype(self._depth_spec[1]).str,
+        }
+        filename = os.path.join(self.path, SESSION_FILE)
+        with open(filename + ".tmp", "w") as f:
+            json.dump(info, f, indent=2)
+        os.replace(filename + ".tmp", filename)
+
+
+class ReplayCamera:
+    #  Gleiche Schnittstelle wie RealSenseCamera (get_aligned_frames/latest/stop).
+    #  Frames sind Views auf copy-on-write Memmaps: Lesen ohne Kopie, Overlays
+    #  landen nie in der Aufnahme.
+    def __init__(self, path, mode="realtime", loop=False, clock=time.monotonic):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        with open(os.path.join(path, SESSION_FILE)) as f:
+            self.info = json.load(f)
+        if self.info.get("version") != SESSION_VERSION:
+            raise ValueError(f"Unsupported session version: {self.info.get('version')}")
+        self.path = path
+        self.mode = mode
+        self.loop = loop
+        self.clock = clock
+        self.chunk_frames = self.info["chunk_frames"]
+        self.frame_count = self.info["frames"]
+        self._color = []
+        self._depth = []
+        metas = []
+        for chunk in range(self.info["chunks"]):
+            self._color.append(np.load(_chunk_path(path, chunk, "color"), mmap_mode='c'))
+            self._depth.append(np.load(_chunk_path(path, chunk, "depth"), mmap_mode='c'))
+            metas.append(np.load(_chunk_path(path, chunk, "meta"), mmap_mode='r'))
+        #  Metadaten sind klein, daher einmal zusammenhängend in den Speicher
+        meta = np.concatenate(metas)[:self.frame_count] if metas else np.empty(0, dtype=META_DTYPE)
+        self.frame_numbers = np.array(meta['frame_number'])
+        self.timestamps_ms = np.array(meta['timestamp_ms'])
+        self.interval = float(np.median(np.diff(self.timestamps_ms))) / 1000.0 if self.frame_count > 1 else 1 / 30
+        self.position = 0
+        self._delivered = -1
+        self._start_time = None
+        #  virtuelle Zeitachse für exposure: _origin + Abstand zum ersten Zeitstempel
+        self._origin = None
+        self._last_exposure = None
+        self.finished = self.frame_count == 0
+        self.started = True
+
+    def __len__(self):
+        return self.frame_count
+
+    def frame(self, index):
+        chunk, slot = divmod(index, self.chunk_frames)
+        return CapturedFrame(
+            self._color[chunk][slot],
+            self._depth[chunk][slot],
+            int(self.frame_numbers[index]),
+            float(self.timestamps_ms[index]),
+            0,
+            self.clock(),
+            self._exposure(index),
+        )
+
+    def _exposure(self, index):
+        #  Belichtung mit den Abständen der Aufnahme, egal wie schnell abgespielt wird
+        #  (fast/step): Zielfilter und Vorhaltezeit sehen dieselben dt wie bei realtime.
+        #  Springt sie zurück (loop, seek), geht es einen Frameabstand nach dem letzten weiter.
+        offset = (self.timestamps_ms[index] - self.timestamps_ms[0]) / 1000.0
+        if self._origin is None:
+            self._origin = self.clock() - offset
+        elif self._origin + offset <= self._last_exposure:
+            self._origin = self._last_exposure + self.interval - offset
+        self._last_exposure = float(self._origin + offset)
+        return self._last_exposure
+
+    def now(self):
+        #  Uhr der Wiedergabe für FocusEngine(clock=...): Belichtung des zuletzt
+        #  gelieferten Frames, davor die echte Uhr
+        return self._last_exposure if self._last_exposure is not None else self.clock()
+
+    def step(self, count=1):
+        #  nur im Modus "step": nächsten Frame freigeben
+        self.position = min(self.position + count, self.frame_count)
+        if self.position >= self.frame_count:
+            self._wrap_or_finish()
+
+    def seek(self, index):
+        self.position = max(0, min(int(index), self.frame_count - 1))
+        self._delivered = -1
+        self._start_time = None
+
+    def _wrap_or_finish(self):
+        if self.loop and self.frame_count:
+            self.position = 0
+            self._delivered = -1
+            self._start_time = None
+        else:
+            self.finished = True
+
+    def _realtime_index(self):
+        now = self.clock()
+        if self._start_time is None:
+            self._start_time = now - (self.timestamps_ms[self.position] - self.timestamps_ms[0]) / 1000.0
+        elapsed_ms = (now - self._start_time) * 1000.0 + self.timestamps_ms[0]
+        index = int(np.searchsorted(self.timestamps_ms, elapsed_ms, side='right')) - 1
+        if index >= self.frame_count - 1 and self._delivered == self.frame_count - 1:
+            self._wrap_or_finish()
+            return None
+        return max(index, 0)
+
+    def latest(self, timeout=None):
+        if self.finished:
+            return None
+        if self.mode == "fast":
+            index = self.position
+            self.position += 1
+            if self.position >= self.frame_count:
+                self._wrap_or_finish()
+        elif self.mode == "step":
+            index = self.position
+            if index >= self.frame_count or index == self._delivered:
+                return None
+        else:
+            index = self._realtime_index()
+            if index is not None and index == self._delivered and timeout:
+                #  auf den nächsten Zeitstempel warten
+                next_index = min(index + 1, self.frame_count - 1)
+                wait_s = (self.timestamps_ms[next_index] - self.timestamps_ms[index]) / 1000.0
+                time.sleep(max(0.0, min(wait_s, timeout)))
+                index = self._realtime_index()
+            if index is None or index == self._delivered:
+                return None
+            self.position = index
+        self._delivered = index
+        return self.frame(index)
+
+    def get_aligned_frames(self):
+        captured = self.latest()
+        if captured is None:
+            return None, None
+        return captured.color, captured.depth
+
+    def stop(self):
+        self._color = []
+        self._depth = []
+        self.finished = True
+
+
+def record_session(path, seconds, chunk_frames=150):
+    from hardware.camera import RealSenseCamera
+
+    camera = RealSenseCamera(threaded=True)
+    deadline = time.monotonic() + seconds
+    try:
+        with SessionRecorder(path, chunk_frames=chunk_frames) as recorder:
+            while time.monotonic() < deadline:
+                captured = camera.latest(timeout=0.5)
+                if captured is None:
+                    continue
+                recorder.write(captured.color, captured.depth, captured.frame_number, captured.timestamp_ms)
+            print(f"Recorded {recorder.frames} frames to {path} ({camera.ring.dropped} dropped)")
+    finally:
+        camera.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Record aligned RealSense color+depth frames for replay")
+    parser.add_argument("path")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--chunk-frames", type=int, default=150)
+    args = parser.parse_args()
+    record_session(args.path, args.seconds, args.chunk_frames)
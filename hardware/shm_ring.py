@@ -0,0 +1,151 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from hardware.frame_ring import CapturedFrame
+
+
+#  Kopfdaten je Slot: Sequenznummer und Sensor-Framenummer (int64), Zeitstempel (float64)
+_SLOT_INTS = 2
+_SLOT_FLOATS = 3
+#  globale Kopfdaten: letzte veröffentlichte Sequenznummer, verworfene Sensorframes
+_GLOBAL_INTS = 2
+
+
+def _attach(name):
+    #  Nur der Erzeuger räumt das Segment auf (ab 3.13 track=False; davor teilen sich
+    #  Kindprozesse den resource_tracker des Erzeugers, die Doppelanmeldung ist harmlos)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    #  Ringpuffer für Color/Depth in einem multiprocessing.shared_memory-Segment,
+    #  ein Writer (Capture-Prozess), beliebig viele Reader. Frames werden nie gepickelt:
+    #  der Writer kopiert in Slot seq % slots, Reader kopieren per Sequenznummer heraus.
+    #  Schutz gegen halbe Frames wie bei einem Seqlock: der Writer setzt die Slot-
+    #  Sequenz vor dem Schreiben auf -1 und danach auf seq, der Reader prüft sie vor
+    #  und nach dem Kopieren. Ein überholter Slot liefert None statt falscher Daten.
+    def __init__(self, slots=8, color_shape=(720, 1280, 3), depth_shape=(720, 1280), name=None):
+        self.slots = slots
+        self.color_shape = tuple(color_shape)
+        self.depth_shape = tuple(depth_shape)
+        color_bytes = int(np.prod(self.color_shape))
+        depth_bytes = int(np.prod(self.depth_shape)) * 2
+        ints_bytes = (_GLOBAL_INTS + slots * _SLOT_INTS) * 8
+        floats_bytes = slots * _SLOT_FLOATS * 8
+        size = ints_bytes + floats_bytes + slots * (color_bytes + depth_bytes)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        buf = self.shm.buf
+        offset = 0
+        ints = np.ndarray((_GLOBAL_INTS + slots * _SLOT_INTS,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += ints_bytes
+        self._global = ints[:_GLOBAL_INTS]
+        self._slot_ints = ints[_GLOBAL_INTS:].reshape(slots, _SLOT_INTS)
+        self._slot_floats = np.ndarray((slots, _SLOT_FLOATS), dtype=np.float64, buffer=buf, offset=offset)
+        offset += floats_bytes
+        self._color = np.ndarray((slots,) + self.color_shape, dtype=np.uint8, buffer=buf, offset=offset)
+        offset += slots * color_bytes
+        self._depth = np.ndarray((slots,) + self.depth_shape, dtype=np.uint16, buffer=buf, offset=offset)
+        if self.owner:
+            self._global[:] = 0
+            self._slot_ints[:, 0] = -1
+        #  Writer-Zustand
+        self._last_hw_number = None
+        #  Reader-Zustand (pro Prozess)
+        self._read_seq = 0
+        self._color_out = None
+        self._depth_out = None
+
+    @property
+    def spec(self):
+        #  alles, was ein anderer Prozess zum Anhängen braucht (klein, picklebar)
+        return (self.shm.name, self.slots, self.color_shape, self.depth_shape)
+
+    @classmethod
+    def attach(cls, spec):
+        name, slots, color_shape, depth_shape = spec
+        return cls(slots, color_shape, depth_shape, name=name)
+
+    @property
+    def latest_seq(self):
+        return int(self._global[0])
+
+    @property
+    def dropped(self):
+        return int(self._global[1])
+
+    def push(self, color, depth, frame_number, timestamp_ms, received=None, exposure=None):
+        if color.shape != self.color_shape or depth.shape != self.depth_shape:
+            raise ValueError(f"frame shape {color.shape}/{depth.shape} does not match the ring "
+                             f"({self.color_shape}/{self.depth_shape})")
+        seq = int(self._global[0]) + 1
+        idx = seq % self.slots
+        self._slot_ints[idx, 0] = -1
+        np.copyto(self._color[idx], color)
+        np.copyto(self._depth[idx], depth)
+        self._slot_ints[idx, 1] = frame_number
+        self._slot_floats[idx] = (timestamp_ms, time.monotonic() if received is None else received,
+                                  np.nan if exposure is None else exposure)
+        self._slot_ints[idx, 0] = seq
+        if self._last_hw_number is not None and frame_number > self._last_hw_number + 1:
+            self._global[1] += int(frame_number - self._last_hw_number - 1)
+        self._last_hw_number = frame_number
+        self._global[0] = seq
+        return seq
+
+    def read(self, seq, color_out=None, depth_out=None):
+        #  Frame `seq` in die Ausgabepuffer kopieren; None, wenn er schon überschrieben ist
+        idx = seq % self.slots
+        if seq <= 0 or self._slot_ints[idx, 0] != seq:
+            return None
+        if color_out is None:
+            color_out = np.empty(self.color_shape, dtype=np.uint8)
+        if depth_out is None:
+            depth_out = np.empty(self.depth_shape, dtype=np.uint16)
+        np.copyto(color_out, self._color[idx])
+        np.copyto(depth_out, self._depth[idx])
+        frame_number = int(self._slot_ints[idx, 1])
+        timestamp_ms, received, exposure = (float(v) for v in self._slot_floats[idx])
+        if self._slot_ints[idx, 0] != seq:
+            return None
+        return CapturedFrame(color_out, depth_out, frame_number, timestamp_ms, self.dropped, received,
+                             None if np.isnan(exposure) else exposure)
+
+    def latest(self, timeout=None, poll=0.001):
+        #  wie FrameRing.latest, aber als (seq, CapturedFrame): neuester, noch nicht
+        #  abgeholter Frame oder None. Die Puffer gehören dem Reader und gelten bis zum
+        #  nächsten Aufruf.
+        deadline = time.monotonic() + (timeout or 0.0)
+        while True:
+            seq = self.latest_seq
+            if seq > self._read_seq:
+                if self._color_out is None:
+                    self._color_out = np.empty(self.color_shape, dtype=np.uint8)
+                    self._depth_out = np.empty(self.depth_shape, dtype=np.uint16)
+                captured = self.read(seq, self._color_out, self._depth_out)
+                if captured is not None:
+                    self._read_seq = seq
+                    return seq, captured
+                #  während des Kopierens überholt: gleich den nächsten nehmen
+                continue
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def close(self):
+        #  Views freigeben, sonst lässt sich der Puffer nicht schließen
+        self._global = self._slot_ints = self._slot_floats = self._color = self._depth = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,169 @@
+import argparse
+import signal
+import time
+
+from utils.config import (
+    LIGHTING_OPTIONS,
+    CAMERA_THREADED,
+    CAMERA_BUFFER_SIZE,
+    CAMERA_ALIGN_MODE,
+    REPLAY_MODE,
+    INFERENCE_PIPELINED,
+    INFERENCE_MAX_IN_FLIGHT,
+    INFERENCE_WORKERS,
+    METRICS_DUMP_PATH,
+    METRICS_DUMP_INTERVAL_S,
+    METRICS_HTTP_PORT,
+    LATENCY_TRACE_ENABLED,
+    LATENCY_TRACE_CAPACITY,
+    LATENCY_TRACE_PATH,
+    QUALITY_GOVERNOR_ENABLED,
+    QUALITY_TARGET_FPS,
+    QUALITY_WINDOW,
+    QUALITY_RESTORE_FRAMES,
+    QUALITY_RESTORE_HEADROOM,
+)
+from hardware.frame_ring import capture_time
+from utils.control import SocketControl, FileControl, engine_status
+from utils.latency import LatencyTracer
+from utils.metrics import start_metrics
+from utils.quality_governor import QualityGovernor
+
+
+DEFAULT_CONTROL_SOCKET = "/tmp/amacus-focus.sock"
+
+
+def build_camera(args):
+    if args.replay:
+        from hardware.replay import ReplayCamera
+        return ReplayCamera(args.replay, mode=args.replay_mode, loop=args.loop)
+    from hardware.camera import RealSenseCamera
+    return RealSenseCamera(threaded=CAMERA_THREADED, buffer_size=CAMERA_BUFFER_SIZE, align_mode=args.align)
+
+
+def run(args):
+    from hardware.motor_controller import MotorController
+    from vision.object_tracker import DetectionPipeline, build_tracker
+    from vision.focus_engine import FocusEngine
+    from vision.inference_scheduler import InferenceScheduler
+
+    controls = []
+    if args.control_file:
+        controls.append(FileControl(args.control_file))
+    if args.socket:
+        controls.append(SocketControl(args.socket))
+
+    metrics, metrics_services = start_metrics(args.metrics_file, METRICS_DUMP_INTERVAL_S, args.metrics_port)
+    camera = build_camera(args)
+    motor = MotorController(initial_focus_time=args.focus_time)
+    scheduler = InferenceScheduler(INFERENCE_MAX_IN_FLIGHT, INFERENCE_WORKERS) if INFERENCE_PIPELINED else None
+    tracer = LatencyTracer(LATENCY_TRACE_CAPACITY) if LATENCY_TRACE_ENABLED else None
+    if tracer is not None:
+        metrics.provide("latency", tracer.summary)
+    engine = FocusEngine(
+        DetectionPipeline(),
+        build_tracker(),
+        motor,
+        lichtbedingung=args.lighting,
+        focus_time=args.focus_time,
+        timer=metrics,
+        scheduler=scheduler,
+        tracer=tracer,
+        #  Wiedergabe: Zeitachse der Aufnahme statt der Host-Uhr
+        clock=getattr(camera, "now", time.monotonic),
+    )
+    engine.depth_projector = getattr(camera, "depth_projector", None)
+    #  ohne Vorschau wirken nur die Stufen der Engine (Tiefenpunkte, Track-Obergrenze)
+    governor = QualityGovernor(QUALITY_TARGET_FPS, window=QUALITY_WINDOW, restore_frames=QUALITY_RESTORE_FRAMES,
+                               headroom=QUALITY_RESTORE_HEADROOM) if QUALITY_GOVERNOR_ENABLED else None
+    if governor is not None:
+        metrics.provide("quality", governor.stats)
+        engine.set_quality(governor.level)
+
+    stop = {"requested": False}
+
+    def _request_stop(signum, frame):
+        stop["requested"] = True
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    frames = 0
+    last_report = time.monotonic()
+    try:
+        while not stop["requested"]:
+            for control in controls:
+                control.poll(engine)
+            motor.poll_metrics(metrics)
+            if tracer is not None:
+                motor.poll_traces(tracer)
+            captured = camera.latest(timeout=0.1)
+            if captured is None:
+                if getattr(camera, "finished", False):
+                    break
+                metrics.count("frames.no_new_frame")
+                continue
+            #  Zähler des Kamerapuffers (kumulativ)
+            metrics.gauge("camera.dropped_total", captured.dropped)
+            trace_id = None
+            if tracer is not None:
+                trace_id = tracer.begin(captured.frame_number, captured.timestamp_ms,
+                                        captured.received, captured.exposure)
+            t0 = time.perf_counter()
+            try:
+                engine.step(captured.color, captured.depth, trace_id, capture_time(captured))
+            except Exception as e:
+                metrics.count("errors.step")
+                print(f"Error in step: {e}")
+                continue
+            frame_ms = (time.perf_counter() - t0) * 1000.0
+            metrics.observe("end_to_end", frame_ms)
+            if governor is not None and governor.observe(frame_ms):
+                metrics.count("quality.changes")
+                metrics.gauge("quality.level", governor.index)
+                engine.set_quality(governor.level)
+            metrics.count("frames")
+            frames += 1
+            now = time.monotonic()
+            if args.status_interval and now - last_report >= args.status_interval:
+                fps = frames / (now - last_report)
+                metrics.gauge("fps", fps)
+                print(f"FPS: {fps:.1f} {engine_status(engine)}")
+                frames = 0
+                last_report = now
+    finally:
+        for control in controls:
+            control.close()
+        camera.stop()
+        motor.stop()
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+        for service in metrics_services:
+            service.close()
+        if tracer is not None and args.latency_file:
+            motor.poll_traces(tracer)
+            print(f"Latency traces: {tracer.export(args.latency_file)} moves -> {args.latency_file}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the autofocus loop without GUI")
+    parser.add_argument("--lighting", choices=LIGHTING_OPTIONS, default=None,
+                        help="lighting condition for depth correction")
+    parser.add_argument("--socket", default=DEFAULT_CONTROL_SOCKET,
+                        help="Unix control socket path ('' to disable)")
+    parser.add_argument("--control-file", help="command file, re-read whenever it changes")
+    parser.add_argument("--focus-time", type=float, default=0.0)
+    parser.add_argument("--align", default=CAMERA_ALIGN_MODE, choices=("full", "sparse"),
+                        help="depth alignment: whole frame (rs.align) or only the ROI")
+    parser.add_argument("--replay", help="recorded session instead of the live camera")
+    parser.add_argument("--replay-mode", default=REPLAY_MODE, choices=("realtime", "fast"))
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--metrics-file", default=METRICS_DUMP_PATH,
+                        help="rotating JSON-lines metrics dump ('' to disable)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_HTTP_PORT,
+                        help="loopback HTTP port for /metrics (0 to disable)")
+    parser.add_argument("--latency-file", default=LATENCY_TRACE_PATH,
+                        help="per-move latency breakdown as JSON lines, written on exit ('' to disable)")
+    parser.add_argument("--status-interval", type=float, default=5.0,
+                        help="seconds between status lines (0 = quiet)")
+    run(parser.parse_args())
@@ -1,6 +1,8 @@
 # Window / UI
 WINDOW_SIZE = (1280, 700)
 LOGO_PATH = "/home/amacus/hailo_examples/LogoName.png"
+# Preview resolution relative to the processing frame (1.0 = full size, 0.5 = half)
+DISPLAY_SCALE = 1.0
 
 # Focus / profile parameters
 HYSTERESIS_THRESHOLD = 0.02
@@ -10,6 +12,103 @@ PROFILE_CANVAS_BG_M = 10.0
 MASK_SAMPLE_RATIO_TRACKED = 0.01
 MASK_SAMPLE_RATIO_UNTRACKED = 0.001
 
+# Person tracker (vision/byte_tracker.py): ByteTrack-style two-stage matching,
+# confident detections first, then low-score ones against the remaining tracks
+TRACKER_HIGH_SCORE = 0.5
+TRACKER_LOW_SCORE = 0.1  # also the person model's output threshold
+TRACKER_NEW_TRACK_SCORE = 0.6
+TRACKER_MAX_LOST = 30  # frames a lost track can still be re-found with its ID
+TRACK_HISTORY_LENGTH = 30  # measured depths kept per track (vision/track_store.py)
+
+# Occlusion map (vision/occlusion.py): per frame each ROI pixel belongs to the nearest
+# person box covering it, ordered by the median depth of an N x N grid per box
+OCCLUSION_DEPTH_GRID = 8
+
+# Segmentation mask cache (per track)
+MASK_CACHE_ENABLED = True
+MASK_CACHE_IOU = 0.85
+MASK_CACHE_MAX_AGE = 8
+MASK_CACHE_CAPACITY = 16
+
+# Segmentation mode: "roi" = one inference on the whole ROI, instance masks are
+# assigned to tracks (mask/box IoU + Hungarian matching); "track" = one inference per person crop
+SEG_MODE = "roi"
+SEG_ASSIGN_MIN_IOU = 0.3
+
+# Face lock: run the face detector every FACE_DETECT_CADENCE frames (or when the
+# detection score / template match is too low) and track the box in between
+FACE_LOCK_ENABLED = True
+FACE_DETECT_CADENCE = 10
+FACE_LOCK_MIN_SCORE = 0.5
+FACE_LOCK_MIN_MATCH = 0.6
+FACE_LOCK_SEARCH_MARGIN = 0.5
+
+# Target filter: constant-velocity Kalman filter on the focus distance, the motor
+# aims at the predicted distance at arrival (latency since capture + planned move time)
+TARGET_FILTER_ENABLED = True
+TARGET_FILTER_PROCESS_NOISE = 2.0      # m/s^2
+TARGET_FILTER_MEASUREMENT_NOISE = 0.05  # m
+TARGET_FILTER_GATE = 3.0               # sigma
+TARGET_FILTER_MAX_REJECTS = 3
+TARGET_FILTER_MAX_LEAD_S = 0.5
+
+# Quality governor: degrade in a fixed order (utils/quality_governor.QUALITY_LEVELS)
+# when the median frame time exceeds the budget, restore after sustained headroom
+QUALITY_GOVERNOR_ENABLED = True
+QUALITY_TARGET_FPS = 30.0
+QUALITY_WINDOW = 15  # frames per decision
+QUALITY_RESTORE_FRAMES = 90
+QUALITY_RESTORE_HEADROOM = 0.75  # fraction of the budget
+
+# Process pipeline: capture and inference in their own processes, frames shared
+# through a multiprocessing.shared_memory ring (motor stays in its own process)
+PIPELINE_PROCESSES = False
+PIPELINE_RING_SLOTS = 8
+PIPELINE_FRAME_SIZE = (1280, 720)  # (width, height) of the aligned color/depth frames
+
+# Camera capture
+CAMERA_THREADED = True
+CAMERA_BUFFER_SIZE = 3
+# "full": rs.align on every frame; "sparse": keep raw depth and map only the ROI
+# into color space (hardware/depth_projection.py), no aligned depth outside the ROI
+CAMERA_ALIGN_MODE = "full"
+CAMERA_FIRST_FRAME_TIMEOUT_S = 2.0
+
+# Depth filter chain on the ROI (vision/depth_filters.py): edge-preserving spatial
+# smoothing -> temporal EMA with hole persistence -> hole filling, only inside the ROI
+# (python -m benchmarks.bench_depth_filters for accuracy and cost). Off by default: the
+# cost grows with the ROI area, about 1.5 ms on the default ROI but about 9 ms on a
+# 640x576 ROI, where it is the most expensive stage in bench_pipeline
+DEPTH_FILTER_ENABLED = False
+DEPTH_FILTER_SPATIAL_DIAMETER = 5  # px, 0 disables the spatial filter
+DEPTH_FILTER_SPATIAL_SIGMA_MM = 50.0  # depth difference at which neighbours stop counting
+DEPTH_FILTER_SPECKLE_MM = 100.0  # farther than this from the 3x3 median = outlier (hole)
+DEPTH_FILTER_TEMPORAL_ALPHA = 0.4  # weight of the new frame, 0 disables the temporal filter
+DEPTH_FILTER_TEMPORAL_DELTA_MM = 30.0  # larger jumps reset the pixel (motion); inside person boxes after following the box's depth change
+DEPTH_FILTER_PERSISTENCE = 3  # frames a pixel keeps its last value after dropping out
+DEPTH_FILTER_HOLE_FILL = None  # "farthest", "nearest" or None (samplers skip holes anyway)
+
+# Inference scheduling (Personendetektion von Frame N+1 überlappt mit Face/Seg von Frame N)
+INFERENCE_PIPELINED = True
+INFERENCE_MAX_IN_FLIGHT = 2
+INFERENCE_WORKERS = 3
+
+# Metrics (stage histograms, error counters; None disables the file dump / HTTP endpoint)
+METRICS_DUMP_PATH = "/tmp/amacus-metrics.jsonl"
+METRICS_DUMP_INTERVAL_S = 10.0
+METRICS_HTTP_PORT = 9108  # served on 127.0.0.1 only
+
+# Latency tracing (exposure -> detection -> decision -> motor queue -> first/last step);
+# percentiles appear under "latency" in the metrics, per-move records are exported on exit
+LATENCY_TRACE_ENABLED = True
+LATENCY_TRACE_CAPACITY = 2048
+LATENCY_TRACE_PATH = "/tmp/amacus-latency.jsonl"
+
+# Replay (None = live RealSense camera)
+REPLAY_SESSION_PATH = None
+REPLAY_MODE = "realtime"
+REPLAY_LOOP = True
+
 # Lighting options
 LIGHTING_OPTIONS = [
     "Drinnen - Gutes Licht",
@@ -28,6 +127,13 @@ DG_ZOO_FACE_URL = "models/yolov8n_relu6_widerface_kpts--640x640_quant_hailort_ha
 DG_ZOO_SEG_URL = "models/yolov8n_relu6_coco_seg--640x640_quant_hailort_hailo8_1"
 DG_DEVICE_TYPE = "HAILORT/HAILO8"
 DG_TOKEN = ""
+DG_LAZY_MODELS = True  # load face/seg in the background; until then no faces or masks instead of waiting
+
+# Startup (utils/startup.py): models, warmup, camera and motor process load in
+# background threads from AMACUSApp.build on, behind the loading/calibration screens
+STARTUP_BACKGROUND = True
+STARTUP_SERIAL_MODEL_LOADS = True  # one model load at a time on the accelerator
+STARTUP_LOADING_SCREEN_MAX_S = 3.0  # then the calibration screen shows the remaining progress
 
 # Depth LUTs (copied from your original code)
 INSIDE_GOOD_LIGHTING = [
@@ -76,6 +182,10 @@ TRUE_DISTANCES_M = [
     9.5, 9.6, 9.7, 9.8, 9.9, 10.0
 ]
 
+# Motor motion limits for this lens (trapezoidal profile, steps/s and steps/s^2)
+MOTOR_MAX_SPEED = 1000.0
+MOTOR_ACCELERATION = 8000.0
+
 # Motor LUT
 MOTOR_LUT = [
     (0, 0.6), (10, 0.61), (20, 0.62), (30, 0.63), (40, 0.65), (50, 0.67), (60, 0.69), (70, 0.71),
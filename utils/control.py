@@ -0,0 +1,137 @@
+import json
+import os
+import queue
+import socket
+import threading
+
+
+#  Zeilenbasierte Steuerbefehle für den Headless-Betrieb, z.B. von einer
+#  Hardware-Fernbedienung:
+#    select <track_id>        Person fokussieren
+#    tap <x> <y>              wie Antippen im GUI (Person oder Optical-Flow-Punkt)
+#    point <x> <y>            Optical-Flow-Punkt setzen
+#    roi <x1> <y1> <x2> <y2>  ROI setzen
+#    focus_time <s>           Fokuszeit für den ersten Fokuszug
+#    reset                    Auswahl aufheben
+#    status                   aktuellen Zustand als JSON zurückgeben
+
+
+def engine_status(engine):
+    return {
+        "selected_id": engine.selected_id,
+        "point_selected": engine.of_point_selected,
+        "focus_distance": round(float(engine.focus_distance), 3),
+        "roi": (engine.roi_start or []) + (engine.roi_end or []),
+        "tracks": [int(t[4]) for t in engine.person_tracks],
+        "focus_time": engine.focus_time,
+        "face_lock": engine.face_lock.stats() if engine.face_lock is not None else None,
+        "predicted_distance": engine.predicted_distance,
+        "quality": engine.quality.name if engine.quality is not None else None,
+    }
+
+
+def apply_command(engine, line):
+    parts = line.strip().split()
+    if not parts or parts[0].startswith('#'):
+        return None
+    name, args = parts[0].lower(), parts[1:]
+    try:
+        if name == "select" and len(args) == 1:
+            engine.select_track(int(args[0]))
+        elif name == "tap" and len(args) == 2:
+            if not engine.select_at(int(float(args[0])), int(float(args[1]))):
+                return "error: nothing to select"
+        elif name == "point" and len(args) == 2:
+            if not engine.select_point(int(float(args[0])), int(float(args[1]))):
+                return "error: point outside ROI"
+        elif name == "roi" and len(args) == 4:
+            engine.set_roi(*(int(float(a)) for a in args))
+        elif name == "focus_time" and len(args) == 1:
+            engine.focus_time = max(0.0, float(args[0]))
+        elif name == "reset" and not args:
+            engine.reset()
+        elif name == "status" and not args:
+            return json.dumps(engine_status(engine))
+        else:
+            return f"error: unknown command '{line.strip()}'"
+    except ValueError as e:
+        return f"error: {e}"
+    return "ok"
+
+
+class SocketControl:
+    #  Unix-Socket, nur lokal erreichbar. Befehle werden im Verbindungs-Thread nur
+    #  eingereiht und erst in poll() im Engine-Thread angewendet.
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        os.chmod(path, 0o600)
+        self._server.listen(2)
+        self._pending = queue.Queue()
+        self._running = True
+        self._thread = threading.Thread(target=self._accept_loop, name="ControlSocket", daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn, conn.makefile('rw', encoding='utf-8') as stream:
+            for line in stream:
+                reply = queue.Queue(maxsize=1)
+                self._pending.put((line, reply))
+                try:
+                    answer = reply.get(timeout=2.0)
+                except queue.Empty:
+                    answer = "error: engine not responding"
+                if answer is not None:
+                    stream.write(answer + "\n")
+                    stream.flush()
+
+    def poll(self, engine):
+        while True:
+            try:
+                line, reply = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            reply.put(apply_command(engine, line))
+
+    def close(self):
+        self._running = False
+        try:
+            self._server.close()
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+class FileControl:
+    #  Datei mit Befehlen; bei jeder Änderung (mtime) werden alle Zeilen angewendet
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+
+    def poll(self, engine):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                answer = apply_command(engine, line)
+                if answer and answer.startswith("error"):
+                    print(f"{self.path}: {answer}")
+
+    def close(self):
+        pass
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+#  Abschnitte der Latenzkette, jeweils (von, bis); alle Zeitpunkte in time.monotonic(),
+#  das im Motorprozess dieselbe Uhr ist
+SEGMENTS = (
+    ("exposure", "received"),
+    ("received", "detected"),
+    ("detected", "decided"),
+    ("decided", "enqueued"),
+    ("enqueued", "dequeued"),
+    ("dequeued", "first_step"),
+    ("first_step", "last_step"),
+)
+TOTALS = (
+    ("glass_to_motion", "exposure", "first_step"),
+    ("receive_to_motion", "received", "first_step"),
+    ("glass_to_settled", "exposure", "last_step"),
+)
+
+
+class LatencyTracer:
+    #  Verfolgt einzelne Frames von der Belichtung bis zum ersten/letzten Motorschritt.
+    #  begin() pro Frame, mark() an jeder Stufe, motor_event() mit den Zeitpunkten aus
+    #  dem Motorprozess. Frames, die keine Bewegung auslösen, werden mit drop() verworfen.
+    def __init__(self, capacity=2048, pending_limit=256):
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending = OrderedDict()
+        self.pending_limit = pending_limit
+        self.completed = deque(maxlen=capacity)
+        self.superseded = 0
+        self.dropped = 0
+
+    def begin(self, frame_number, timestamp_ms=None, received=None, exposure=None):
+        with self._lock:
+            trace_id = self._next_id
+            self._next_id += 1
+            self._pending[trace_id] = {
+                "trace_id": trace_id,
+                "frame_number": frame_number,
+                "timestamp_ms": timestamp_ms,
+                "exposure": exposure,
+                "received": received if received is not None else time.monotonic(),
+            }
+            while len(self._pending) > self.pending_limit:
+                self._pending.popitem(last=False)
+        return trace_id
+
+    def mark(self, trace_id, stage, t=None):
+        if trace_id is None:
+            return
+        with self._lock:
+            trace = self._pending.get(trace_id)
+            if trace is not None:
+                trace[stage] = time.monotonic() if t is None else t
+
+    def drop(self, trace_id):
+        if trace_id is None:
+            return
+        with self._lock:
+            if self._pending.pop(trace_id, None) is not None:
+                self.dropped += 1
+
+    def motor_event(self, event):
+        #  event: dict aus _motor_worker (trace_id, dequeued, first_step, last_step, steps, superseded)
+        with self._lock:
+            trace = self._pending.pop(event["trace_id"], None)
+            if trace is None:
+                return
+            if event.get("superseded"):
+                self.superseded += 1
+            for key in ("dequeued", "first_step", "last_step", "steps", "superseded"):
+                trace[key] = event.get(key)
+            trace.update(breakdown(trace))
+            self.completed.append(trace)
+
+    def summary(self):
+        #  Perzentile je Abschnitt in ms über alle abgeschlossenen Bewegungen
+        with self._lock:
+            traces = list(self.completed)
+            out = {"moves": len(traces), "superseded": self.superseded, "dropped": self.dropped}
+        names = [f"{a}_to_{b}" for a, b in SEGMENTS] + [name for name, _, _ in TOTALS]
+        for name in names:
+            values = np.array([t[name] for t in traces if t.get(name) is not None])
+            if not len(values):
+                continue
+            out[name] = {
+                "count": int(len(values)),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "p99": float(np.percentile(values, 99)),
+                "max": float(values.max()),
+            }
+        return out
+
+    def export(self, path):
+        #  abgeschlossene Bewegungen als JSON-Zeilen
+        with self._lock:
+            traces = list(self.completed)
+        with open(path, "w") as f:
+            for trace in traces:
+                f.write(json.dumps(trace) + "\n")
+        return len(traces)
+
+
+def breakdown(trace):
+    #  Dauer je Abschnitt in ms; None, wenn ein Zeitpunkt fehlt
+    out = {}
+    for a, b in SEGMENTS:
+        out[f"{a}_to_{b}"] = _ms(trace.get(a), trace.get(b))
+    for name, a, b in TOTALS:
+        out[name] = _ms(trace.get(a), trace.get(b))
+    return out
+
+
+def _ms(start, end):
+    if start is None or end is None:
+        return None
+    return (end - start) * 1000.0
@@ -0,0 +1,202 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+
+#  feste Bucket-Grenzen in ms (letzter Bucket: alles darüber)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 33.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        #  Obergrenze des Buckets, in dem das p-Quantil liegt
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": list(self.counts),
+        }
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, (time.perf_counter() - self.t0) * 1000.0)
+        if exc_type is not None:
+            self.metrics.count(f"errors.{self.name}")
+        return False
+
+
+class Metrics:
+    #  Histogramme (ms) und Zähler für den Hot Path. span(name) ist mit dem
+    #  timer-Argument von FocusEngine kompatibel. Werte anderer Prozesse (Motor)
+    #  kommen als fertige Snapshots über absorb() dazu.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.external = {}
+        self.providers = {}
+        self.started = time.time()
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def observe(self, name, value_ms):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value_ms)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def absorb(self, source, snapshot):
+        with self._lock:
+            self.external[source] = snapshot
+
+    def provide(self, source, fn):
+        #  fn() wird erst beim Snapshot aufgerufen (für teure Zusammenfassungen)
+        with self._lock:
+            self.providers[source] = fn
+
+    def snapshot(self):
+        with self._lock:
+            out = {
+                "time": time.time(),
+                "uptime_s": time.time() - self.started,
+                "histograms_ms": {name: h.snapshot() for name, h in self.histograms.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+            for source, snapshot in self.external.items():
+                out[source] = snapshot
+            providers = list(self.providers.items())
+        for source, fn in providers:
+            out[source] = fn()
+        return out
+
+
+class MetricsDumper:
+    #  Schreibt alle interval Sekunden eine JSON-Zeile in eine rotierende Datei
+    def __init__(self, metrics, path, interval=10.0, max_bytes=1_000_000, backups=3):
+        self.metrics = metrics
+        self.interval = interval
+        self._logger = logging.getLogger(f"metrics.{path}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+        self._logger.addHandler(self._handler)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+        self._thread.start()
+
+    def dump(self):
+        self._logger.info(json.dumps(self.metrics.snapshot()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except Exception as e:
+                print(f"Metrics dump failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self.dump()
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+
+class MetricsServer:
+    #  GET /metrics liefert den Snapshot als JSON, nur auf 127.0.0.1
+    def __init__(self, metrics, port=9108, host="127.0.0.1"):
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.rstrip("/") not in ("", "/metrics"):
+                    handler.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_metrics(dump_path=None, dump_interval=10.0, http_port=None):
+    #  Metrics plus optional Datei-Dump und HTTP-Endpunkt; liefert (metrics, [schließbare Dienste])
+    metrics = Metrics()
+    services = []
+    if dump_path:
+        services.append(MetricsDumper(metrics, dump_path, dump_interval))
+    if http_port:
+        try:
+            services.append(MetricsServer(metrics, http_port))
+        except OSError as e:
+            print(f"Metrics endpoint not started: {e}")
+    return metrics, services
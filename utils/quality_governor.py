@@ -0,0 +1,90 @@
+from collections import deque, namedtuple
+
+import numpy as np
+
+
+#  Eine Qualitätsstufe; höhere Stufen sparen mehr Arbeit pro Frame.
+#  untracked_every: Tiefenpunkte der übrigen Personen nur jeden n-ten Frame,
+#  display_scale: Obergrenze für die Vorschau, profile: Tiefenprofil zeichnen,
+#  max_tracks: höchstens so viele Personen verarbeiten (Fokusperson zählt mit),
+#  depth_filter: Tiefenfilterkette auf der ROI (vision/depth_filters.py) anwenden
+QualityLevel = namedtuple('QualityLevel', ['name', 'untracked_every', 'display_scale', 'profile', 'max_tracks',
+                                           'depth_filter'], defaults=(True,))
+
+#  Reihenfolge, in der abgebaut wird (und rückwärts wieder aufgebaut)
+QUALITY_LEVELS = (
+    QualityLevel("full", 1, 1.0, True, None),
+    QualityLevel("sparse_samples", 3, 1.0, True, None),
+    QualityLevel("low_preview", 3, 0.5, True, None),
+    QualityLevel("no_profile", 3, 0.5, False, None),
+    QualityLevel("raw_depth", 3, 0.5, False, None, False),
+    QualityLevel("capped_tracks", 6, 0.5, False, 3, False),
+)
+
+
+class QualityGovernor:
+    #  Hält die Bildrate: liegt der Median der letzten `window` Frame-Zeiten über dem
+    #  Budget (1000 / target_fps ms), eine Stufe runter; liegt er `restore_frames`
+    #  Frames lang unter headroom * Budget, eine Stufe zurück. Nach jedem Wechsel
+    #  wird das Fenster geleert, damit die neue Stufe erst gemessen wird. Kippt eine
+    #  Wiederherstellung gleich wieder, verdoppelt sich die Wartezeit (gegen Pendeln).
+    def __init__(self, target_fps=30.0, levels=QUALITY_LEVELS, window=15, restore_frames=90, headroom=0.75):
+        self.budget_ms = 1000.0 / target_fps
+        self.levels = levels
+        self.restore_frames = restore_frames
+        self.headroom = headroom
+        self.index = 0
+        self.degrades = 0
+        self.restores = 0
+        self._times = deque(maxlen=window)
+        self._calm = 0
+        self._restore_wait = restore_frames
+        self._since_restore = None
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def observe(self, frame_ms):
+        #  True, wenn sich die Stufe geändert hat
+        self._times.append(frame_ms)
+        if self._since_restore is not None:
+            self._since_restore += 1
+            if self._since_restore > self._restore_wait:
+                #  Wiederherstellung hat gehalten
+                self._restore_wait = self.restore_frames
+                self._since_restore = None
+        if len(self._times) < self._times.maxlen:
+            return False
+        load = float(np.median(self._times))
+        if load > self.budget_ms:
+            self._calm = 0
+            if self.index < len(self.levels) - 1:
+                if self._since_restore is not None:
+                    self._restore_wait = min(self._restore_wait * 2, self.restore_frames * 8)
+                    self._since_restore = None
+                self.index += 1
+                self.degrades += 1
+                self._times.clear()
+                return True
+            return False
+        if load < self.headroom * self.budget_ms and self.index > 0:
+            self._calm += 1
+            if self._calm >= self._restore_wait:
+                self.index -= 1
+                self.restores += 1
+                self._calm = 0
+                self._since_restore = 0
+                self._times.clear()
+                return True
+        else:
+            self._calm = 0
+        return False
+
+    def stats(self):
+        return {
+            "level": self.index,
+            "name": self.level.name,
+            "degrades": self.degrades,
+            "restores": self.restores,
+        }
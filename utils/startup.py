@@ -0,0 +1,166 @@
+import threading
+import time
+
+
+class _Task:
+    def __init__(self, name, fn, after, weight):
+        self.name = name
+        self.fn = fn
+        self.after = tuple(after)
+        self.weight = float(weight)
+        self.done = threading.Event()
+        self.started = None
+        self.finished = None
+        self.value = None
+        self.error = None
+
+
+class StartupLoader:
+    #  Startaufgaben (Modelle laden, Warmup, Kamera, Motorprozess) in Hintergrund-
+    #  Threads, sobald die App gebaut wird; die UI fragt nur progress()/ready() ab und
+    #  blockiert nie. Jede Aufgabe hat einen eigenen Thread und wartet auf ihre
+    #  Vorgänger (after); ein Fehler wird gespeichert und bei result() erneut
+    #  geworfen, Nachfolger schlagen dann ebenfalls fehl. mark() hält UI-Meilensteine
+    #  (Kalibrierung angezeigt, Start gedrückt, ...) für den Zeitbericht fest.
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._tasks = {}
+        self._marks = []
+        self._lock = threading.Lock()
+        self.started = None
+
+    def add(self, name, fn, after=(), weight=1.0):
+        #  fn() ohne Argumente; Ergebnisse der Vorgänger über result(name)
+        if name in self._tasks:
+            raise ValueError(f"startup task {name!r} added twice")
+        missing = [dep for dep in after if dep not in self._tasks]
+        if missing:
+            raise ValueError(f"startup task {name!r} depends on unknown {', '.join(missing)}")
+        self._tasks[name] = _Task(name, fn, after, weight)
+        return self
+
+    def start(self):
+        self.started = self.clock()
+        for task in self._tasks.values():
+            threading.Thread(target=self._run, args=(task,), name=f"startup-{task.name}", daemon=True).start()
+        return self
+
+    def _run(self, task):
+        try:
+            for dep in task.after:
+                self.result(dep)
+            task.started = self.clock()
+            task.value = task.fn()
+        except BaseException as e:
+            task.error = e
+        finally:
+            task.finished = self.clock()
+            task.done.set()
+
+    def result(self, name, timeout=None):
+        #  blockiert bis die Aufgabe fertig ist (nur aus Workern oder nach ready())
+        task = self._tasks[name]
+        if not task.done.wait(timeout):
+            raise TimeoutError(f"startup task {name!r} not finished")
+        if task.error is not None:
+            raise task.error
+        return task.value
+
+    def value(self, name, default=None):
+        #  Ergebnis oder default, wenn die Aufgabe fehlt oder fehlgeschlagen ist
+        task = self._tasks.get(name)
+        if task is None:
+            return default
+        task.done.wait()
+        if task.error is not None:
+            print(f"Startup task {name} failed: {task.error}")
+            return default
+        return task.value
+
+    def source(self, name, fallback):
+        #  Callable zum späten Abholen (z.B. DetectionPipeline-Quellen): wartet auf die
+        #  Aufgabe, bei Fehler oder ohne Aufgabe fallback()
+        def get():
+            value = self.value(name)
+            return value if value is not None else fallback()
+        return get
+
+    def ready(self, names=None):
+        names = self._tasks if names is None else names
+        return all(self._tasks[name].done.is_set() for name in names if name in self._tasks)
+
+    def progress(self):
+        #  Anteil der erledigten Arbeit (nach weight gewichtet), 1.0 ohne Aufgaben
+        total = sum(task.weight for task in self._tasks.values())
+        if total <= 0:
+            return 1.0
+        return sum(task.weight for task in self._tasks.values() if task.done.is_set()) / total
+
+    def pending(self):
+        return [name for name, task in self._tasks.items() if not task.done.is_set()]
+
+    def mark(self, name):
+        with self._lock:
+            self._marks.append((name, self.clock()))
+
+    def stats(self):
+        #  Sekunden relativ zu start(); serial_s = Summe aller Aufgabenzeiten, also
+        #  ungefähr die alte Wartezeit, wenn alles nacheinander im UI-Thread lief
+        origin = self.started if self.started is not None else self.clock()
+        tasks = {}
+        for name, task in self._tasks.items():
+            entry = {"done": task.done.is_set(), "error": None if task.error is None else str(task.error)}
+            if task.started is not None:
+                entry["start_s"] = round(task.started - origin, 3)
+            if task.finished is not None and task.started is not None:
+                entry["duration_s"] = round(task.finished - task.started, 3)
+            if task.finished is not None:
+                entry["end_s"] = round(task.finished - origin, 3)
+            tasks[name] = entry
+        with self._lock:
+            marks = {name: round(t - origin, 3) for name, t in self._marks}
+        return {
+            "tasks": tasks,
+            "marks": marks,
+            "wall_s": max((entry.get("end_s", 0.0) for entry in tasks.values()), default=0.0),
+            "serial_s": round(sum(entry.get("duration_s", 0.0) for entry in tasks.values()), 3),
+            "progress": round(self.progress(), 3),
+        }
+
+    def report(self):
+        stats = self.stats()
+        lines = [f"startup: {stats['wall_s']:.2f} s wall for {stats['serial_s']:.2f} s of work"]
+        for name, entry in sorted(stats["tasks"].items(), key=lambda item: item[1].get("start_s", float("inf"))):
+            if "duration_s" in entry:
+                span = f"{entry['start_s']:6.2f} -> {entry['end_s']:6.2f}  ({entry['duration_s']:.2f} s)"
+            else:
+                span = "not started" if "start_s" not in entry else "running"
+            status = f"  FAILED: {entry['error']}" if entry["error"] else ""
+            lines.append(f"  {name:<18}{span}{status}")
+        for name, t in sorted(stats["marks"].items(), key=lambda item: item[1]):
+            lines.append(f"  @ {name:<16}{t:6.2f}")
+        return "\n".join(lines)
+
+
+#  Aufgaben, ohne die MainScreen nicht starten kann; face/seg holt DetectionPipeline
+#  im Hintergrund ab und arbeitet bis dahin ohne sie
+REQUIRED_TASKS = ("person_model", "camera", "motor")
+
+
+def schedule_startup(loader, load_model, warm_up, create_camera=None, create_motor=None, serial_models=True):
+    #  Aufgabengraph des Starts. load_model(name) mit name in person/face/seg,
+    #  warm_up(model) liefert das Modell zurück. Mit serial_models laden die Modelle
+    #  nacheinander (ein Beschleuniger, gleichzeitiges Laden ist nicht abgesichert),
+    #  Warmups, Kamera und Motor laufen trotzdem parallel dazu.
+    previous = ()
+    for name in ("person", "face", "seg"):
+        loader.add(f"{name}_model", lambda name=name: load_model(name), after=previous, weight=3.0)
+        previous = (f"{name}_model",) if serial_models else ()
+    for name in ("face", "seg"):
+        loader.add(f"{name}_warmup", lambda name=name: warm_up(loader.result(f"{name}_model")),
+                   after=(f"{name}_model",))
+    if create_camera is not None:
+        loader.add("camera", create_camera, weight=2.0)
+    if create_motor is not None:
+        loader.add("motor", create_motor)
+    return loader
@@ -0,0 +1,33 @@
+import numpy as np
+
+
+#  Boxen als (x1, y1, x2, y2); eine IoU für Tracker (byte_tracker) und Maskencache
+def iou_matrix(a, b):
+    #  IoU aller Paare zweier Nx4/Mx4-Boxlisten (x1, y1, x2, y2) -> NxM
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    #  np.maximum statt np.clip, kein np.where: bei ein, zwei Personen zählt der
+    #  Aufruf-Overhead. Ohne Überlappung ist inter 0, auch bei entarteten Boxen (union <= 0)
+    inter = np.maximum(ix2 - ix1, 0.0) * np.maximum(iy2 - iy1, 0.0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def smallest_box_at(boxes, x, y):
+    #  Index der kleinsten Box (x1, y1, x2, y2, ...), die (x, y) enthält, sonst None
+    #  (Antippen: die vordere, kleinere Person gewinnt)
+    boxes = np.asarray(boxes)
+    if len(boxes) == 0:
+        return None
+    point = np.array([x, y], dtype=boxes.dtype)
+    candidates = np.flatnonzero(((boxes[:, :2] <= point) & (point <= boxes[:, 2:4])).all(axis=1))
+    if candidates.size == 0:
+        return None
+    size = boxes[candidates, 2:4] - boxes[candidates, :2]
+    return int(candidates[np.argmin(size[:, 0] * size[:, 1])])
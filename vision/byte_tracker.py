@@ -0,0 +1,243 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from vision.boxes import iou_matrix
+
+
+#  Detektionsvertrag zwischen DetectionPipeline und Tracker: float32-Array Nx5
+#  mit (x1, y1, x2, y2, score) je Zeile, leer als (0, 5)
+DETECTION_COLUMNS = ('x1', 'y1', 'x2', 'y2', 'score')
+DETECTION_DTYPE = np.float32
+
+#  Zustand je Track
+TENTATIVE, TRACKED, LOST = 0, 1, 2
+
+#  Kalman-Rauschen relativ zur Boxhöhe (Werte aus ByteTrack/DeepSORT): Standardabweichung
+#  je Zustandsgröße = h * relativ + absolut (das Seitenverhältnis hat keine Höhenskala)
+_STD_POSITION = 1.0 / 20
+_STD_VELOCITY = 1.0 / 160
+_PREDICT_STD = (np.array([_STD_POSITION] * 2 + [0.0, _STD_POSITION] + [_STD_VELOCITY] * 2 + [0.0, _STD_VELOCITY]),
+                np.array([0.0, 0.0, 1e-2, 0.0, 0.0, 0.0, 1e-5, 0.0]))
+_MEASURE_STD = (np.array([_STD_POSITION, _STD_POSITION, 0.0, _STD_POSITION]), np.array([0.0, 0.0, 1e-1, 0.0]))
+_INITIATE_STD = (np.array([2 * _STD_POSITION] * 2 + [0.0, 2 * _STD_POSITION] + [10 * _STD_VELOCITY] * 2
+                          + [0.0, 10 * _STD_VELOCITY]),
+                 np.array([0.0, 0.0, 1e-2, 0.0, 0.0, 0.0, 1e-5, 0.0]))
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+_DIAG8 = np.arange(8)
+_DIAG4 = np.arange(4)
+
+
+def _variance(h, std):
+    relative, absolute = std
+    return (h[:, None] * relative + absolute) ** 2
+
+
+def as_detections(boxes, default_score=1.0):
+    #  Nx5 nach DETECTION_DTYPE aus Listen/Arrays von 4er- (ohne Score) oder 5er-Zeilen
+    dets = np.asarray(boxes, dtype=DETECTION_DTYPE)
+    if dets.size == 0:
+        return np.empty((0, 5), dtype=DETECTION_DTYPE)
+    dets = dets.reshape(len(dets), -1)
+    if dets.shape[1] == 4:
+        dets = np.hstack([dets, np.full((len(dets), 1), default_score, dtype=DETECTION_DTYPE)])
+    elif dets.shape[1] != 5:
+        raise ValueError(f"detections need 4 or 5 columns ({', '.join(DETECTION_COLUMNS)}), got {dets.shape[1]}")
+    return dets
+
+
+def _to_xyah(boxes):
+    out = np.empty((len(boxes), 4))
+    w = boxes[:, 2] - boxes[:, 0]
+    h = np.maximum(boxes[:, 3] - boxes[:, 1], 1e-3)
+    out[:, 0] = boxes[:, 0] + w / 2
+    out[:, 1] = boxes[:, 1] + h / 2
+    out[:, 2] = w / h
+    out[:, 3] = h
+    return out
+
+
+def _to_boxes(mean):
+    out = np.empty((len(mean), 4))
+    half_h = mean[:, 3] / 2
+    half_w = mean[:, 2] * half_h
+    out[:, 0] = mean[:, 0] - half_w
+    out[:, 1] = mean[:, 1] - half_h
+    out[:, 2] = mean[:, 0] + half_w
+    out[:, 3] = mean[:, 1] + half_h
+    return out
+
+
+def _match(cost, threshold):
+    #  optimale Zuordnung, Paare über threshold zählen nicht; (Paare, freie Zeilen, freie Spalten)
+    rows, cols = linear_sum_assignment(cost)
+    keep = cost[rows, cols] <= threshold
+    rows, cols = rows[keep], cols[keep]
+    free_rows = np.ones(cost.shape[0], dtype=bool)
+    free_rows[rows] = False
+    free_cols = np.ones(cost.shape[1], dtype=bool)
+    free_cols[cols] = False
+    return rows, cols, np.flatnonzero(free_rows), np.flatnonzero(free_cols)
+
+
+class ByteTracker:
+    #  Multi-Objekt-Tracker nach ByteTrack, alle Tracks in Arrays statt Objekten:
+    #  ein Kalmanfilter (x, y, Seitenverhältnis, Höhe + Geschwindigkeiten) für alle
+    #  Tracks gleichzeitig, IoU als eine Matrix, Zuordnung über linear_sum_assignment.
+    #  Zweistufig: erst bestätigte und verlorene Tracks gegen sichere Detektionen
+    #  (score >= high_score), dann die übrigen laufenden Tracks gegen unsichere
+    #  (low_score..high_score) – halb verdeckte Personen halten so ihre ID. Neue
+    #  Tracks entstehen nur aus Detektionen >= new_track_score und werden erst mit
+    #  dem zweiten Treffer ausgegeben; verlorene Tracks leben max_lost Frames weiter.
+    #  update(dets) nimmt Nx5 (as_detections) und liefert wie SORT Nx5
+    #  (x1, y1, x2, y2, track_id) der in diesem Frame bestätigten Tracks.
+    def __init__(self, high_score=0.5, low_score=0.1, new_track_score=0.6, match_cost=0.8, low_match_cost=0.5,
+                 tentative_match_cost=0.7, max_lost=30, duplicate_iou=0.85, fuse_score=True):
+        self.high_score = high_score
+        self.low_score = low_score
+        self.new_track_score = new_track_score
+        self.match_cost = match_cost
+        self.low_match_cost = low_match_cost
+        self.tentative_match_cost = tentative_match_cost
+        self.max_lost = max_lost
+        self.duplicate_iou = duplicate_iou
+        self.fuse_score = fuse_score
+        self.reset()
+
+    def reset(self):
+        self.frame_id = 0
+        self.next_id = 1
+        self._ids = np.empty(0, dtype=np.int64)
+        self._state = np.empty(0, dtype=np.int8)
+        self._mean = np.empty((0, 8))
+        self._cov = np.empty((0, 8, 8))
+        self._start = np.empty(0, dtype=np.int64)
+        self._last_seen = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._ids)
+
+    # Kalman filter, batched over tracks
+    def _predict(self):
+        mean, cov = self._mean, self._cov
+        #  verlorene Tracks wachsen/schrumpfen nicht weiter
+        mean[self._state != TRACKED, 7] = 0.0
+        variance = _variance(mean[:, 3], _PREDICT_STD)
+        self._mean = mean @ _F.T
+        self._cov = _F @ cov @ _F.T
+        self._cov[:, _DIAG8, _DIAG8] += variance
+
+    def _update(self, rows, measurements):
+        mean, cov = self._mean[rows], self._cov[rows]
+        S = cov[:, :4, :4].copy()
+        S[:, _DIAG4, _DIAG4] += _variance(mean[:, 3], _MEASURE_STD)
+        PHt = cov[:, :, :4]
+        #  K = P H^T S^-1 (S symmetrisch)
+        K = np.linalg.solve(S, PHt.transpose(0, 2, 1)).transpose(0, 2, 1)
+        innovation = measurements - mean[:, :4]
+        self._mean[rows] = mean + np.einsum('nij,nj->ni', K, innovation)
+        self._cov[rows] = cov - K @ S @ K.transpose(0, 2, 1)
+
+    def _initiate(self, measurements):
+        mean = np.hstack([measurements, np.zeros_like(measurements)])
+        cov = np.zeros((len(measurements), 8, 8))
+        cov[:, _DIAG8, _DIAG8] = _variance(measurements[:, 3], _INITIATE_STD)
+        return mean, cov
+
+    def _associate(self, boxes, rows, dets, det_idx, threshold, fuse):
+        #  Tracks `rows` gegen Detektionen `det_idx`: zugeordnete Tracks bekommen ihre
+        #  Messung; zurück kommen die freien Tracks und Detektionen
+        if len(rows) == 0 or len(det_idx) == 0:
+            return rows, det_idx
+        candidates = dets[det_idx]
+        iou = iou_matrix(boxes[rows], candidates[:, :4])
+        if fuse and self.fuse_score:
+            iou *= candidates[None, :, 4]
+        pair_rows, pair_cols, free_rows, free_cols = _match(1.0 - iou, threshold)
+        self._assign(rows[pair_rows], candidates[pair_cols])
+        return rows[free_rows], det_idx[free_cols]
+
+    def update(self, dets):
+        self.frame_id += 1
+        dets = as_detections(dets if dets is not None else ())
+        scores = dets[:, 4]
+        high = np.flatnonzero(scores >= self.high_score)
+        low = np.flatnonzero((scores >= self.low_score) & (scores < self.high_score))
+        if len(self._ids):
+            self._predict()
+        #  vorhergesagte Boxen aller Tracks, einmal pro Frame
+        boxes = _to_boxes(self._mean)
+
+        # 1. confirmed + lost tracks vs. confident detections
+        pool = np.flatnonzero(self._state != TENTATIVE)
+        rest, high = self._associate(boxes, pool, dets, high, self.match_cost, True)
+
+        # 2. still running tracks vs. low-score detections (occlusion, blur)
+        rest = rest[self._state[rest] == TRACKED]
+        unmatched, _ = self._associate(boxes, rest, dets, low, self.low_match_cost, False)
+        self._state[unmatched] = LOST
+
+        # 3. tentative tracks (one hit so far) vs. the remaining confident detections
+        tentative = np.flatnonzero(self._state == TENTATIVE)
+        unconfirmed, high = self._associate(boxes, tentative, dets, high, self.tentative_match_cost, True)
+
+        #  unbestätigte ohne Treffer und lange verlorene Tracks entfernen
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[unconfirmed] = False
+        keep &= ~((self._state == LOST) & (self.frame_id - self._last_seen > self.max_lost))
+        if not keep.all():
+            self._keep(keep)
+        self._remove_duplicates()
+
+        # 4. new tracks
+        new = high[scores[high] >= self.new_track_score]
+        if len(new):
+            mean, cov = self._initiate(_to_xyah(dets[new, :4].astype(np.float64)))
+            count = len(new)
+            self._ids = np.concatenate([self._ids, np.arange(self.next_id, self.next_id + count)])
+            self.next_id += count
+            #  im allerersten Frame sofort bestätigt (wie ByteTrack)
+            state = TRACKED if self.frame_id == 1 else TENTATIVE
+            self._state = np.concatenate([self._state, np.full(count, state, dtype=np.int8)])
+            self._mean = np.concatenate([self._mean, mean])
+            self._cov = np.concatenate([self._cov, cov])
+            self._start = np.concatenate([self._start, np.full(count, self.frame_id)])
+            self._last_seen = np.concatenate([self._last_seen, np.full(count, self.frame_id)])
+
+        out = np.flatnonzero((self._state == TRACKED) & (self._last_seen == self.frame_id))
+        if len(out) == 0:
+            return np.empty((0, 5))
+        return np.hstack([_to_boxes(self._mean[out]), self._ids[out, None].astype(np.float64)])
+
+    def _assign(self, rows, dets):
+        if len(rows) == 0:
+            return
+        self._update(rows, _to_xyah(dets[:, :4].astype(np.float64)))
+        self._state[rows] = TRACKED
+        self._last_seen[rows] = self.frame_id
+
+    def _keep(self, keep):
+        self._ids = self._ids[keep]
+        self._state = self._state[keep]
+        self._mean = self._mean[keep]
+        self._cov = self._cov[keep]
+        self._start = self._start[keep]
+        self._last_seen = self._last_seen[keep]
+
+    def _remove_duplicates(self):
+        #  laufender und verlorener Track auf derselben Person: der jüngere fliegt
+        tracked = np.flatnonzero(self._state == TRACKED)
+        lost = np.flatnonzero(self._state == LOST)
+        if len(tracked) == 0 or len(lost) == 0:
+            return
+        boxes = _to_boxes(self._mean)
+        a, b = np.nonzero(iou_matrix(boxes[tracked], boxes[lost]) > self.duplicate_iou)
+        if len(a) == 0:
+            return
+        a, b = tracked[a], lost[b]
+        age_a = self.frame_id - self._start[a]
+        age_b = self._last_seen[b] - self._start[b]
+        drop = np.where(age_a > age_b, b, a)
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[drop] = False
+        self._keep(keep)
@@ -0,0 +1,198 @@
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+
+
+#  größer als jeder z16-Wert: Löcher für das Minimum (erode) ausblenden
+_NO_DEPTH = 65536.0
+
+
+class DepthFilterChain:
+    #  Filterkette wie die librealsense-Postprocessing-Blöcke (spatial -> temporal ->
+    #  hole filling), aber nur auf der ROI statt auf dem ganzen Frame. Alle Puffer
+    #  haben ROI-Größe, werden einmal angelegt und in place aktualisiert; ändert sich
+    #  das Rechteck, beginnt der Temporalfilter neu.
+    #  - spatial: Ausreißer (weiter als speckle_mm vom 3x3-Median) werden zu Löchern,
+    #    dann kantenerhaltend über cv2.bilateralFilter (Gewicht fällt mit der
+    #    Tiefendifferenz, Sprünge Gesicht/Hintergrund bleiben scharf, Löcher bleiben 0)
+    #  - temporal: exponentielles Mittel pro Pixel; Sprung > delta_mm setzt den Pixel
+    #    zurück (Bewegung), ein Loch behält bis zu `persistence` Frames den letzten Wert.
+    #    In Personenboxen (boxes, die Tracks) wird das Mittel vorher um die mittlere
+    #    Tiefenänderung der Box verschoben: wer auf die Kamera zugeht, ändert seine Tiefe
+    #    als Ganzes (1 m/s sind bei 30 FPS 33 mm pro Frame, so viel wie delta_mm), das
+    #    Mittel läuft mit statt hinterherzuhinken, geglättet wird nur das Rauschen
+    #  - hole_fill: verbleibende Löcher aus der 3x3-Nachbarschaft ("farthest" wie
+    #    librealsense farest_from_around, "nearest"), `hole_passes` Durchläufe. Aus per
+    #    Default: die Sampler ignorieren 0 ohnehin, und an Personenkanten erfindet das
+    #    Füllen Tiefen (Wand in die Person bzw. umgekehrt)
+    #  Stufen mit None/0 werden übersprungen. Zeiten je Filter über den span-Callback
+    #  der Engine (depth_spatial, depth_temporal, depth_hole_fill). apply() schreibt
+    #  das Ergebnis in die ROI des übergebenen Frames zurück, der Rest bleibt unberührt
+    #  (kein Kopieren des ganzen Bilds).
+    def __init__(self, spatial_diameter=5, spatial_sigma_mm=50.0, spatial_sigma_px=2.0, speckle_mm=100.0,
+                 temporal_alpha=0.4, temporal_delta_mm=30.0, persistence=3, hole_fill=None, hole_passes=1):
+        if hole_fill not in (None, "farthest", "nearest"):
+            raise ValueError(f"unknown hole fill mode {hole_fill!r}")
+        self.spatial_diameter = spatial_diameter
+        self.spatial_sigma_mm = spatial_sigma_mm
+        self.spatial_sigma_px = spatial_sigma_px
+        self.speckle_mm = speckle_mm
+        self.temporal_alpha = temporal_alpha
+        self.temporal_delta_mm = temporal_delta_mm
+        self.persistence = persistence
+        self.hole_fill = hole_fill
+        self.hole_passes = hole_passes
+        self._rect = None
+        self._shape = None
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
+
+    def _allocate(self, shape):
+        self._shape = shape
+        self._raw = np.empty(shape, dtype=np.float32)
+        self._smooth = np.empty(shape, dtype=np.float32)
+        self._avg = np.zeros(shape, dtype=np.float32)
+        self._age = np.zeros(shape, dtype=np.uint8)
+        self._tmp = np.empty(shape, dtype=np.float32)
+        self._valid = np.empty(shape, dtype=bool)
+        self._blend = np.empty(shape, dtype=bool)
+        self._filled = np.empty(shape, dtype=np.float32)
+        self._box_valid = np.empty(shape, dtype=bool)
+
+    def reset(self):
+        #  Temporalzustand verwerfen (Szenenwechsel, neue ROI)
+        if self._shape is not None:
+            self._avg.fill(0.0)
+            self._age.fill(0)
+
+    def apply(self, depth, rect, span=None, boxes=()):
+        #  filtert rect (x1, y1, x2, y2) von depth in place und gibt depth zurück;
+        #  boxes: Personenboxen (x1, y1, x2, y2, ...) in Framekoordinaten
+        span = span or (lambda stage: nullcontext())
+        height, width = depth.shape[:2]
+        x1, y1, x2, y2 = (int(v) for v in rect)
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+        if x2 <= x1 or y2 <= y1:
+            return depth
+        shape = (y2 - y1, x2 - x1)
+        if shape != self._shape:
+            self._allocate(shape)
+        elif (x1, y1, x2, y2) != self._rect:
+            self.reset()
+        self._rect = (x1, y1, x2, y2)
+
+        np.copyto(self._raw, depth[y1:y2, x1:x2], casting="unsafe")
+        current = self._raw
+        if self.spatial_diameter:
+            with span("depth_spatial"):
+                current = self._spatial(current)
+        if self.temporal_alpha:
+            with span("depth_temporal"):
+                self._follow_boxes(current, boxes)
+                current = self._temporal(current)
+        if self.hole_fill is not None and self.hole_passes > 0:
+            with span("depth_hole_fill"):
+                current = self._fill_holes(current)
+        #  runden ohne den Temporalzustand anzufassen (Werte >= 0)
+        np.add(current, 0.5, out=self._tmp)
+        np.copyto(depth[y1:y2, x1:x2], self._tmp, casting="unsafe")
+        return depth
+
+    def _spatial(self, raw):
+        if self.speckle_mm:
+            cv2.medianBlur(raw, 3, dst=self._tmp)
+            np.subtract(raw, self._tmp, out=self._tmp)
+            np.copyto(raw, 0.0, where=np.abs(self._tmp, out=self._tmp) > self.speckle_mm)
+        cv2.bilateralFilter(raw, self.spatial_diameter, self.spatial_sigma_mm, self.spatial_sigma_px,
+                            dst=self._smooth)
+        #  Löcher bleiben Löcher (sonst verschmiert das Filter 0 in die Nachbarn)
+        np.copyto(self._smooth, 0.0, where=raw == 0)
+        return self._smooth
+
+    def _follow_boxes(self, current, boxes):
+        #  Mittel je Box um den Median der Änderung verschieben (nur Pixel mit altem und
+        #  neuem Wert, die Box kann auch Hintergrund enthalten; der Median gehört der
+        #  Person, solange sie die Box überwiegend füllt)
+        rx1, ry1, rx2, ry2 = self._rect
+        for box in boxes:
+            x1, y1 = max(int(box[0]), rx1) - rx1, max(int(box[1]), ry1) - ry1
+            x2, y2 = min(int(box[2]), rx2) - rx1, min(int(box[3]), ry2) - ry1
+            if x2 <= x1 or y2 <= y1:
+                continue
+            avg = self._avg[y1:y2, x1:x2]
+            cur = current[y1:y2, x1:x2]
+            valid = self._box_valid[y1:y2, x1:x2]
+            np.greater(avg, 0, out=valid)
+            valid &= cur > 0
+            if not valid.any():
+                continue
+            shift = float(np.median(cur[valid] - avg[valid]))
+            np.add(avg, shift, out=avg, where=avg > 0)
+
+    def _temporal(self, current):
+        avg, age, tmp, valid, blend = self._avg, self._age, self._tmp, self._valid, self._blend
+        np.greater(current, 0, out=valid)
+        #  mitteln nur, wo es schon einen Wert gibt und die Änderung klein ist
+        #  (avg == 0 heißt kein Wert: |current - 0| liegt weit über delta)
+        np.subtract(current, avg, out=tmp)
+        np.less(np.abs(tmp, out=self._filled), self.temporal_delta_mm, out=blend)
+        blend &= valid
+        tmp *= self.temporal_alpha
+        np.add(avg, tmp, out=avg, where=blend)
+        #  gültig, aber nicht gemittelt: neuer Wert (Bewegung oder erster Treffer)
+        np.logical_xor(valid, blend, out=blend)
+        np.copyto(avg, current, where=blend)
+        #  Alter seit dem letzten gültigen Wert; der Überlauf nach 255 ist harmlos,
+        #  avg ist dann längst 0
+        np.logical_not(valid, out=blend)
+        np.add(age, 1, out=age, where=blend)
+        np.copyto(age, 0, where=valid)
+        holes = np.flatnonzero(blend)
+        if holes.size:
+            self._expire(current, holes)
+        return avg
+
+    def _expire(self, current, holes):
+        #  Löcher halten ihren Wert höchstens `persistence` Frames, und nur, wenn er zur
+        #  aktuellen 3x3-Nachbarschaft passt: an einer bewegten Kante (Person vor Wand)
+        #  hielte das Loch sonst die alte Wandtiefe
+        avg = self._avg.reshape(-1)
+        kept = holes[avg[holes] > 0]
+        if kept.size == 0:
+            return
+        stale = self._age.reshape(-1)[kept] > self.persistence
+        if self.persistence:
+            height, width = self._shape
+            flat = current.reshape(-1)
+            col = kept % width
+            neighbours = np.stack([
+                flat[np.where(col > 0, kept - 1, kept)],
+                flat[np.where(col < width - 1, kept + 1, kept)],
+                flat[np.where(kept >= width, kept - width, kept)],
+                flat[np.where(kept + width < flat.size, kept + width, kept)],
+            ])
+            #  ohne gültige Nachbarn bleibt der Wert
+            highest = neighbours.max(axis=0)
+            lowest = np.where(neighbours > 0, neighbours, _NO_DEPTH).min(axis=0)
+            held = avg[kept]
+            stale |= (held > highest + self.temporal_delta_mm) & (highest > 0)
+            stale |= (held < lowest - self.temporal_delta_mm) & (lowest < _NO_DEPTH)
+        avg[kept[stale]] = 0.0
+
+    def _fill_holes(self, current):
+        filled = self._filled
+        np.copyto(filled, current)
+        for _ in range(self.hole_passes):
+            holes = filled == 0
+            if not holes.any():
+                break
+            if self.hole_fill == "farthest":
+                #  0 zählt beim Maximum nicht mit
+                neighbours = cv2.dilate(filled, self._kernel, dst=self._tmp)
+            else:
+                np.copyto(self._tmp, filled)
+                np.copyto(self._tmp, _NO_DEPTH, where=holes)
+                neighbours = cv2.erode(self._tmp, self._kernel)
+                neighbours[neighbours >= _NO_DEPTH] = 0.0
+            np.copyto(filled, neighbours, where=holes)
+        return filled
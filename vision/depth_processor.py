@@ -1,3 +1,8 @@
+import bisect
+from functools import lru_cache
+
+import numpy as np
+
 from utils.config import (
     TRUE_DISTANCES_M,
     INSIDE_GOOD_LIGHTING,
@@ -7,13 +12,16 @@ from utils.config import (
 )
 
 
+DEPTH_LUT_SIZE = 65536  # alle z16-Werte
+CORRECTION_CLAMP_M = 10.0
+
+
 def correct_distance(measured_m: float, lighting_condition: list[float]) -> float:
-    import bisect
     pos = bisect.bisect_left(lighting_condition, measured_m)
     if pos == 0:
         return measured_m
     elif pos == len(lighting_condition):
-        return 10.0
+        return CORRECTION_CLAMP_M
     else:
         prev_meas = lighting_condition[pos - 1]
         next_meas = lighting_condition[pos]
@@ -32,4 +40,46 @@ def get_lighting_lut(lichtbedingung: str | None) -> list[float]:
         return OUTSIDE_GOOD_LIGHTING
     elif lichtbedingung == "Draußen - Schlechtes Licht":
         return OUTSIDE_BAD_LIGHTING
-    return INSIDE_BAD_LIGHTING
\ No newline at end of file
+    return INSIDE_BAD_LIGHTING
+
+
+def build_correction_lut(lighting_condition: list[float]) -> np.ndarray:
+    #  Index = rohe z16-Millimeter, Wert = korrigierte Millimeter (gerundet).
+    #  Gleiche Bisect-Semantik wie correct_distance, auch bei nicht monotonen Tabellen.
+    lut = np.full(DEPTH_LUT_SIZE, int(round(CORRECTION_CLAMP_M * 1000)), dtype=np.uint16)
+    #  oberhalb des größten Messwerts liefert bisect immer len() -> Klemmwert
+    last_mm = min(DEPTH_LUT_SIZE - 1, int(np.ceil(max(lighting_condition) * 1000)))
+    for mm in range(last_mm + 1):
+        measured_m = mm / 1000.0
+        if bisect.bisect_left(lighting_condition, measured_m) == len(lighting_condition):
+            continue
+        lut[mm] = int(round(correct_distance(measured_m, lighting_condition) * 1000))
+    return lut
+
+
+class DepthCorrector:
+    #  Lichtabhängige Korrektur als ein einziger Gather über beliebige z16-Arrays
+    def __init__(self, lighting_condition: list[float]):
+        self.lighting_condition = lighting_condition
+        self.lut = build_correction_lut(lighting_condition)
+
+    def correct(self, depth_mm: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        #  uint16 rein, korrigierte uint16-Millimeter raus (auch ganze Tiefenbilder)
+        return np.take(self.lut, depth_mm, out=out)
+
+    def correct_mm(self, depth_mm: float) -> int:
+        index = min(DEPTH_LUT_SIZE - 1, max(0, int(round(depth_mm))))
+        return int(self.lut[index])
+
+    def correct_m(self, measured_m: float) -> float:
+        return self.correct_mm(measured_m * 1000.0) / 1000.0
+
+
+@lru_cache(maxsize=None)
+def _corrector_for(lichtbedingung: str | None) -> DepthCorrector:
+    return DepthCorrector(get_lighting_lut(lichtbedingung))
+
+
+def get_depth_corrector(lichtbedingung: str | None) -> DepthCorrector:
+    #  LUT wird pro Lichtbedingung nur einmal gebaut
+    return _corrector_for(lichtbedingung)
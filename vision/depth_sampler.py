@@ -0,0 +1,136 @@
+import numpy as np
+import cv2
+
+
+def histogram_median_mm(values_mm):
+    #  Median gültiger Werte (> 0) über ein Histogramm der ganzen Millimeter;
+    #  bei gerader Anzahl Mittel der beiden mittleren Werte wie np.median
+    values_mm = np.asarray(values_mm).ravel()
+    values_mm = values_mm[values_mm > 0]
+    n = values_mm.size
+    if n == 0:
+        return 0.0
+    cumulative = np.cumsum(np.bincount(values_mm))
+    lower = int(np.searchsorted(cumulative, (n - 1) // 2 + 1))
+    upper = int(np.searchsorted(cumulative, n // 2 + 1))
+    return (lower + upper) / 2.0
+
+
+def histogram_mode_mm(values_mm, bin_mm=10):
+    #  häufigste Tiefe (Mitte des vollsten bin_mm-Bins), robust gegen Hintergrund im Randbereich
+    values_mm = np.asarray(values_mm).ravel()
+    values_mm = values_mm[values_mm > 0]
+    if values_mm.size == 0:
+        return 0.0
+    counts = np.bincount(values_mm // bin_mm)
+    return float(int(np.argmax(counts)) * bin_mm + bin_mm // 2)
+
+
+class DepthSampler:
+    #  Tiefenabfragen eines Frames, alles in uint16-Millimetern bis zum Ergebnis.
+    #  Rechteck-Mittelwerte über Integralbilder (Summe und Anzahl gültiger Pixel)
+    #  für `region` (z.B. die ROI). Gebaut werden sie erst, wenn die abgefragte
+    #  Fläche die halbe Region übersteigt; ein einzelnes Gesichtsrechteck ist
+    #  direkt summiert billiger als ein Integralbild der ganzen ROI.
+    def __init__(self, depth_mm, region=None):
+        self.depth = depth_mm
+        height, width = depth_mm.shape[:2]
+        if region is None:
+            region = (0, 0, width, height)
+        rx1, ry1, rx2, ry2 = (int(v) for v in region)
+        self.region = (max(0, rx1), max(0, ry1), min(width, rx2), min(height, ry2))
+        self._sum = None
+        self._count = None
+        self._queried = 0
+
+    def _build(self):
+        rx1, ry1, rx2, ry2 = self.region
+        patch = self.depth[ry1:ry2, rx1:rx2]
+        #  64-Bit-Summe: 65535 mm * 1280 * 720 passt nicht in int32
+        self._sum = cv2.integral(patch, sdepth=cv2.CV_64F)
+        self._count = cv2.integral((patch > 0).astype(np.uint8), sdepth=cv2.CV_32S)
+
+    def rect_sums(self, boxes):
+        #  (Summe mm, Anzahl gültiger Pixel) für Nx4-Boxen in Bildkoordinaten, auf region geklemmt
+        rx1, ry1, rx2, ry2 = self.region
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        x1 = np.clip(boxes[:, 0] - rx1, 0, rx2 - rx1)
+        y1 = np.clip(boxes[:, 1] - ry1, 0, ry2 - ry1)
+        x2 = np.clip(boxes[:, 2] - rx1, 0, rx2 - rx1)
+        y2 = np.clip(boxes[:, 3] - ry1, 0, ry2 - ry1)
+        x2, y2 = np.maximum(x1, x2), np.maximum(y1, y2)
+        if self._sum is None:
+            self._queried += int(np.sum((x2 - x1) * (y2 - y1)))
+            if self._queried * 2 <= (rx2 - rx1) * (ry2 - ry1):
+                sums = np.empty(len(boxes), dtype=np.float64)
+                counts = np.empty(len(boxes), dtype=np.int64)
+                for i in range(len(boxes)):
+                    patch = self.depth[ry1 + y1[i]:ry1 + y2[i], rx1 + x1[i]:rx1 + x2[i]]
+                    sums[i] = patch.sum(dtype=np.uint64)
+                    counts[i] = np.count_nonzero(patch)
+                return sums, counts
+            self._build()
+        s, c = self._sum, self._count
+        sums = s[y2, x2] - s[y1, x2] - s[y2, x1] + s[y1, x1]
+        counts = c[y2, x2] - c[y1, x2] - c[y2, x1] + c[y1, x1]
+        return sums, counts
+
+    def rect_means_mm(self, boxes):
+        sums, counts = self.rect_sums(boxes)
+        return np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)
+
+    def rect_mean_mm(self, x1, y1, x2, y2):
+        #  Mittel der gültigen Pixel eines Rechtecks, 0.0 wenn keins gültig ist
+        return float(self.rect_means_mm((x1, y1, x2, y2))[0])
+
+    def window_values(self, centers, half=5):
+        #  alle Pixel der Fenster [x-half, x+half) x [y-half, y+half) um die Punkte
+        #  (am Bildrand abgeschnitten, Überlappungen zählen mehrfach) und die Fensterboxen
+        height, width = self.depth.shape[:2]
+        centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+        offsets = np.arange(-half, half)
+        xs = centers[:, 0, None] + offsets
+        ys = centers[:, 1, None] + offsets
+        inside = ((xs >= 0) & (xs < width))[:, None, :] & ((ys >= 0) & (ys < height))[:, :, None]
+        values = self.depth[np.clip(ys, 0, height - 1)[:, :, None], np.clip(xs, 0, width - 1)[:, None, :]]
+        windows = np.stack([
+            np.maximum(0, centers[:, 0] - half), np.maximum(0, centers[:, 1] - half),
+            np.minimum(width, centers[:, 0] + half), np.minimum(height, centers[:, 1] + half),
+        ], axis=1)
+        return values[inside], windows
+
+    def windows_median_mm(self, centers, half=5):
+        values, windows = self.window_values(centers, half)
+        return histogram_median_mm(values), windows
+
+    def mask_values(self, x1, y1, mask):
+        #  Tiefen unter einer bool-Maske, deren linke obere Ecke bei (x1, y1) liegt
+        height, width = mask.shape[:2]
+        return self.depth[y1:y1 + height, x1:x1 + width][mask[:self.depth.shape[0] - y1, :self.depth.shape[1] - x1]]
+
+    def mask_mean_mm(self, x1, y1, mask):
+        #  wie rect_mean_mm, aber nur unter der Maske
+        values = self.mask_values(x1, y1, mask)
+        values = values[values > 0]
+        return float(values.mean()) if values.size else 0.0
+
+    def mask_median_mm(self, x1, y1, mask):
+        return histogram_median_mm(self.mask_values(x1, y1, mask))
+
+    def mask_mode_mm(self, x1, y1, mask, bin_mm=10):
+        return histogram_mode_mm(self.mask_values(x1, y1, mask), bin_mm)
+
+    def mask_samples(self, x1, y1, mask, ratio):
+        #  gleichmäßig ausgedünnte Maskenpunkte statt np.random.choice:
+        #  jeder n-te Maskenpixel, Ergebnis (x, y, Tiefe mm) nur mit gültiger Tiefe
+        flat = np.flatnonzero(mask)
+        if flat.size == 0:
+            return None
+        stride = max(1, int(round(1.0 / ratio))) if ratio > 0 else flat.size
+        flat = flat[stride // 2::stride] if flat.size > stride else flat[:1]
+        ys, xs = np.divmod(flat, mask.shape[1])
+        xs = xs + x1
+        ys = ys + y1
+        depths = self.depth[ys, xs]
+        valid = depths > 0
+        return xs[valid], ys[valid], depths[valid]
@@ -0,0 +1,84 @@
+import numpy as np
+import cv2
+
+
+class FaceLock:
+    #  Hält die Gesichtsbox der fokussierten Person zwischen zwei Detektionen per
+    #  Template-Matching nach. Der Detektor läuft nur alle `cadence` Frames, bei
+    #  schwachem Detektionsscore, bei Trackwechsel oder wenn das Matching driftet
+    #  (Korrelation < min_match bzw. Box verlässt die Personenbox).
+    def __init__(self, cadence=10, min_score=0.5, min_match=0.6, search_margin=0.5):
+        self.cadence = cadence
+        self.min_score = min_score
+        self.min_match = min_match
+        self.search_margin = search_margin
+        self.detections = 0
+        self.tracked = 0
+        self.drift_resets = 0
+        self.reset()
+
+    def reset(self):
+        self.track_id = None
+        self.box = None
+        self.template = None
+        self.score = 0.0
+        self.match = 0.0
+        self.age = 0
+
+    def due(self, track_id):
+        return (self.template is None or track_id != self.track_id
+                or self.age >= self.cadence or self.score < self.min_score)
+
+    def lock(self, track_id, box, score, patch_bgr):
+        #  nach einer echten Detektion: Box und Template übernehmen
+        self.detections += 1
+        if patch_bgr.size == 0:
+            self.reset()
+            return
+        self.track_id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.template = cv2.cvtColor(patch_bgr, cv2.COLOR_BGR2GRAY)
+        self.score = float(score)
+        self.match = 1.0
+        self.age = 0
+
+    def lost(self):
+        #  Detektion ohne Gesicht
+        self.detections += 1
+        self.reset()
+
+    def follow(self, frame, person_box):
+        #  neue Box in Bildkoordinaten oder None (dann muss detektiert werden)
+        x1, y1, x2, y2 = self.box
+        th, tw = self.template.shape
+        mx, my = int(tw * self.search_margin) + 1, int(th * self.search_margin) + 1
+        px1, py1, px2, py2 = (int(v) for v in person_box)
+        sx1, sy1 = max(px1, x1 - mx, 0), max(py1, y1 - my, 0)
+        sx2, sy2 = min(px2, x2 + mx, frame.shape[1]), min(py2, y2 + my, frame.shape[0])
+        if sx2 - sx1 < tw or sy2 - sy1 < th:
+            return self._drift()
+        window = cv2.cvtColor(frame[sy1:sy2, sx1:sx2], cv2.COLOR_BGR2GRAY)
+        result = cv2.matchTemplate(window, self.template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if not np.isfinite(max_val) or max_val < self.min_match:
+            return self._drift()
+        nx1, ny1 = sx1 + max_loc[0], sy1 + max_loc[1]
+        self.box = (nx1, ny1, nx1 + tw, ny1 + th)
+        self.match = float(max_val)
+        self.age += 1
+        self.tracked += 1
+        return self.box
+
+    def _drift(self):
+        self.drift_resets += 1
+        self.reset()
+        return None
+
+    def stats(self):
+        total = self.detections + self.tracked
+        return {
+            "detections": self.detections,
+            "tracked": self.tracked,
+            "drift_resets": self.drift_resets,
+            "saved_ratio": self.tracked / total if total else 0.0,
+        }
@@ -0,0 +1,639 @@
+import time
+from collections import deque, namedtuple
+from contextlib import nullcontext
+
+import numpy as np
+import cv2
+
+from utils.config import (
+    HYSTERESIS_THRESHOLD,
+    MASK_SAMPLE_RATIO_UNTRACKED,
+    MASK_CACHE_ENABLED,
+    MASK_CACHE_IOU,
+    MASK_CACHE_MAX_AGE,
+    MASK_CACHE_CAPACITY,
+    SEG_MODE,
+    SEG_ASSIGN_MIN_IOU,
+    FACE_LOCK_ENABLED,
+    FACE_DETECT_CADENCE,
+    FACE_LOCK_MIN_SCORE,
+    FACE_LOCK_MIN_MATCH,
+    FACE_LOCK_SEARCH_MARGIN,
+    TARGET_FILTER_ENABLED,
+    TARGET_FILTER_PROCESS_NOISE,
+    TARGET_FILTER_MEASUREMENT_NOISE,
+    TARGET_FILTER_GATE,
+    TARGET_FILTER_MAX_REJECTS,
+    TARGET_FILTER_MAX_LEAD_S,
+    DEPTH_FILTER_ENABLED,
+    DEPTH_FILTER_SPATIAL_DIAMETER,
+    DEPTH_FILTER_SPATIAL_SIGMA_MM,
+    DEPTH_FILTER_SPECKLE_MM,
+    DEPTH_FILTER_TEMPORAL_ALPHA,
+    DEPTH_FILTER_TEMPORAL_DELTA_MM,
+    DEPTH_FILTER_PERSISTENCE,
+    DEPTH_FILTER_HOLE_FILL,
+    TRACKER_MAX_LOST,
+    TRACK_HISTORY_LENGTH,
+    OCCLUSION_DEPTH_GRID,
+)
+from hardware.lens_profile import get_lens_profile
+from hardware.motor_controller import planned_move_duration
+from vision.byte_tracker import as_detections
+from vision.inference_scheduler import CompletedCall
+from vision.mask_cache import MaskCache
+from vision.mask_assignment import RoiSegmentation
+from vision.face_lock import FaceLock
+from vision.depth_sampler import DepthSampler
+from vision.depth_filters import DepthFilterChain
+from vision.occlusion import OcclusionMap, box_median_depths
+from vision.target_filter import TargetFilter
+from vision.track_store import TrackStore
+
+
+#  Ergebnis eines Engine-Schritts; die GUI zeichnet nur noch, was hier drinsteht
+FocusDecision = namedtuple('FocusDecision', [
+    'focus_distance',   # m, korrigiert + ST_CAM_OFFSET
+    'target_steps',
+    'moved',            # True, wenn in diesem Schritt ein Motorbefehl rausging
+    'roi',              # (x1, y1, x2, y2) in Framekoordinaten
+    'tracks',           # Nx5: x1, y1, x2, y2, track_id
+    'selected_id',
+    'face',             # FaceMeasurement oder None
+    'selected_mask',    # (x1, y1, bool-Maske) der Fokusperson oder None
+    'samples',          # (x, distance_m) Tiefenpunkte der übrigen Personen
+    'flow',             # FlowMeasurement oder None
+    'frame_id',
+    'frame',            # Farbbild, auf das sich die Entscheidung bezieht
+])
+#  tracked: Box stammt aus dem FaceLock statt aus einer Detektion
+FaceMeasurement = namedtuple('FaceMeasurement', ['box', 'corrected', 'uncorrected', 'tracked'], defaults=(False,))
+FlowMeasurement = namedtuple('FlowMeasurement', ['windows', 'center', 'corrected', 'uncorrected'])
+
+_NO_SAMPLES = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+
+class FocusEngine:
+    #  Detection -> Tracking -> Tiefe -> Motor, ohne Kivy. Wird von MainScreen und
+    #  vom Headless-Einstieg (headless.py) gleichermaßen benutzt.
+    def __init__(self, detector, tracker, motor, lichtbedingung=None, focus_time=0.0, timer=None,
+                 scheduler=None, pipeline_depth=2, tracer=None, clock=time.monotonic):
+        self.detector = detector
+        self.tracker = tracker
+        self.motor = motor
+        self.timer = timer
+        #  optional: utils.latency.LatencyTracer, Frames werden über trace_id verfolgt
+        self.tracer = tracer
+        #  Uhr für "jetzt" (Vorhersage, step() ohne captured_at); bei Wiedergabe
+        #  ReplayCamera.now, damit die Vorhaltezeit nicht vom Rechner abhängt
+        self.clock = clock
+        #  optional: InferenceScheduler für überlappende Inferenz über Frames hinweg
+        self.scheduler = scheduler
+        self.pipeline_depth = max(1, pipeline_depth)
+        self._pending = deque()
+        #  je offenem Frame ein Tiefenpuffer in Farbauflösung, gefüllt nur in der ROI
+        self._depth_buffers = [None] * self.pipeline_depth
+        self.frame_id = 0
+        #  Gesichtsdetektion mit reduzierter Rate (Zähler in face_lock.stats())
+        self.face_lock = FaceLock(FACE_DETECT_CADENCE, FACE_LOCK_MIN_SCORE, FACE_LOCK_MIN_MATCH,
+                                  FACE_LOCK_SEARCH_MARGIN) if FACE_LOCK_ENABLED else None
+        self.seg_mode = SEG_MODE
+        self._roi_seg = None
+        #  Segmentierungsmasken pro Track wiederverwenden (hits/misses in mask_cache.stats())
+        self.mask_cache = MaskCache(MASK_CACHE_IOU, MASK_CACHE_MAX_AGE, MASK_CACHE_CAPACITY) if MASK_CACHE_ENABLED else None
+        #  rohe mm -> Fokusdistanz/Motorschritte in einer vorberechneten Tabelle
+        self.lens = get_lens_profile(lichtbedingung)
+        self.corrector = self.lens.corrector
+        self.focus_time = focus_time
+
+        self.frame_width = 1280
+        self.frame_height = 720
+        self.roi_start = None
+        self.roi_end = None
+
+        self.selected_id = None
+        #  sichtbare Tracks plus Tiefen-/Maskenstand je ID, aktualisiert in _process
+        self.track_store = TrackStore(history=TRACK_HISTORY_LENGTH, max_missing=TRACKER_MAX_LOST)
+        #  wer wen verdeckt (Labelbild der ROI), neu aufgebaut in jedem _process
+        self.occlusion = OcclusionMap()
+        self.focus_locked_once = False
+
+        self.of_point_selected = False
+        self.of_point = ()
+        self.of_old_points = None
+        self.of_old_gray = None
+
+        self.last_target_distance = None
+        self.focus_distance = 0.0
+        self.focus_depth_mm = None  # Rohwert hinter focus_distance
+        #  Kalmanfilter auf focus_distance; der Motor zielt auf die vorhergesagte
+        #  Distanz bei Ankunft (Latenz seit Aufnahme + geplante Fahrzeit)
+        self.target_filter = TargetFilter(
+            TARGET_FILTER_PROCESS_NOISE, TARGET_FILTER_MEASUREMENT_NOISE, TARGET_FILTER_GATE,
+            TARGET_FILTER_MAX_REJECTS, TARGET_FILTER_MAX_LEAD_S,
+        ) if TARGET_FILTER_ENABLED else None
+        self.predicted_distance = None
+        self._measured = False
+        #  Qualitätsstufe (utils.quality_governor.QualityLevel), von außen per set_quality
+        self.quality = None
+        #  optional: hardware.depth_projection.DepthProjector, wenn die Kamera rohe
+        #  (nicht alignte) Tiefe liefert; dann wird nur die ROI abgebildet
+        self.depth_projector = None
+        #  Tiefenfilter nur auf der ROI (Zeiten als depth_spatial/-temporal/-hole_fill)
+        self.depth_filters = DepthFilterChain(
+            DEPTH_FILTER_SPATIAL_DIAMETER, DEPTH_FILTER_SPATIAL_SIGMA_MM, speckle_mm=DEPTH_FILTER_SPECKLE_MM,
+            temporal_alpha=DEPTH_FILTER_TEMPORAL_ALPHA, temporal_delta_mm=DEPTH_FILTER_TEMPORAL_DELTA_MM,
+            persistence=DEPTH_FILTER_PERSISTENCE, hole_fill=DEPTH_FILTER_HOLE_FILL,
+        ) if DEPTH_FILTER_ENABLED else None
+        self.untracked_every = 1
+        self.max_tracks = None
+        self.depth_filter_active = True
+        self._last_samples = _NO_SAMPLES
+
+    @property
+    def person_tracks(self):
+        return self.track_store.as_array()
+
+    def _span(self, stage):
+        return self.timer.span(stage) if self.timer is not None else nullcontext()
+
+    def ensure_roi(self, frame_width, frame_height):
+        #  ROI aus der Framegröße ableiten (nur beim ersten Frame)
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        if self.roi_start is None or self.roi_end is None:
+            self.roi_start = [int(frame_width * 0.37), int(frame_height * 0.37)]
+            self.roi_end = [int(frame_width * 0.61), int(frame_height * 0.65)]
+
+    def set_roi(self, x1, y1, x2, y2):
+        self.roi_start = [int(x1), int(y1)]
+        self.roi_end = [int(x2), int(y2)]
+        self.clear_point()
+
+    def select_track(self, track_id):
+        if self.selected_id != int(track_id):
+            self._reset_filter()
+        self.selected_id = int(track_id)
+        self.of_point_selected = False
+        self.focus_locked_once = False
+
+    def _reset_filter(self):
+        if self.target_filter is not None:
+            self.target_filter.reset()
+        self.predicted_distance = None
+
+    def select_point(self, x, y):
+        #  Punkt in Framekoordinaten; Optical Flow läuft in ROI-Koordinaten
+        roi_x1, roi_y1 = self.roi_start
+        roi_x2, roi_y2 = self.roi_end
+        if not (roi_x1 <= x < roi_x2 and roi_y1 <= y < roi_y2):
+            self.of_point_selected = False
+            return False
+        self.of_point = (int(x) - roi_x1, int(y) - roi_y1)
+        self.of_point_selected = True
+        self.of_old_points = np.array([[self.of_point]], dtype=np.float32)
+        self.selected_id = None
+        self.focus_locked_once = False
+        self._reset_filter()
+        return True
+
+    def select_at(self, x, y):
+        #  Antippen: kleinste Personenbox unter dem Punkt, sonst Optical-Flow-Punkt
+        track_id = self.track_store.hit_test(x, y)
+        if track_id is not None:
+            self.select_track(track_id)
+            return True
+        if self.roi_start is None:
+            return False
+        return self.select_point(x, y)
+
+    def clear_point(self):
+        self.of_point_selected = False
+        self.of_point = ()
+        self.of_old_points = None
+        self.of_old_gray = None
+
+    def reset(self):
+        self.selected_id = None
+        self.clear_point()
+        self.focus_locked_once = False
+        if self.mask_cache is not None:
+            self.mask_cache.clear()
+        if self.face_lock is not None:
+            self.face_lock.reset()
+        self._reset_filter()
+        if self.depth_filters is not None:
+            self.depth_filters.reset()
+        self._last_samples = _NO_SAMPLES
+
+    def set_quality(self, level):
+        self.quality = level
+        self.untracked_every = max(1, level.untracked_every)
+        self.max_tracks = level.max_tracks
+        if level.depth_filter and not self.depth_filter_active and self.depth_filters is not None:
+            #  Temporalzustand ist veraltet, neu einschwingen
+            self.depth_filters.reset()
+        self.depth_filter_active = level.depth_filter
+
+    def _processed_tracks(self):
+        #  Indizes der sichtbaren Tracks, die bearbeitet werden; bei max_tracks:
+        #  Fokusperson plus die größten (nächsten) übrigen Boxen
+        store = self.track_store
+        if self.max_tracks is None or len(store) <= self.max_tracks:
+            return range(len(store))
+        areas = store.areas()
+        if self.selected_id is not None:
+            areas[store.ids[store.visible] == self.selected_id] = np.inf
+        keep = np.argsort(-areas, kind="stable")[:self.max_tracks]
+        return np.sort(keep)
+
+    def focus_plane_pos(self, default):
+        current = self.motor.current_steps
+        return self.lens.focus_plane_m(current) if current != 0 else default
+
+    def _clamp_roi(self):
+        roi_x1, roi_y1 = self.roi_start
+        roi_x2, roi_y2 = self.roi_end
+        roi_x1 = max(0, min(self.frame_width - 10, roi_x1))
+        roi_y1 = max(0, min(self.frame_height - 10, roi_y1))
+        roi_x2 = max(roi_x1 + 10, min(self.frame_width, roi_x2))
+        roi_y2 = max(roi_y1 + 10, min(self.frame_height, roi_y2))
+        self.roi_start = [roi_x1, roi_y1]
+        self.roi_end = [roi_x2, roi_y2]
+        return roi_x1, roi_y1, roi_x2, roi_y2
+
+    def _call(self, model, fn, *args):
+        #  synchron oder über den Scheduler; beides liefert ein Objekt mit result()
+        if self.scheduler is None:
+            return CompletedCall(fn(*args))
+        return self.scheduler.submit(self.frame_id, model, fn, *args)
+
+    def _roi_crop(self, frame, roi):
+        roi_x1, roi_y1, roi_x2, roi_y2 = roi
+        with self._span("roi_crop"):
+            return frame[roi_y1:roi_y2, roi_x1:roi_x2].copy()
+
+    def _track(self, person_bboxes_roi, roi):
+        #  Detektionen (Nx5 mit Score, ROI-Koordinaten) in Bildkoordinaten an den Tracker
+        dets = as_detections(person_bboxes_roi)
+        dets[:, [0, 2]] += roi[0]
+        dets[:, [1, 3]] += roi[1]
+        with self._span("tracking"):
+            tracks = self.tracker.update(dets)
+        return tracks
+
+    def _build_occlusion(self, depth, roi, tracks):
+        #  Median-Tiefe je Box aus dem aktuellen Frame, sonst die zuletzt gemessene des Tracks
+        with self._span("occlusion"):
+            depths = box_median_depths(depth, tracks[:, :4], OCCLUSION_DEPTH_GRID)
+            store = self.track_store
+            depths = np.where(depths > 0, depths, store.depth_mm[store.visible])
+            self.occlusion.build(roi, tracks[:, :4], tracks[:, 4], depths)
+
+    def _submit_selected(self, frame, track):
+        x1, y1, x2, y2, track_id = track.astype(int)
+        x1c, y1c = max(0, x1), max(0, y1)
+        x2c, y2c = min(frame.shape[1], x2), min(frame.shape[0], y2)
+        if x2c <= x1c or y2c <= y1c:
+            return None
+        #  nur Personen davor werden geschwärzt
+        person_crop, visible = self.occlusion.masked_crop(frame, track_id, (x1c, y1c, x2c, y2c))
+        crop_info = (person_crop, x1c, y1c, x2c, y2c)
+        #  Gesicht zwischen den Detektionen per FaceLock nachführen
+        face_call = None
+        if self.face_lock is not None and not self.face_lock.due(int(track_id)):
+            with self._span("face_track"):
+                box = self.face_lock.follow(frame, crop_info[1:])
+            if box is not None:
+                bx1, by1, bx2, by2 = box
+                face_call = CompletedCall([(bx1 - x1c, by1 - y1c, bx2 - x1c, by2 - y1c, self.face_lock.score)])
+        detected = face_call is None
+        # Face detection and segmentation of the crop (parallel im Pipeline-Modus)
+        if detected:
+            face_call = self._call("face", self.detector.detect_faces, person_crop)
+        seg_call, cache_key = self._segment(int(track_id), crop_info[1:], person_crop)
+        return int(track_id), crop_info, face_call, detected, seg_call, cache_key, visible
+
+    def _segment(self, track_id, bbox, crop):
+        #  Maske aus dem Cache oder Segmentierung anstoßen; cache_key != None heißt
+        #  "Ergebnis nach dem Einsammeln speichern"
+        if self.mask_cache is not None:
+            cached = self.mask_cache.lookup(track_id, bbox)
+            if cached is not None:
+                return CompletedCall(cached), None
+        if self._roi_seg is not None:
+            return self._roi_seg.request(track_id, bbox), (track_id, bbox)
+        if callable(crop):
+            crop = crop()
+        return self._call("seg", self.detector.segment_person, crop), (track_id, bbox)
+
+    def _store_mask(self, cache_key, mask_bin):
+        if cache_key is None:
+            return
+        self.track_store.record_mask(cache_key[0])
+        if self.mask_cache is not None:
+            self.mask_cache.store(cache_key[0], cache_key[1], mask_bin)
+
+    def _measure_selected(self, sampler, job):
+        track_id, crop_info, face_call, detected, seg_call, cache_key, visible = job
+        person_crop, x1c, y1c, x2c, y2c = crop_info
+
+        with self._span("face_detect"):
+            face_results = face_call.result()
+        if detected and self.face_lock is not None:
+            if face_results:
+                fx1c, fy1c, fx2c, fy2c, fscore = face_results[0]
+                self.face_lock.lock(track_id, (fx1c + x1c, fy1c + y1c, fx2c + x1c, fy2c + y1c), fscore,
+                                    person_crop[max(0, int(fy1c)):int(fy2c), max(0, int(fx1c)):int(fx2c)])
+            else:
+                self.face_lock.lost()
+        face = None
+        for (fx1c, fy1c, fx2c, fy2c, fscore) in face_results:
+            fx1 = int(fx1c + x1c)
+            fy1 = int(fy1c + y1c)
+            fx2 = int(fx2c + x1c)
+            fy2 = int(fy2c + y1c)
+            with self._span("depth_sampling"):
+                #  teilweise verdecktes Gesicht: nur die sichtbaren Pixel mitteln
+                fx1, fy1 = max(0, fx1), max(0, fy1)
+                face_visible = self.occlusion.visible(track_id, (fx1, fy1, fx2, fy2))
+                if face_visible.all():
+                    uncorrected_mm = sampler.rect_mean_mm(fx1, fy1, fx2, fy2)
+                else:
+                    uncorrected_mm = sampler.mask_mean_mm(fx1, fy1, face_visible)
+                uncorrected = uncorrected_mm / 1000.0
+                corrected = self.corrector.correct_mm(uncorrected_mm) / 1000.0
+            self.focus_depth_mm = uncorrected_mm
+            self.track_store.record_depth(track_id, uncorrected_mm)
+            self.focus_distance = self.lens.focus_m_for_depth_mm(uncorrected_mm)
+            self._measured = uncorrected_mm > 0
+            face = FaceMeasurement((fx1, fy1, fx2, fy2), corrected, uncorrected, not detected)
+            break  # first face
+
+        # Person segmentation mask (overlay)
+        with self._span("segmentation"):
+            mask = seg_call.result()
+        selected_mask = None
+        if mask is not None:
+            mask = np.asarray(mask)
+            if mask.shape[:2] != person_crop.shape[:2]:
+                mask = cv2.resize(mask, (person_crop.shape[1], person_crop.shape[0]), interpolation=cv2.INTER_NEAREST)
+            mask_bin = mask > 0.5
+            self._store_mask(cache_key, mask_bin)
+            #  im Cache die ganze Maske, verdeckt wird pro Frame
+            selected_mask = (x1c, y1c, mask_bin & visible)
+        return face, selected_mask
+
+    def _submit_untracked(self, frame, track):
+        x1, y1, x2, y2, track_id = track.astype(int)
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        #  Crop nur kopieren, wenn wirklich segmentiert wird
+        seg_call, cache_key = self._segment(int(track_id), (x1, y1, x2, y2), lambda: frame[y1:y2, x1:x2].copy())
+        return int(track_id), x1, y1, (y2 - y1, x2 - x1), seg_call, cache_key
+
+    def _sample_untracked(self, sampler, job):
+        track_id, x1, y1, crop_shape, seg_call, cache_key = job
+        with self._span("segmentation"):
+            mask_nt = seg_call.result()
+        if mask_nt is None:
+            return None
+        with self._span("depth_sampling"):
+            mask_nt = np.asarray(mask_nt)
+            if mask_nt.shape[:2] != crop_shape:
+                mask_nt = cv2.resize(mask_nt, (crop_shape[1], crop_shape[0]), interpolation=cv2.INTER_NEAREST)
+            mask_bin = mask_nt > 0.5
+            self._store_mask(cache_key, mask_bin)
+            mask_bin &= self.occlusion.visible(track_id, (x1, y1, x1 + crop_shape[1], y1 + crop_shape[0]))
+            sampled = sampler.mask_samples(x1, y1, mask_bin, MASK_SAMPLE_RATIO_UNTRACKED)
+            if sampled is None:
+                return None
+            x_sample, _y_sample, depths_nt = sampled
+            if depths_nt.size:
+                self.track_store.record_depth(track_id, float(np.median(depths_nt)))
+            #  jeder Punkt wird direkt über die LUT korrigiert
+            distances_nt = self.lens.focus_m_for_depth(depths_nt)
+        return x_sample, distances_nt
+
+    def _track_point(self, gray_frame, sampler, roi):
+        roi_x1, roi_y1, roi_x2, roi_y2 = roi
+        with self._span("optical_flow"):
+            roi_gray = gray_frame[roi_y1:roi_y2, roi_x1:roi_x2].copy()
+            if self.of_old_gray is None:
+                self.of_old_gray = roi_gray.copy()
+            new_points, status, error = cv2.calcOpticalFlowPyrLK(
+                self.of_old_gray, roi_gray, self.of_old_points, None,
+                winSize=(15, 15), maxLevel=2,
+                criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+            )
+        good_new = new_points[status.flatten() == 1] if new_points is not None else []
+        flow = None
+        if good_new is not None and len(good_new) > 0:
+            good_new = good_new.reshape(-1, 2)
+            mean_x, mean_y = np.mean(good_new, axis=0)
+
+            with self._span("depth_sampling"):
+                centers = good_new.astype(np.int64) + (roi_x1, roi_y1)
+                median_mm, windows = sampler.windows_median_mm(centers, half=5)
+                windows = [tuple(w) for w in windows.tolist()]
+                uncorrected_of = median_mm / 1000.0
+                corrected_of = self.corrector.correct_m(uncorrected_of)
+            if corrected_of > 0:
+                self.focus_depth_mm = uncorrected_of * 1000.0
+                self.focus_distance = self.lens.focus_m_for_depth_mm(self.focus_depth_mm)
+                self._measured = True
+            flow = FlowMeasurement(windows, (int(mean_x) + roi_x1, int(mean_y) + roi_y1), corrected_of, uncorrected_of)
+            self.of_old_points = good_new.reshape(-1, 1, 2)
+        else:
+            self.of_point_selected = False
+            self.of_old_points = None
+        self.of_old_gray = roi_gray.copy()
+        return flow
+
+    def _target(self, captured, current_steps):
+        #  (Motorschritte, Distanz für die Hysterese): ohne Filter die letzte Messung,
+        #  mit Filter die Vorhersage für den Zeitpunkt, an dem der Motor ankommt. Die
+        #  Messung zählt zum Aufnahmezeitpunkt, die Vorhaltezeit umfasst also Kamera-
+        #  latenz, Verarbeitung und Fahrzeit
+        if self.target_filter is not None:
+            if self._measured:
+                self.target_filter.update(self.focus_distance, captured)
+            if self.target_filter.initialized:
+                now = self.clock()
+                focus_time = 0.001 if self.focus_locked_once else self.focus_time
+                distance = self.target_filter.predict(now)
+                duration = planned_move_duration(self.lens.steps_for_distance(distance) - current_steps, focus_time)
+                distance = self.target_filter.predict(now + duration)
+                self.predicted_distance = distance
+                return self.lens.steps_for_distance(distance), distance
+        if self.focus_depth_mm is not None:
+            return self.lens.steps_for_depth_mm(self.focus_depth_mm), self.focus_distance
+        return self.lens.steps_for_distance(self.focus_distance), self.focus_distance
+
+    def _mark(self, trace_id, stage):
+        if self.tracer is not None:
+            self.tracer.mark(trace_id, stage)
+
+    def _command_motor(self, captured, trace_id=None):
+        with self._span("motor_command"):
+            current_steps = self.motor.current_steps
+            target_steps, target_distance = self._target(captured, current_steps)
+            self._measured = False
+            steps_diff = abs(target_steps - current_steps)
+            if steps_diff <= 1 and not self.focus_locked_once:
+                self.focus_locked_once = True
+
+            moved = False
+            if (self.last_target_distance is None or
+                    abs(target_distance - self.last_target_distance) > HYSTERESIS_THRESHOLD):
+                self._mark(trace_id, "decided")
+                focus_time = 0.001 if self.focus_locked_once else self.focus_time
+                self.motor.move_to(target_steps, focus_time=focus_time, trace_id=trace_id)
+                self._mark(trace_id, "enqueued")
+                self.last_target_distance = target_distance
+                moved = True
+            elif self.tracer is not None:
+                #  keine Bewegung, also nichts zu messen
+                self.tracer.drop(trace_id)
+        return target_steps, moved
+
+    def step(self, color, depth, trace_id=None, captured_at=None):
+        #  captured_at: Aufnahmezeitpunkt in self.clock() (hardware.frame_ring.capture_time),
+        #  Zeitstempel der Messung im Zielfilter; die Vorhersage reicht von dort bis zur
+        #  Ankunft des Motors, deckt also auch Kamera->Host-Latenz ab. Ohne: jetzt.
+        #  Synchron: Entscheidung für genau diesen Frame.
+        #  Mit Scheduler: Personendetektion dieses Frames wird nur angestoßen und die
+        #  Entscheidung des ältesten offenen Frames zurückgegeben (None, solange die
+        #  Pipeline noch füllt). decision.frame ist das Bild, zu dem sie gehört.
+        self.frame_id += 1
+        captured = self.clock() if captured_at is None else captured_at
+        frame_height, frame_width = color.shape[:2]
+        self.ensure_roi(frame_width, frame_height)
+        roi = self._clamp_roi()
+
+        if self.scheduler is None:
+            roi_frame = self._roi_crop(color, roi)
+            with self._span("person_detect"):
+                boxes = self.detector.detect_person_bboxes(roi_frame) if roi_frame.size else []
+            self._mark(trace_id, "detected")
+            return self._process(self.frame_id, color, depth, roi, boxes, captured, trace_id)
+
+        #  Ringpuffer-Slots der Kamera sind nur bis zum nächsten Abholen gültig: das Bild
+        #  wird ganz gebraucht (Overlay, decision.frame), von der Tiefe nur die ROI
+        color = color.copy()
+        depth = self._own_depth(depth, roi)
+        roi_frame = self._roi_crop(color, roi)
+        future = self.scheduler.submit(self.frame_id, "person", self.detector.detect_person_bboxes, roi_frame)
+        self._pending.append((self.frame_id, color, depth, roi, future, captured, trace_id))
+        if len(self._pending) < self.pipeline_depth:
+            return None
+        return self._process_pending()
+
+    def _own_depth(self, depth, roi):
+        #  ROI der Tiefe in den Puffer dieses Frames kopieren (im sparse-Modus vorher
+        #  ausrichten, das Ergebnis des Projektors wird beim nächsten Frame überschrieben).
+        #  Außerhalb der ROI steht 0, also keine Tiefe, wie nach align_region
+        if self.depth_projector is not None:
+            with self._span("depth_align"):
+                depth = self.depth_projector.align_region(depth, roi)
+        index = self.frame_id % self.pipeline_depth
+        entry = self._depth_buffers[index]
+        if entry is None or entry[0].shape != depth.shape or entry[0].dtype != depth.dtype:
+            entry = [np.zeros_like(depth), None]
+            self._depth_buffers[index] = entry
+        buffer, filled = entry
+        x1, y1, x2, y2 = roi
+        if filled is not None and filled != roi:
+            fx1, fy1, fx2, fy2 = filled
+            buffer[fy1:fy2, fx1:fx2] = 0
+        buffer[y1:y2, x1:x2] = depth[y1:y2, x1:x2]
+        entry[1] = roi
+        return buffer
+
+    def flush(self):
+        #  restliche Frames der Pipeline abarbeiten
+        decisions = []
+        while self._pending:
+            decisions.append(self._process_pending())
+        return decisions
+
+    def _process_pending(self):
+        frame_id, color, depth, roi, future, captured, trace_id = self._pending.popleft()
+        with self._span("person_detect"):
+            boxes = future.result()
+        self._mark(trace_id, "detected")
+        return self._process(frame_id, color, depth, roi, boxes, captured, trace_id)
+
+    def _process(self, frame_id, color, depth, roi, boxes, captured, trace_id=None):
+        tracks = self._track(boxes, roi)
+        self.track_store.update(tracks)
+        if self.mask_cache is not None:
+            self.mask_cache.retain(tracks[:, 4] if len(tracks) else ())
+        if self.seg_mode == "roi" and len(tracks):
+            #  ein Seg-Aufruf für alle Personen der ROI statt einer pro Track
+            roi_x1, roi_y1, roi_x2, roi_y2 = roi
+            roi_frame = np.ascontiguousarray(color[roi_y1:roi_y2, roi_x1:roi_x2])
+            self._roi_seg = RoiSegmentation(
+                lambda: self._call("seg", self.detector.segment_persons, roi_frame),
+                roi, tracks, SEG_ASSIGN_MIN_IOU,
+            )
+        else:
+            self._roi_seg = None
+
+        #  ausrichten vor dem Verdeckungsbild, das die Tiefe der Boxen braucht
+        #  (mit Scheduler schon beim Übernehmen in _own_depth)
+        if self.depth_projector is not None and self.scheduler is None:
+            with self._span("depth_align"):
+                depth = self.depth_projector.align_region(depth, roi)
+        self._build_occlusion(depth, roi, tracks)
+
+        #  erst alle Inferenzen anstoßen, dann einsammeln
+        selected_job = None
+        untracked_jobs = []
+        untracked_due = frame_id % self.untracked_every == 0
+        for i in self._processed_tracks():
+            track = tracks[i]
+            if self.selected_id is not None and self.selected_id == int(track[4]):
+                selected_job = self._submit_selected(color, track)
+            elif untracked_due:
+                # Untracked persons contribute gray samples
+                job = self._submit_untracked(color, track)
+                if job is not None:
+                    untracked_jobs.append(job)
+
+        #  alle Tiefenabfragen dieses Frames über einen Sampler (Integralbilder nur für die ROI)
+        if self.depth_filters is not None and self.depth_filter_active:
+            #  in place, nur die ROI; der Temporalfilter folgt den Personen (Tracks)
+            depth = self.depth_filters.apply(depth, roi, self._span, tracks)
+        sampler = DepthSampler(depth, roi)
+        face = None
+        selected_mask = None
+        if selected_job is not None:
+            face, selected_mask = self._measure_selected(sampler, selected_job)
+        samples = []
+        for job in untracked_jobs:
+            sampled = self._sample_untracked(sampler, job)
+            if sampled is not None:
+                samples.append(sampled)
+
+        flow = None
+        if self.of_point_selected and self.of_old_points is not None:
+            gray_frame = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+            flow = self._track_point(gray_frame, sampler, roi)
+
+        target_steps, moved = self._command_motor(captured, trace_id)
+
+        if not untracked_due:
+            #  Frame ohne Tiefenpunkte der übrigen Personen: letzte Punkte weiter anzeigen
+            samples = self._last_samples
+        elif samples:
+            samples = (np.concatenate([s[0] for s in samples]), np.concatenate([s[1] for s in samples]))
+        else:
+            samples = _NO_SAMPLES
+        self._last_samples = samples
+        return FocusDecision(
+            self.focus_distance, target_steps, moved, roi, tracks, self.selected_id,
+            face, selected_mask, samples, flow, frame_id, color,
+        )
@@ -0,0 +1,67 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class InferenceScheduler:
+    #  Führt Modellaufrufe in Worker-Threads aus, damit Hailo-Inferenz und
+    #  Python-Nachbearbeitung überlappen. Aufrufe desselben Modells laufen
+    #  nacheinander (eigenes Lock), verschiedene Modelle parallel. Pro Modell sind
+    #  höchstens max_in_flight Aufträge offen; submit() blockiert darüber hinaus.
+    def __init__(self, max_in_flight=2, workers=3):
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._model_locks = defaultdict(threading.Lock)
+        self._slots = defaultdict(lambda: threading.BoundedSemaphore(self.max_in_flight))
+        self.submitted = 0
+        self.completed = 0
+
+    def _slot_and_lock(self, model):
+        with self._lock:
+            return self._slots[model], self._model_locks[model]
+
+    def submit(self, frame_id, model, fn, *args, callback=None) -> Future:
+        slot, model_lock = self._slot_and_lock(model)
+        slot.acquire()
+
+        def run():
+            with model_lock:
+                return fn(*args)
+
+        try:
+            future = self._executor.submit(run)
+        except Exception:
+            slot.release()
+            raise
+        future.frame_id = frame_id
+        future.model = model
+        with self._lock:
+            self.submitted += 1
+
+        def done(f):
+            slot.release()
+            with self._lock:
+                self.completed += 1
+            if callback is not None and not f.cancelled() and f.exception() is None:
+                callback(frame_id, f.result())
+
+        future.add_done_callback(done)
+        return future
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return self.submitted - self.completed
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class CompletedCall:
+    #  Future-Ersatz für den synchronen Pfad
+    def __init__(self, value):
+        self._value = value
+
+    def result(self, timeout=None):
+        return self._value
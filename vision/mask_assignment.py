@@ -0,0 +1,122 @@
+from collections import namedtuple
+
+import numpy as np
+import cv2
+from scipy.optimize import linear_sum_assignment
+
+
+#  Eine Personeninstanz aus der ROI-Segmentierung: Box in Bildkoordinaten und
+#  bool-Maske in Boxgröße
+MaskInstance = namedtuple("MaskInstance", ["x1", "y1", "x2", "y2", "mask"])
+
+
+def instance_from_result(mask, bbox, image_shape):
+    #  Modellmasken kommen je nach Modell bildgroß oder boxgroß; beides auf Boxgröße bringen
+    mask = np.asarray(mask)
+    height, width = image_shape[:2]
+    if bbox is None:
+        if mask.shape[:2] != (height, width):
+            return None
+        ys, xs = np.nonzero(mask > 0.5)
+        if len(xs) == 0:
+            return None
+        bbox = (xs.min(), ys.min(), xs.max() + 1, ys.max() + 1)
+    x1, y1 = max(0, int(bbox[0])), max(0, int(bbox[1]))
+    x2, y2 = min(width, int(bbox[2])), min(height, int(bbox[3]))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    if mask.shape[:2] == (height, width):
+        mask = mask[y1:y2, x1:x2]
+    elif mask.shape[:2] != (y2 - y1, x2 - x1):
+        mask = cv2.resize(mask.astype(np.float32), (x2 - x1, y2 - y1), interpolation=cv2.INTER_NEAREST)
+    return MaskInstance(x1, y1, x2, y2, mask > 0.5)
+
+
+def shift_instance(instance, dx, dy):
+    return instance._replace(x1=instance.x1 + dx, y1=instance.y1 + dy, x2=instance.x2 + dx, y2=instance.y2 + dy)
+
+
+def mask_box_iou(instances, boxes):
+    #  IoU-Matrix (Instanzen x Boxen) zwischen Maskenpixeln und Boxflächen. Pro
+    #  Instanz ein Integralbild, damit sind alle Schnittmengen vier Lookups.
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    iou = np.zeros((len(instances), len(boxes)), dtype=np.float64)
+    if len(instances) == 0 or len(boxes) == 0:
+        return iou
+    box_area = (boxes[:, 2] - boxes[:, 0]).clip(0) * (boxes[:, 3] - boxes[:, 1]).clip(0)
+    for i, inst in enumerate(instances):
+        integral = cv2.integral(inst.mask.astype(np.uint8))
+        h, w = inst.mask.shape
+        bx1 = np.clip(boxes[:, 0] - inst.x1, 0, w)
+        by1 = np.clip(boxes[:, 1] - inst.y1, 0, h)
+        bx2 = np.clip(boxes[:, 2] - inst.x1, 0, w)
+        by2 = np.clip(boxes[:, 3] - inst.y1, 0, h)
+        inter = integral[by2, bx2] - integral[by1, bx2] - integral[by2, bx1] + integral[by1, bx1]
+        union = integral[h, w] + box_area - inter
+        iou[i] = np.where(union > 0, inter / np.maximum(union, 1), 0.0)
+    return iou
+
+
+def assign_masks(instances, tracks, min_iou=0.3):
+    #  optimale 1:1-Zuordnung Instanz -> Track (Hungarian), schwache Paare verwerfen
+    if len(instances) == 0 or len(tracks) == 0:
+        return {}
+    tracks = np.asarray(tracks)
+    iou = mask_box_iou(instances, tracks[:, :4])
+    rows, cols = linear_sum_assignment(-iou)
+    return {
+        int(tracks[c, 4]): instances[r]
+        for r, c in zip(rows, cols)
+        if iou[r, c] >= min_iou
+    }
+
+
+def mask_in_box(instance, box):
+    #  Instanzmaske in das Koordinatensystem einer anderen Box (z.B. Track-Crop) übertragen
+    x1, y1, x2, y2 = (int(v) for v in box)
+    out = np.zeros((y2 - y1, x2 - x1), dtype=bool)
+    ox1, oy1 = max(x1, instance.x1), max(y1, instance.y1)
+    ox2, oy2 = min(x2, instance.x2), min(y2, instance.y2)
+    if ox2 > ox1 and oy2 > oy1:
+        out[oy1 - y1:oy2 - y1, ox1 - x1:ox2 - x1] = \
+            instance.mask[oy1 - instance.y1:oy2 - instance.y1, ox1 - instance.x1:ox2 - instance.x1]
+    return out
+
+
+class RoiSegmentation:
+    #  Eine Segmentierung für die ganze ROI pro Frame. Angestoßen wird erst beim
+    #  ersten Track, der eine Maske braucht (Cache-Fehlschlag); die Zuordnung zu
+    #  den Tracks passiert einmal beim ersten Abholen.
+    def __init__(self, submit, roi, tracks, min_iou):
+        self._submit = submit
+        self.roi = roi
+        self.tracks = tracks
+        self.min_iou = min_iou
+        self._call = None
+        self._assigned = None
+
+    def request(self, track_id, bbox):
+        if self._call is None:
+            self._call = self._submit()
+        return _AssignedMask(self, track_id, bbox)
+
+    def mask_for(self, track_id, bbox):
+        if self._assigned is None:
+            instances = self._call.result() or []
+            instances = [shift_instance(inst, self.roi[0], self.roi[1]) for inst in instances]
+            self._assigned = assign_masks(instances, self.tracks, self.min_iou)
+        instance = self._assigned.get(int(track_id))
+        if instance is None:
+            return None
+        return mask_in_box(instance, bbox)
+
+
+class _AssignedMask:
+    #  wie ein Future: result() liefert die Maske dieses Tracks in Boxkoordinaten
+    def __init__(self, segmentation, track_id, bbox):
+        self._segmentation = segmentation
+        self._track_id = track_id
+        self._bbox = bbox
+
+    def result(self, timeout=None):
+        return self._segmentation.mask_for(self._track_id, self._bbox)
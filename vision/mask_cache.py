@@ -0,0 +1,64 @@
+from collections import OrderedDict
+
+import numpy as np
+import cv2
+
+from vision.boxes import iou_matrix
+
+
+class MaskCache:
+    #  Segmentierungsmasken pro Track-ID. Neu segmentiert wird nur, wenn die
+    #  Box sich zu stark verändert (IoU < iou_threshold) oder die Maske max_age
+    #  Frames alt ist; dazwischen wird die gecachte Maske auf die neue Box skaliert.
+    def __init__(self, iou_threshold=0.85, max_age=8, capacity=16):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.capacity = capacity
+        self._entries = OrderedDict()  # track_id -> [bbox, mask (uint8), age]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, track_id, bbox):
+        entry = self._entries.get(track_id)
+        if entry is None or entry[2] >= self.max_age or iou_matrix(entry[0], bbox)[0, 0] < self.iou_threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry[2] += 1
+        self._entries.move_to_end(track_id)
+        cached_bbox, mask = entry[0], entry[1]
+        width, height = int(bbox[2] - bbox[0]), int(bbox[3] - bbox[1])
+        if (cached_bbox[2] - cached_bbox[0], cached_bbox[3] - cached_bbox[1]) == (width, height):
+            return mask
+        return cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+
+    def store(self, track_id, bbox, mask):
+        self._entries[track_id] = [tuple(int(v) for v in bbox), np.asarray(mask, dtype=np.uint8), 0]
+        self._entries.move_to_end(track_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def retain(self, track_ids):
+        #  Masken gestorbener Tracks verwerfen
+        alive = set(int(t) for t in track_ids)
+        for track_id in [t for t in self._entries if t not in alive]:
+            del self._entries[track_id]
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
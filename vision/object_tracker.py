@@ -1,4 +1,5 @@
-import sys
+import threading
+
 import numpy as np
 import degirum as dg
 
@@ -12,76 +13,156 @@ from utils.config import (
     DG_DEVICE_TYPE,
     DG_TOKEN,
     DG_INFERENCE_HOST,
+    DG_LAZY_MODELS,
+    TRACKER_HIGH_SCORE,
+    TRACKER_LOW_SCORE,
+    TRACKER_NEW_TRACK_SCORE,
+    TRACKER_MAX_LOST,
 )
+from vision.byte_tracker import ByteTracker, as_detections
+from vision.mask_assignment import MaskInstance, instance_from_result
+
+
+#  name -> (Modellname, Zoo-URL)
+_MODELS = {
+    "person": (DG_MODEL_PERSON_NAME, DG_ZOO_PERSON_URL),
+    "face": (DG_MODEL_FACE_NAME, DG_ZOO_FACE_URL),
+    "seg": (DG_MODEL_SEG_NAME, DG_ZOO_SEG_URL),
+}
+
+
+def load_model(name):
+    model_name, zoo_url = _MODELS[name]
+    model = dg.load_model(
+        model_name=model_name,
+        inference_host_address=DG_INFERENCE_HOST,
+        zoo_url=zoo_url,
+        token=DG_TOKEN,
+        device_type=DG_DEVICE_TYPE,
+    )
+    if name == "person":
+        #  auch unsichere Personen liefern, der Tracker ordnet sie in seiner zweiten Stufe zu
+        model.output_confidence_threshold = TRACKER_LOW_SCORE
+    return model
+
+
+def warm_up(model):
+    #  erster Aufruf ist langsam (Initialisierung auf dem Beschleuniger)
+    _ = model(np.zeros((64, 64, 3), dtype=np.uint8))
+    return model
 
-#  SORT direkt von festem Pfad laden
-sys.path.append('/home/amacus/hailo_examples/sort')
-from sort import Sort
 
 class DetectionPipeline:
-    def __init__(self):
-        #  Modelle hart laden
-        self.model_person = dg.load_model(
-            model_name=DG_MODEL_PERSON_NAME,
-            inference_host_address=DG_INFERENCE_HOST,
-            zoo_url=DG_ZOO_PERSON_URL,
-            token=DG_TOKEN,
-            device_type=DG_DEVICE_TYPE,
-        )
-        self.model_face = dg.load_model(
-            model_name=DG_MODEL_FACE_NAME,
-            inference_host_address=DG_INFERENCE_HOST,
-            zoo_url=DG_ZOO_FACE_URL,
-            token=DG_TOKEN,
-            device_type=DG_DEVICE_TYPE,
-        )
-        self.model_seg = dg.load_model(
-            model_name=DG_MODEL_SEG_NAME,
-            inference_host_address=DG_INFERENCE_HOST,
-            zoo_url=DG_ZOO_SEG_URL,
-            token=DG_TOKEN,
-            device_type=DG_DEVICE_TYPE,
-        )
-        #  Warmup (Face + Seg)
-        dummy = np.zeros((64, 64, 3), dtype=np.uint8)
-        _ = self.model_face(dummy)
-        _ = self.model_seg(dummy)
-
-    def detect_person_bboxes(self, image_bgr) -> list[tuple[int, int, int, int]]:
-        #  nur x1,y1,x2,y2 (ohne Score)
+    #  sources: name -> Callable, das das fertige Modell liefert (z.B. Warten auf den
+    #  StartupLoader). Ohne Eintrag wird hier geladen. person immer sofort; face/seg mit
+    #  DG_LAZY_MODELS in einem Hintergrundthread, bis dahin liefern detect_faces und
+    #  segment_* nichts (keine Gesichter, keine Maske), statt den Aufrufer (UI-Tick bei
+    #  der ersten Auswahl) warten zu lassen. Ohne DG_LAZY_MODELS hier sofort.
+    def __init__(self, sources=None, lazy=DG_LAZY_MODELS):
+        sources = dict(sources or {})
+        self._sources = {
+            "person": sources.get("person", lambda: load_model("person")),
+            "face": sources.get("face", lambda: warm_up(load_model("face"))),
+            "seg": sources.get("seg", lambda: warm_up(load_model("seg"))),
+        }
+        self._models = {}
+        #  ein Lock je Modell: wer auf ein Modell wartet, hält die anderen nicht auf
+        self._locks = {name: threading.Lock() for name in self._sources}
+        self._background = ("face", "seg") if lazy else ()
+        self._load("person")
+        if lazy:
+            threading.Thread(target=self._load_background, name="model-loader", daemon=True).start()
+        else:
+            self._load("face")
+            self._load("seg")
+
+    def _load(self, name):
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._sources[name]()
+                self._models[name] = model
+        return model
+
+    def _load_background(self):
+        #  nacheinander, ein Beschleuniger (wie STARTUP_SERIAL_MODEL_LOADS)
+        for name in self._background:
+            try:
+                self._load(name)
+            except Exception as e:
+                print(f"Error loading {name} model: {e}")
+
+    def _model(self, name):
+        #  Hintergrundmodelle: None, solange sie laden
+        model = self._models.get(name)
+        if model is None and name not in self._background:
+            model = self._load(name)
+        return model
+
+    @property
+    def model_person(self):
+        return self._model("person")
+
+    @property
+    def model_face(self):
+        return self._model("face")
+
+    @property
+    def model_seg(self):
+        return self._model("seg")
+
+    def detect_person_bboxes(self, image_bgr) -> np.ndarray:
+        #  Nx5 (x1, y1, x2, y2, score), Vertrag siehe vision.byte_tracker.as_detections
         results = self.model_person(image_bgr)
-        boxes: list[tuple[int, int, int, int]] = []
-        for r in results.results:
-            if r.get('label') == 'person':
-                x1, y1, x2, y2 = r['bbox']
-                boxes.append((int(x1), int(y1), int(x2), int(y2)))
-        return boxes
+        boxes = [tuple(r['bbox']) + (float(r.get('score', 1.0)),)
+                 for r in results.results if r.get('label') == 'person']
+        return as_detections(boxes)
 
     def detect_faces(self, image_bgr) -> list[tuple[int, int, int, int, float]]:
-        results = self.model_face(image_bgr)
+        model = self.model_face
+        if model is None:
+            return []
+        results = model(image_bgr)
         faces: list[tuple[int, int, int, int, float]] = []
         for r in results.results:
             if r.get('label') == 'face' and float(r.get('score', 0)) > 0.3:
                 x1, y1, x2, y2 = r['bbox']
                 score = float(r.get('score', 0.0))
-                faces.append((int(x1), int(y1), int(x2, int(y2), score)))
+                faces.append((int(x1), int(y1), int(x2), int(y2), score))
         return faces
 
     def segment_person(self, image_bgr):
-        results = self.model_seg(image_bgr)
+        model = self.model_seg
+        if model is None:
+            return None
+        results = model(image_bgr)
         for r in results.results:
             if r.get('label') == 'person':
                 mask = r.get('mask') or r.get('segmentation_mask')
                 return mask
         return None
 
+    def segment_persons(self, image_bgr) -> list[MaskInstance]:
+        #  alle Personeninstanzen, Masken auf Boxgröße
+        model = self.model_seg
+        if model is None:
+            return []
+        results = model(image_bgr)
+        instances: list[MaskInstance] = []
+        for r in results.results:
+            if r.get('label') != 'person':
+                continue
+            mask = r.get('mask')
+            if mask is None:
+                mask = r.get('segmentation_mask')
+            if mask is None:
+                continue
+            instance = instance_from_result(mask, r.get('bbox'), image_bgr.shape)
+            if instance is not None:
+                instances.append(instance)
+        return instances
 
-class SortTracker:
-    def __init__(self):
-        self._sort = Sort()
 
-    def update(self, dets: np.ndarray) -> np.ndarray:
-        #  Dets unverändert an SORT weitergeben (kein Score anhängen)
-        if dets is None:
-            dets = np.empty((0, 5))
-        return self._sort.update(dets)
\ No newline at end of file
+def build_tracker():
+    #  Personentracker mit den TRACKER_*-Einstellungen
+    return ByteTracker(TRACKER_HIGH_SCORE, TRACKER_LOW_SCORE, TRACKER_NEW_TRACK_SCORE, max_lost=TRACKER_MAX_LOST)
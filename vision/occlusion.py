@@ -0,0 +1,111 @@
+import numpy as np
+
+
+#  Tiefenraster je Box: g x g Punkte im mittleren Streifen (Personenboxen haben
+#  links/rechts viel Hintergrund), oben/unten 10 % Rand
+_GRID_X = (0.3, 0.7)
+_GRID_Y = (0.1, 0.9)
+
+
+def box_median_depths(depth, boxes, grid=8, min_exclusive=4):
+    #  Median gültiger Tiefen (mm) eines g x g-Rasters je Box, ein Gather für alle
+    #  Boxen; 0, wenn kein Rasterpunkt gültig ist. Gezählt werden nur Rasterpunkte,
+    #  die in keiner anderen Box liegen: wo eine andere Box überlappt, misst das
+    #  Raster sonst die Person davor, und eine halb verdeckte Person landete auf
+    #  deren Tiefe. Erst mit weniger als min_exclusive solchen Punkten zählen alle.
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.float64)
+    height, width = depth.shape[:2]
+    steps = (np.arange(grid) + 0.5) / grid
+    fx = _GRID_X[0] + (_GRID_X[1] - _GRID_X[0]) * steps
+    fy = _GRID_Y[0] + (_GRID_Y[1] - _GRID_Y[0]) * steps
+    xs = boxes[:, 0, None] + (boxes[:, 2] - boxes[:, 0])[:, None] * fx
+    ys = boxes[:, 1, None] + (boxes[:, 3] - boxes[:, 1])[:, None] * fy
+    #  (Box, Rasterpunkt, andere Box): Punkt liegt in der anderen Box
+    px = np.broadcast_to(xs[:, None, :], (len(boxes), grid, grid)).reshape(len(boxes), -1)
+    py = np.broadcast_to(ys[:, :, None], (len(boxes), grid, grid)).reshape(len(boxes), -1)
+    covered = ((px[:, :, None] >= boxes[None, None, :, 0]) & (px[:, :, None] < boxes[None, None, :, 2]) &
+               (py[:, :, None] >= boxes[None, None, :, 1]) & (py[:, :, None] < boxes[None, None, :, 3]))
+    covered[np.arange(len(boxes)), :, np.arange(len(boxes))] = False
+    xs = np.clip(xs.astype(np.int64), 0, width - 1)
+    ys = np.clip(ys.astype(np.int64), 0, height - 1)
+    values = depth[ys[:, :, None], xs[:, None, :]].reshape(len(boxes), -1).astype(np.float64)
+    exclusive = ~covered.any(axis=2) & (values > 0)
+    use_exclusive = exclusive.sum(axis=1) >= min_exclusive
+    values[use_exclusive[:, None] & ~exclusive] = 0
+    valid = np.count_nonzero(values, axis=1)
+    #  Löcher ans Ende sortieren, dann den (unteren) Median der gültigen Werte nehmen
+    values[values == 0] = np.inf
+    values.sort(axis=1)
+    medians = values[np.arange(len(boxes)), np.maximum(valid - 1, 0) // 2]
+    return np.where(valid > 0, medians, 0.0)
+
+
+class OcclusionMap:
+    #  Ein Labelbild für die ROI pro Frame: jeder Pixel gehört der vordersten Person,
+    #  deren Box ihn bedeckt. Die Boxen werden nach Median-Tiefe von hinten nach vorne
+    #  gemalt (nähere überschreiben fernere); die Sichtbarkeitsmaske eines Tracks ist
+    #  dann label == Track. Eine Person hinter der Fokusperson schneidet also nichts
+    #  mehr aus ihr heraus, nur Personen davor. Ohne Tiefe zählt ein Track als
+    #  hinterster. Das Labelbild wird bei gleicher ROI-Größe wiederverwendet.
+    NOBODY = -1
+
+    def __init__(self):
+        self.roi = None
+        self._label = None
+        self._rows = {}
+        self.depths = np.empty(0, dtype=np.float64)
+
+    def build(self, roi, boxes, track_ids, depths):
+        #  boxes Nx4 in Bildkoordinaten, depths (mm, 0 = unbekannt) in derselben Reihenfolge
+        rx1, ry1, rx2, ry2 = (int(v) for v in roi)
+        shape = (max(0, ry2 - ry1), max(0, rx2 - rx1))
+        if self._label is None or self._label.shape != shape:
+            self._label = np.empty(shape, dtype=np.int16)
+        self._label.fill(self.NOBODY)
+        self.roi = (rx1, ry1, rx2, ry2)
+        self._rows = {int(t): i for i, t in enumerate(track_ids)}
+        self.depths = np.asarray(depths, dtype=np.float64)
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        order = np.argsort(-np.where(self.depths > 0, self.depths, np.inf), kind="stable")
+        clipped = np.empty((len(boxes), 4), dtype=np.int64)
+        clipped[:, [0, 2]] = np.clip(boxes[:, [0, 2]], rx1, rx2).astype(np.int64) - rx1
+        clipped[:, [1, 3]] = np.clip(boxes[:, [1, 3]], ry1, ry2).astype(np.int64) - ry1
+        label = self._label
+        for i in order:
+            x1, y1, x2, y2 = clipped[i]
+            label[y1:y2, x1:x2] = i
+        return self
+
+    @property
+    def label(self):
+        #  ROI-Labelbild: Index in die an build() übergebene Reihenfolge, NOBODY = frei
+        return self._label
+
+    def visible(self, track_id, box):
+        #  bool-Maske in Größe von box (x1, y1, x2, y2): Pixel, die keine nähere
+        #  Person verdeckt; außerhalb der ROI gibt es keine Information (sichtbar)
+        x1, y1, x2, y2 = (int(v) for v in box)
+        mask = np.ones((max(0, y2 - y1), max(0, x2 - x1)), dtype=bool)
+        row = self._rows.get(int(track_id))
+        if row is None or self.roi is None:
+            return mask
+        rx1, ry1, rx2, ry2 = self.roi
+        ox1, oy1, ox2, oy2 = max(x1, rx1), max(y1, ry1), min(x2, rx2), min(y2, ry2)
+        if ox2 > ox1 and oy2 > oy1:
+            np.equal(self._label[oy1 - ry1:oy2 - ry1, ox1 - rx1:ox2 - rx1], row,
+                     out=mask[oy1 - y1:oy2 - y1, ox1 - x1:ox2 - x1])
+        return mask
+
+    def masked_crop(self, frame, track_id, box, max_hidden=0.5):
+        #  Kopie des Boxausschnitts, verdeckte Pixel schwarz (für die Gesichtsdetektion).
+        #  Ist mehr als max_hidden verdeckt, bleibt der Ausschnitt ungeschwärzt, sonst
+        #  fände der Detektor im Rest kaum noch etwas. Liefert (crop, visible).
+        x1, y1, x2, y2 = (int(v) for v in box)
+        visible = self.visible(track_id, box)
+        region = frame[y1:y2, x1:x2]
+        crop = region.copy()
+        if visible.size and 1.0 - visible.mean() <= max_hidden:
+            crop[~visible] = 0
+        return crop, visible
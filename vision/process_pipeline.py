@@ -0,0 +1,293 @@
+import multiprocessing as mp
+import queue as queue_module
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from hardware.frame_ring import capture_time
+from hardware.shm_ring import SharedFrameRing
+from hardware.lens_profile import get_lens_profile
+from vision.boxes import smallest_box_at
+from utils.metrics import Metrics
+
+
+#  Ergebnis des Inferenzprozesses für die UI: FocusDecision ohne Bild (frame=None,
+#  selected_mask als packbits), dazu die Ring-Sequenznummer des Frames und die
+#  aktuelle Motorposition. Das Bild holt sich die UI selbst aus dem Ring.
+DecisionPacket = namedtuple('DecisionPacket', ['seq', 'decision', 'mask', 'current_steps'])
+
+
+def pack_decision(seq, decision, current_steps):
+    mask = None
+    if decision.selected_mask is not None:
+        x1, y1, mask_bin = decision.selected_mask
+        mask = (x1, y1, mask_bin.shape, np.packbits(mask_bin))
+    return DecisionPacket(seq, decision._replace(selected_mask=None, frame=None), mask, current_steps)
+
+
+def unpack_decision(packet, frame):
+    decision = packet.decision._replace(frame=frame)
+    if packet.mask is not None:
+        x1, y1, shape, bits = packet.mask
+        mask_bin = np.unpackbits(bits, count=shape[0] * shape[1]).reshape(shape).astype(bool)
+        decision = decision._replace(selected_mask=(x1, y1, mask_bin))
+    return decision
+
+
+def build_camera(replay_path=None, replay_mode="realtime", loop=False):
+    #  im Capture-Prozess: direkt greifen (threaded=False), der Prozess ist der Capture-Thread
+    if replay_path:
+        from hardware.replay import ReplayCamera
+        return ReplayCamera(replay_path, mode=replay_mode, loop=loop)
+    from hardware.camera import RealSenseCamera
+    #  die Ring-Slots haben Farbauflösung, daher hier immer volles Align
+    return RealSenseCamera(threaded=False, align_mode="full")
+
+
+def build_engine(lichtbedingung=None, focus_time=0.0):
+    #  im Inferenzprozess: Hailo-Modelle, Tracker und Motorprozess gehören hierher
+    from hardware.motor_controller import MotorController
+    from vision.object_tracker import DetectionPipeline, build_tracker
+    from vision.focus_engine import FocusEngine
+    from vision.inference_scheduler import InferenceScheduler
+    from utils.config import INFERENCE_PIPELINED, INFERENCE_MAX_IN_FLIGHT, INFERENCE_WORKERS
+    scheduler = InferenceScheduler(INFERENCE_MAX_IN_FLIGHT, INFERENCE_WORKERS) if INFERENCE_PIPELINED else None
+    motor = MotorController(initial_focus_time=focus_time)
+    return FocusEngine(DetectionPipeline(), build_tracker(), motor, lichtbedingung=lichtbedingung,
+                       focus_time=focus_time, scheduler=scheduler)
+
+
+def _capture_worker(ring_spec, stop_event, camera_factory, camera_kwargs):
+    ring = SharedFrameRing.attach(ring_spec)
+    camera = camera_factory(**camera_kwargs)
+    try:
+        while not stop_event.is_set():
+            captured = camera.latest(timeout=0.1)
+            if captured is None:
+                if getattr(camera, "finished", False):
+                    break
+                continue
+            ring.push(captured.color, captured.depth, captured.frame_number, captured.timestamp_ms,
+                      captured.received, captured.exposure)
+    finally:
+        camera.stop()
+        ring.close()
+
+
+def _inference_worker(ring_spec, stop_event, commands, results, metrics_queue, engine_factory, engine_kwargs):
+    ring = SharedFrameRing.attach(ring_spec)
+    engine = engine_factory(**engine_kwargs)
+    metrics = Metrics()
+    engine.timer = metrics
+    #  frame_id der Engine -> Ring-Sequenz (mit Scheduler kommt die Entscheidung später)
+    seqs = deque(maxlen=16)
+    next_report = time.monotonic() + 1.0
+    try:
+        while not stop_event.is_set():
+            try:
+                while True:
+                    name, args = commands.get_nowait()
+                    if name == "setattr":
+                        setattr(engine, *args)
+                    else:
+                        getattr(engine, name)(*args)
+            except queue_module.Empty:
+                pass
+            if time.monotonic() >= next_report:
+                next_report = time.monotonic() + 1.0
+                if hasattr(engine.motor, "poll_metrics"):
+                    engine.motor.poll_metrics(metrics)
+                try:
+                    metrics_queue.put_nowait(metrics.snapshot())
+                except queue_module.Full:
+                    pass
+            latest = ring.latest(timeout=0.05)
+            if latest is None:
+                continue
+            seq, captured = latest
+            metrics.gauge("camera.dropped_total", captured.dropped)
+            t0 = time.perf_counter()
+            try:
+                seqs.append((engine.frame_id + 1, seq))
+                decision = engine.step(captured.color, captured.depth, captured_at=capture_time(captured))
+            except Exception as e:
+                metrics.count("errors.step")
+                print(f"Error in step: {e}")
+                continue
+            metrics.observe("inference_step", (time.perf_counter() - t0) * 1000.0)
+            if decision is None:
+                continue
+            seq = dict(seqs).get(decision.frame_id, seq)
+            try:
+                results.put_nowait(pack_decision(seq, decision, engine.motor.current_steps))
+            except queue_module.Full:
+                metrics.count("results.dropped")
+    finally:
+        if getattr(engine, "scheduler", None) is not None:
+            engine.scheduler.shutdown(wait=False)
+        engine.motor.stop()
+        ring.close()
+
+
+class RemoteEngine:
+    #  Stellvertreter für FocusEngine in der UI: hält die Felder, die MainScreen liest
+    #  (ROI, Framegröße, Tracks), und schickt Methodenaufrufe an den Inferenzprozess.
+    #  Die ROI wird in der UI direkt verändert (Ecken ziehen) und bei sync() übertragen.
+    def __init__(self, commands, frame_size, lichtbedingung=None, focus_time=0.0):
+        self._commands = commands
+        self.frame_width, self.frame_height = frame_size
+        self.roi_start = None
+        self.roi_end = None
+        self._sent_roi = None
+        self._focus_time = focus_time
+        self.lens = get_lens_profile(lichtbedingung)
+        self.person_tracks = np.empty((0, 5))
+        self.selected_id = None
+        self.quality = None
+        self.current_steps = 0
+
+    def _send(self, name, *args):
+        self._commands.put((name, args))
+
+    @property
+    def focus_time(self):
+        return self._focus_time
+
+    @focus_time.setter
+    def focus_time(self, value):
+        self._focus_time = value
+        self._send("setattr", "focus_time", value)
+
+    def ensure_roi(self, frame_width, frame_height):
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        if self.roi_start is None or self.roi_end is None:
+            self.roi_start = [int(frame_width * 0.37), int(frame_height * 0.37)]
+            self.roi_end = [int(frame_width * 0.61), int(frame_height * 0.65)]
+        self.sync()
+
+    def set_roi(self, x1, y1, x2, y2):
+        self.roi_start = [int(x1), int(y1)]
+        self.roi_end = [int(x2), int(y2)]
+        self._sent_roi = (tuple(self.roi_start), tuple(self.roi_end))
+        self._send("set_roi", *self.roi_start, *self.roi_end)
+
+    def sync(self):
+        roi = (tuple(self.roi_start), tuple(self.roi_end)) if self.roi_start is not None else None
+        if roi is not None and roi != self._sent_roi:
+            self._sent_roi = roi
+            self._send("setattr", "roi_start", list(roi[0]))
+            self._send("setattr", "roi_end", list(roi[1]))
+
+    def select_track(self, track_id):
+        self._send("select_track", int(track_id))
+
+    def select_point(self, x, y):
+        if self.roi_start is None or not (self.roi_start[0] <= x < self.roi_end[0] and
+                                          self.roi_start[1] <= y < self.roi_end[1]):
+            return False
+        self._send("select_point", int(x), int(y))
+        return True
+
+    def select_at(self, x, y):
+        #  wie FocusEngine.select_at, aber der Treffertest läuft hier auf den zuletzt
+        #  gezeigten Tracks; geschickt wird die konkrete Auswahl, damit der Rückgabewert
+        #  (utils.control: "tap") zu dem passt, was der Inferenzprozess tut
+        hit = smallest_box_at(self.person_tracks, x, y)
+        if hit is not None:
+            self.select_track(int(self.person_tracks[hit, 4]))
+            return True
+        return self.select_point(x, y)
+
+    def clear_point(self):
+        self._send("clear_point")
+
+    def reset(self):
+        self._send("reset")
+
+    def set_quality(self, level):
+        self.quality = level
+        self._send("set_quality", level)
+
+    def focus_plane_pos(self, default):
+        current = self.current_steps
+        return self.lens.focus_plane_m(current) if current != 0 else default
+
+    def update_from(self, packet):
+        decision = packet.decision
+        self.person_tracks = decision.tracks
+        self.selected_id = decision.selected_id
+        self.current_steps = packet.current_steps
+
+
+class ProcessPipeline:
+    #  Capture, Inferenz und UI in getrennten Prozessen. Frames laufen nur über den
+    #  SharedFrameRing; zurück kommen DecisionPackets (ohne Bild) über eine kleine Queue.
+    def __init__(self, camera_factory=build_camera, camera_kwargs=None, engine_factory=build_engine,
+                 engine_kwargs=None, frame_size=(1280, 720), slots=8):
+        width, height = frame_size
+        engine_kwargs = engine_kwargs or {}
+        self.ring = SharedFrameRing(slots, (height, width, 3), (height, width))
+        self.stop_event = mp.Event()
+        self.commands = mp.Queue()
+        self.results = mp.Queue(maxsize=4)
+        self.metrics_queue = mp.Queue(maxsize=2)
+        self.engine = RemoteEngine(self.commands, frame_size, engine_kwargs.get("lichtbedingung"),
+                                   engine_kwargs.get("focus_time", 0.0))
+        self.capture_process = mp.Process(
+            target=_capture_worker, name="capture",
+            args=(self.ring.spec, self.stop_event, camera_factory, camera_kwargs or {}),
+        )
+        self.inference_process = mp.Process(
+            target=_inference_worker, name="inference",
+            args=(self.ring.spec, self.stop_event, self.commands, self.results, self.metrics_queue,
+                  engine_factory, engine_kwargs),
+        )
+        self.inference_process.start()
+        self.capture_process.start()
+        self.stale = 0
+        self._color = np.empty(self.ring.color_shape, dtype=np.uint8)
+        self._depth = np.empty(self.ring.depth_shape, dtype=np.uint16)
+
+    @property
+    def processes(self):
+        return [self.capture_process, self.inference_process]
+
+    def poll(self):
+        #  neueste Entscheidung samt Bild (Kopie aus dem Ring) oder None
+        self.engine.sync()
+        packet = None
+        try:
+            while True:
+                packet = self.results.get_nowait()
+        except queue_module.Empty:
+            pass
+        if packet is None:
+            return None
+        self.engine.update_from(packet)
+        captured = self.ring.read(packet.seq, self._color, self._depth)
+        if captured is None:
+            #  Slot schon überschrieben (UI zu langsam)
+            self.stale += 1
+            return None
+        return unpack_decision(packet, captured.color)
+
+    def poll_metrics(self, metrics):
+        latest = None
+        try:
+            while True:
+                latest = self.metrics_queue.get_nowait()
+        except queue_module.Empty:
+            pass
+        if latest is not None:
+            metrics.absorb("inference", latest)
+        metrics.gauge("frames.stale", self.stale)
+
+    def stop(self):
+        self.stop_event.set()
+        for process in (self.capture_process, self.inference_process):
+            process.join(timeout=3)
+            if process.is_alive():
+                process.terminate()
+        self.ring.close()
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class TargetFilter:
+    #  Konstant-Geschwindigkeits-Kalmanfilter auf der Fokusdistanz (m) eines Ziels.
+    #  Messungen außerhalb von `gate` Standardabweichungen der Innovation werden
+    #  verworfen; nach `max_rejects` Ausreißern in Folge gilt das Ziel als
+    #  gesprungen und der Filter startet neu auf der Messung. predict(t) schätzt
+    #  die Distanz zu einem späteren Zeitpunkt (z.B. Ankunft des Motors), wobei
+    #  höchstens `max_coast` s über die letzte Messung hinaus extrapoliert wird.
+    def __init__(self, process_noise=2.0, measurement_noise=0.05, gate=3.0, max_rejects=3, max_coast=0.5):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.gate = gate
+        self.max_rejects = max_rejects
+        self.max_coast = max_coast
+        self.accepted = 0
+        self.rejected = 0
+        self.reset()
+
+    def reset(self):
+        self.x = None  # [Distanz, Geschwindigkeit]
+        self.P = None
+        self.t = None
+        self.rejects_in_row = 0
+
+    @property
+    def initialized(self):
+        return self.x is not None
+
+    @property
+    def distance(self):
+        return float(self.x[0]) if self.x is not None else None
+
+    @property
+    def velocity(self):
+        return float(self.x[1]) if self.x is not None else 0.0
+
+    def _init(self, z, t):
+        self.x = np.array([z, 0.0])
+        self.P = np.diag([self.measurement_noise ** 2, 1.0])
+        self.t = t
+        self.rejects_in_row = 0
+
+    def _predicted(self, dt):
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        #  weißes Beschleunigungsrauschen
+        q = self.process_noise ** 2
+        Q = q * np.array([[dt ** 4 / 4.0, dt ** 3 / 2.0], [dt ** 3 / 2.0, dt ** 2]])
+        return F @ self.x, F @ self.P @ F.T + Q
+
+    def update(self, z, t):
+        #  True, wenn die Messung übernommen wurde
+        if z is None or not np.isfinite(z) or z <= 0:
+            return False
+        if self.x is None:
+            self._init(z, t)
+            self.accepted += 1
+            return True
+        dt = max(0.0, t - self.t)
+        x, P = self._predicted(dt)
+        innovation = z - x[0]
+        S = P[0, 0] + self.measurement_noise ** 2
+        if innovation * innovation > (self.gate ** 2) * S:
+            self.rejected += 1
+            self.rejects_in_row += 1
+            if self.rejects_in_row >= self.max_rejects:
+                self._init(z, t)
+                self.accepted += 1
+                return True
+            return False
+        K = P[:, 0] / S
+        self.x = x + K * innovation
+        self.P = P - np.outer(K, P[0, :])
+        self.t = t
+        self.rejects_in_row = 0
+        self.accepted += 1
+        return True
+
+    def predict(self, t):
+        if self.x is None:
+            return None
+        dt = min(max(0.0, t - self.t), self.max_coast)
+        return float(self.x[0] + self.x[1] * dt)
+
+    def stats(self):
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "distance": self.distance,
+            "velocity": self.velocity,
+        }
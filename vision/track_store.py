@@ -0,0 +1,143 @@
+import numpy as np
+
+from vision.boxes import smallest_box_at
+
+
+class TrackStore:
+    #  Tracks als Struct-of-Arrays: eine Zeile pro Track-ID in vorallokierten Spalten
+    #  (Box, ID, Alter, zuletzt gemessene Tiefe, Alter der letzten Maske), dazu ein
+    #  dict ID -> Zeile und je Track ein Ringpuffer der letzten `history` Tiefen.
+    #  Ein Track, der nicht mehr aus dem Tracker kommt, behält seine Zeile (und seine
+    #  Historie) noch `max_missing` Frames, so lange kann ByteTracker ihn mit derselben
+    #  ID wiederfinden. Zeilen sind dicht (0..count-1), gelöscht wird durch Umsetzen
+    #  der letzten Zeile; die Kapazität verdoppelt sich bei Bedarf.
+    def __init__(self, capacity=16, history=30, max_missing=30):
+        self.history = history
+        self.max_missing = max_missing
+        self.count = 0
+        self._index = {}
+        self._visible = np.empty(0, dtype=np.intp)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        columns = {
+            'boxes': ((capacity, 4), np.float32, 0.0),
+            'ids': ((capacity,), np.int64, -1),
+            'age': ((capacity,), np.int32, 0),           # Frames seit dem ersten Auftauchen
+            'missing': ((capacity,), np.int32, 0),       # Frames seit der letzten Trackerausgabe
+            'depth_mm': ((capacity,), np.float32, 0.0),  # letzte Tiefe, 0 = noch keine
+            'mask_age': ((capacity,), np.int32, -1),     # Frames seit der letzten Segmentierung, -1 = nie
+            '_depth_history': ((capacity, self.history), np.float32, 0.0),
+            '_history_head': ((capacity,), np.int32, 0),
+            '_history_len': ((capacity,), np.int32, 0),
+        }
+        for name, (shape, dtype, fill) in columns.items():
+            column = np.full(shape, fill, dtype=dtype)
+            if old:
+                column[:old] = getattr(self, name)[:old]
+            setattr(self, name, column)
+
+    def __len__(self):
+        #  sichtbare Tracks (in diesem Frame vom Tracker geliefert)
+        return len(self._visible)
+
+    def __contains__(self, track_id):
+        return int(track_id) in self._index
+
+    def row(self, track_id):
+        return self._index.get(int(track_id))
+
+    @property
+    def visible(self):
+        #  Zeilen der sichtbaren Tracks in der Reihenfolge der Trackerausgabe
+        return self._visible
+
+    def update(self, tracks):
+        #  Trackerausgabe (Nx5: x1, y1, x2, y2, track_id) eines Frames übernehmen
+        n = self.count
+        self.age[:n] += 1
+        self.missing[:n] += 1
+        np.add(self.mask_age[:n], 1, out=self.mask_age[:n], where=self.mask_age[:n] >= 0)
+        ids = tracks[:, 4].astype(np.int64).tolist()
+        rows = np.array([self._row_for(track_id) for track_id in ids], dtype=np.intp)
+        self.boxes[rows] = tracks[:, :4]
+        self.missing[rows] = 0
+        stale = np.flatnonzero(self.missing[:self.count] > self.max_missing)
+        if stale.size:
+            #  von hinten, damit das Umsetzen keine noch zu löschende Zeile verschiebt
+            for row in stale[::-1]:
+                self._remove(int(row))
+            rows = np.array([self._index[track_id] for track_id in ids], dtype=np.intp)
+        self._visible = rows
+
+    def _row_for(self, track_id):
+        row = self._index.get(track_id)
+        if row is not None:
+            return row
+        if self.count == len(self.ids):
+            self._allocate(2 * len(self.ids))
+        row = self.count
+        self.count += 1
+        self._index[track_id] = row
+        self.ids[row] = track_id
+        self.age[row] = 0
+        self.depth_mm[row] = 0.0
+        self.mask_age[row] = -1
+        self._history_head[row] = 0
+        self._history_len[row] = 0
+        return row
+
+    def _remove(self, row):
+        last = self.count - 1
+        del self._index[int(self.ids[row])]
+        if row != last:
+            for column in (self.boxes, self.ids, self.age, self.missing, self.depth_mm, self.mask_age,
+                           self._depth_history, self._history_head, self._history_len):
+                column[row] = column[last]
+            self._index[int(self.ids[row])] = row
+        self.count = last
+
+    def clear(self):
+        self._index.clear()
+        self.count = 0
+        self._visible = np.empty(0, dtype=np.intp)
+
+    def as_array(self):
+        #  sichtbare Tracks wieder als Nx5 (x1, y1, x2, y2, track_id)
+        rows = self._visible
+        return np.hstack([self.boxes[rows], self.ids[rows, None].astype(np.float32)])
+
+    def hit_test(self, x, y):
+        #  ID der kleinsten sichtbaren Box, die (x, y) enthält, sonst None
+        hit = smallest_box_at(self.boxes[self._visible], x, y)
+        return None if hit is None else int(self.ids[self._visible[hit]])
+
+    def areas(self):
+        #  Boxflächen der sichtbaren Tracks, Reihenfolge wie visible
+        boxes = self.boxes[self._visible]
+        return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+    def record_depth(self, track_id, depth_mm):
+        row = self._index.get(int(track_id))
+        if row is None or not depth_mm > 0:
+            return
+        self.depth_mm[row] = depth_mm
+        head = self._history_head[row]
+        self._depth_history[row, head] = depth_mm
+        self._history_head[row] = (head + 1) % self.history
+        self._history_len[row] = min(self._history_len[row] + 1, self.history)
+
+    def record_mask(self, track_id):
+        #  frisch segmentiert (ein Treffer im MaskCache zählt nicht)
+        row = self._index.get(int(track_id))
+        if row is not None:
+            self.mask_age[row] = 0
+
+    def depth_history(self, track_id):
+        #  gemessene Tiefen in mm, älteste zuerst (Kopie)
+        row = self._index.get(int(track_id))
+        if row is None:
+            return np.empty(0, dtype=np.float32)
+        length, head = self._history_len[row], self._history_head[row]
+        return np.roll(self._depth_history[row], -head)[self.history - length:]